@@ -0,0 +1,45 @@
+"""Shared helpers for the standalone benchmarks (run from backend/ with ``python -m benchmarks.<name>``)."""
+import os
+import statistics
+import time
+
+
+def setup_django(test_db: str = None):
+    """Configure Django; with test_db, point the default database's test DB at that file."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "irrigation_api.settings")
+    import django
+    from django.conf import settings
+
+    if test_db:
+        settings.DATABASES["default"]["TEST"] = {"NAME": test_db}
+    django.setup()
+
+
+def create_benchmark_db(verbosity: int = 0) -> str:
+    """Create and migrate a throwaway database; returns its old name for teardown."""
+    from django.db import connection
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, keepdb=False)
+    return old_name
+
+
+def destroy_benchmark_db(old_name: str, verbosity: int = 0):
+    from django.db import connection
+    connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+def time_call(fn, repeat: int = 5) -> float:
+    """Median wall time of fn() in seconds over ``repeat`` runs."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of a non-empty sample list."""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
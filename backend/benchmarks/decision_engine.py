@@ -0,0 +1,64 @@
+"""
+Per-row cost of the scalar decide_action path vs. the vectorized decide_actions engine.
+
+    python -m benchmarks.decision_engine --rows 1000000
+
+Forecast and stored crop ET lookups are stubbed out (readings carry no
+field_id, so no registry or water-balance lookups happen either), so only
+decision logic is measured and no database is needed.
+"""
+import argparse
+import time
+from unittest import mock
+
+import numpy as np
+
+from benchmarks.common import setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--scalar-rows", type=int, default=100_000,
+                        help="Rows timed on the scalar path (per-row cost is extrapolated)")
+    args = parser.parse_args()
+
+    setup_django()
+    from sensors.decision import decide_action, decide_actions
+
+    rng = np.random.default_rng(0)
+    moisture = rng.uniform(0, 60, args.rows)
+    temperature = rng.uniform(5, 45, args.rows)
+    humidity = rng.uniform(10, 100, args.rows)
+    rain = rng.random(args.rows) < 0.2
+    # Stored crop ET for half the rows; the rest use the temperature/humidity heuristic
+    crop_et = np.where(rng.random(args.rows) < 0.5, rng.uniform(0, 9, args.rows), np.nan)
+
+    scalar_rows = min(args.scalar_rows, args.rows)
+    m, t, h, r, et = (a[:scalar_rows].tolist() for a in (moisture, temperature, humidity, rain, crop_et))
+    row = [0]
+    stored_et = lambda location, crop_stage=None, day=None: None if np.isnan(et[row[0]]) else et[row[0]]
+    with mock.patch("sensors.decision.WeatherService.will_rain_today", side_effect=lambda location: r[row[0]]), \
+            mock.patch("sensors.decision.evapotranspiration.crop_et", side_effect=stored_et):
+        start = time.perf_counter()
+        scalar = []
+        for i in range(scalar_rows):
+            row[0] = i
+            scalar.append(decide_action(m[i], t[i], h[i], location="bench"))
+        scalar_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = decide_actions(moisture, temperature, humidity, rain_expected=rain, crop_et=crop_et)
+    batch_seconds = time.perf_counter() - start
+
+    assert batch[:scalar_rows].tolist() == scalar or scalar_rows == 0, "batch and scalar paths disagree"
+
+    scalar_ns = scalar_seconds / scalar_rows * 1e9
+    batch_ns = batch_seconds / args.rows * 1e9
+    print(f"scalar  : {scalar_ns:8.1f} ns/row  ({scalar_rows:,} rows in {scalar_seconds:.3f}s)")
+    print(f"batch   : {batch_ns:8.1f} ns/row  ({args.rows:,} rows in {batch_seconds:.3f}s)")
+    print(f"speedup : {scalar_ns / batch_ns:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Load test for POST /api/readings/ with simulated edge agents.
+
+    python -m benchmarks.ingest_load --agents 20 --readings 50
+    python -m benchmarks.ingest_load --agents 50 --readings 100 --json --max-p95-ms 250
+
+Serves the app with wsgiref (one thread per request) on a throwaway SQLite
+database, with the weather API stubbed out so decisions only read the local
+forecast cache. Each agent is a thread that reads the edge agent's simulated
+soil moisture and DHT22 sensors and posts one reading at a time, as the agent
+does for a single zone. Reports latency percentiles, throughput and database
+growth; exits non-zero when a --max-* limit is exceeded, so it can gate CI.
+
+Clients and server share one process (and the GIL), so absolute numbers are
+for comparing runs on the same machine, not capacity planning.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from socketserver import ThreadingMixIn
+from unittest import mock
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import requests
+
+from benchmarks.common import setup_django, create_benchmark_db, destroy_benchmark_db, percentile
+
+EDGE_SENSORS = Path(__file__).resolve().parents[2] / "raspberry-pi" / "src" / "sensors"
+
+
+def load_edge_module(name: str):
+    """Import an edge sensor module by path (its ``sensors`` package name clashes with the Django app)."""
+    spec = importlib.util.spec_from_file_location(f"edge_{name}", EDGE_SENSORS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def db_size(path: str) -> int:
+    """Main database file plus WAL, in bytes."""
+    return sum(os.path.getsize(p) for p in (path, f"{path}-wal") if os.path.exists(p))
+
+
+def run_agent(index, base_url, readings, interval, warmup, soil_moisture, dht22, latencies, errors):
+    soil = soil_moisture.SoilMoistureSensor(channel=index % 8)
+    climate = dht22.DHT22Sensor()
+    session = requests.Session()
+    field_id = f"bench-{index:04d}"
+    next_send = time.monotonic()
+    for i in range(warmup + readings):
+        temperature_c, humidity = climate.read_temperature_humidity(simulate=True)
+        payload = {
+            "timestamp": datetime.now().isoformat(),
+            "field_id": field_id,
+            "crop_stage": "vegetative",
+            "location": "bench",
+            "moisture": soil.read_moisture_percentage(simulate=True),
+            "temperature_c": temperature_c,
+            "humidity": humidity,
+        }
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{base_url}/api/readings/", json=payload, timeout=30)
+            ok = response.status_code == 201
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            latencies.append(elapsed)
+            if not ok:
+                errors.append(i)
+        if interval:
+            next_send += interval
+            time.sleep(max(0.0, next_send - time.monotonic()))
+    session.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, default=10, help="Concurrent simulated edge agents")
+    parser.add_argument("--readings", type=int, default=50, help="Measured readings per agent")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured readings per agent first")
+    parser.add_argument("--interval", type=float, default=0.0,
+                        help="Seconds between an agent's readings (0 = send back to back)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if p95 latency exceeds this")
+    parser.add_argument("--max-error-rate", type=float, default=0.0, help="Fail if more requests than this fraction fail")
+    parser.add_argument("--min-throughput", type=float, help="Fail below this many requests per second")
+    args = parser.parse_args()
+
+    os.environ["DEBUG"] = "0"  # Production-like: no per-query logging
+    workdir = tempfile.mkdtemp(prefix="ingest-load-")
+    db_path = os.path.join(workdir, "bench.sqlite3")
+    setup_django(test_db=db_path)
+    old_name = create_benchmark_db()
+    try:
+        from django.core.wsgi import get_wsgi_application
+        from sensors.models import SensorReading
+        from weather.services import WeatherService
+
+        soil_moisture = load_edge_module("soil_moisture")
+        dht22 = load_edge_module("dht22")
+
+        # No network: forecast refreshes find nothing, so decisions see "no rain"
+        with mock.patch.object(WeatherService, "fetch_forecast", return_value=None), \
+                mock.patch.object(WeatherService, "fetch_current_weather", return_value=None):
+            server = make_server("127.0.0.1", 0, get_wsgi_application(),
+                                 server_class=ThreadingWSGIServer, handler_class=QuietHandler)
+            server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+            server_thread.start()
+            base_url = f"http://127.0.0.1:{server.server_port}"
+
+            size_before = db_size(db_path)
+            rows_before = SensorReading.objects.count()
+            latencies, errors = [], []
+            agents = [
+                threading.Thread(target=run_agent, args=(
+                    i, base_url, args.readings, args.interval, args.warmup, soil_moisture, dht22, latencies, errors
+                ))
+                for i in range(args.agents)
+            ]
+            start = time.perf_counter()
+            for agent in agents:
+                agent.start()
+            for agent in agents:
+                agent.join()
+            duration = time.perf_counter() - start
+
+            server.shutdown()
+            server.server_close()
+
+        rows = SensorReading.objects.count() - rows_before
+        growth = db_size(db_path) - size_before
+        # Warm-up requests run inside the timed window too, so count them for throughput
+        sent = args.agents * (args.readings + args.warmup)
+        report = {
+            "agents": args.agents,
+            "requests": len(latencies),
+            "errors": len(errors),
+            "error_rate": len(errors) / len(latencies) if latencies else 0.0,
+            "duration_s": round(duration, 3),
+            "throughput_rps": round(sent / duration, 1) if duration else 0.0,
+            "latency_ms": {
+                name: round(percentile(latencies, pct) * 1000, 2)
+                for name, pct in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+            } if latencies else {},
+            "rows_stored": rows,
+            "db_growth_bytes": growth,
+            "db_bytes_per_row": round(growth / rows, 1) if rows else 0.0,
+        }
+    finally:
+        destroy_benchmark_db(old_name)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        latency = report["latency_ms"]
+        print(f"{report['agents']} agents, {report['requests']} measured requests in {report['duration_s']}s "
+              f"({report['errors']} errors)")
+        print(f"throughput : {report['throughput_rps']} req/s")
+        if latency:
+            print(f"latency    : p50 {latency['p50']} ms, p95 {latency['p95']} ms, "
+                  f"p99 {latency['p99']} ms, max {latency['max']} ms")
+        print(f"database   : +{report['db_growth_bytes'] / 1024:.0f} KiB for {report['rows_stored']} rows "
+              f"({report['db_bytes_per_row']} B/row)")
+
+    failures = []
+    if report["error_rate"] > args.max_error_rate:
+        failures.append(f"error rate {report['error_rate']:.2%} > {args.max_error_rate:.2%}")
+    if args.max_p95_ms is not None and report["latency_ms"].get("p95", 0) > args.max_p95_ms:
+        failures.append(f"p95 {report['latency_ms']['p95']} ms > {args.max_p95_ms} ms")
+    if args.min_throughput is not None and report["throughput_rps"] < args.min_throughput:
+        failures.append(f"throughput {report['throughput_rps']} req/s < {args.min_throughput} req/s")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
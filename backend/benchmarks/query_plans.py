@@ -0,0 +1,140 @@
+"""
+Time the SensorReading/IrrigationEvent hot queries with and without the
+indexes from sensors/migrations/0002_reading_indexes.py.
+
+    python -m benchmarks.query_plans --rows 10000000 --explain
+
+Builds a throwaway database, drops the indexes, times each query, then
+recreates them and times again.
+"""
+import argparse
+import os
+import random
+import tempfile
+from datetime import timedelta
+
+from benchmarks.common import setup_django, create_benchmark_db, destroy_benchmark_db, time_call
+
+
+def populate(rows: int, fields: int, events: int, batch: int = 50000):
+    from django.db import connection, transaction
+    from django.utils import timezone
+    from sensors.models import SensorReading, IrrigationEvent
+
+    ops = connection.ops
+    end = timezone.now()
+    step = timedelta(seconds=300)
+    readings_table = connection.ops.quote_name(SensorReading._meta.db_table)
+    events_table = connection.ops.quote_name(IrrigationEvent._meta.db_table)
+    reading_sql = (
+        f"INSERT INTO {readings_table} (timestamp, field_id, moisture, temperature_c, humidity, action, created_at) "
+        "VALUES (%s, %s, %s, %s, %s, %s, %s)"
+    )
+    event_sql = f"INSERT INTO {events_table} (field_id, start_time, end_time, reason) VALUES (%s, %s, %s, %s)"
+    created = ops.adapt_datetimefield_value(end)
+
+    rng = random.Random(42)
+    per_field = max(1, rows // fields)
+    with transaction.atomic(), connection.cursor() as cursor:
+        buffer = []
+        for i in range(rows):
+            field = i % fields
+            timestamp = end - step * (per_field - i // fields)
+            buffer.append((
+                ops.adapt_datetimefield_value(timestamp), f"field-{field:04d}",
+                rng.uniform(10, 70), rng.uniform(10, 40), rng.uniform(20, 95), "SKIP", created,
+            ))
+            if len(buffer) >= batch:
+                cursor.executemany(reading_sql, buffer)
+                buffer = []
+        if buffer:
+            cursor.executemany(reading_sql, buffer)
+
+        cursor.executemany(event_sql, [
+            (
+                f"field-{i % fields:04d}",
+                ops.adapt_datetimefield_value(end - timedelta(hours=i)),
+                None if i % 100 == 0 else ops.adapt_datetimefield_value(end - timedelta(hours=i) + step),
+                "benchmark",
+            )
+            for i in range(events)
+        ])
+
+
+def hot_queries(fields: int):
+    from django.utils import timezone
+    from sensors.models import SensorReading, IrrigationEvent
+
+    field_id = f"field-{fields // 2:04d}"
+    since = timezone.now() - timedelta(hours=24)
+    return {
+        "latest (global)": SensorReading.objects.order_by("-timestamp")[:1],
+        "latest (per field)": SensorReading.objects.filter(field_id=field_id).order_by("-timestamp")[:1],
+        "chart-data 24h (per field)": SensorReading.objects.filter(
+            field_id=field_id, timestamp__gte=since).order_by("timestamp"),
+        "list first page": SensorReading.objects.all()[:100],
+        "active irrigation events": IrrigationEvent.objects.filter(end_time__isnull=True),
+    }
+
+
+def measure(fields: int, repeat: int, explain: bool) -> dict:
+    results = {}
+    for name, queryset in hot_queries(fields).items():
+        seconds = time_call(lambda: list(queryset.all()), repeat=repeat)
+        plan = queryset.explain() if explain else ""
+        results[name] = (seconds, plan)
+    return results
+
+
+def set_indexes(enabled: bool):
+    from django.db import connection
+    from sensors.models import SensorReading, IrrigationEvent
+
+    with connection.schema_editor() as editor:
+        for model in (SensorReading, IrrigationEvent):
+            for index in model._meta.indexes:
+                if enabled:
+                    editor.add_index(model, index)
+                else:
+                    editor.remove_index(model, index)
+    if enabled and connection.vendor in ("sqlite", "postgresql"):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--fields", type=int, default=100)
+    parser.add_argument("--events", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_query_plans.sqlite3"),
+                        help="Database file for the benchmark (sqlite only)")
+    parser.add_argument("--explain", action="store_true", help="Print query plans")
+    args = parser.parse_args()
+
+    setup_django(test_db=args.db)
+    old_name = create_benchmark_db()
+    try:
+        print(f"Populating {args.rows:,} readings across {args.fields} fields...")
+        populate(args.rows, args.fields, args.events)
+
+        set_indexes(False)
+        before = measure(args.fields, args.repeat, args.explain)
+        set_indexes(True)
+        after = measure(args.fields, args.repeat, args.explain)
+
+        print(f"\n{'query':<30}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+        for name, (old, old_plan) in before.items():
+            new, new_plan = after[name]
+            print(f"{name:<30}{old * 1000:>12.2f}{new * 1000:>12.2f}{old / new if new else 0:>9.1f}x")
+            if args.explain:
+                indent = "\n" + " " * 10
+                print(f"  before: {old_plan.replace(chr(10), indent)}")
+                print(f"  after:  {new_plan.replace(chr(10), indent)}")
+    finally:
+        destroy_benchmark_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Payload size and parse time of JSON vs. the compact binary reading frame.
+
+    python -m benchmarks.wire_format --rows 500
+
+Encodes the same readings both ways (as the edge agent sends them), reports
+raw and gzip sizes, and times the DRF parsers that the bulk endpoint uses.
+"""
+import argparse
+import gzip
+import io
+import json
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from benchmarks.common import setup_django, create_benchmark_db, destroy_benchmark_db, time_call
+
+
+def make_readings(rows: int, fields: int):
+    rng = random.Random(0)
+    start = datetime(2026, 5, 1, tzinfo=dt_timezone.utc)
+    meta = [{"field_id": f"field-{i:03d}", "crop_stage": "vegetative", "location": "Farm North Field"}
+            for i in range(fields)]
+    readings = []
+    for i in range(rows):
+        readings.append({
+            "index": i % fields,
+            "timestamp": start + timedelta(seconds=300 * (i // fields)),
+            "moisture": round(rng.uniform(10, 70), 2),
+            "temperature_c": round(rng.uniform(10, 40), 1),
+            "humidity": round(rng.uniform(20, 95), 1),
+        })
+    return meta, readings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500, help="Readings per request")
+    parser.add_argument("--fields", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    old_name = create_benchmark_db()
+    try:
+        from rest_framework.parsers import JSONParser
+        from sensors import wire
+        from sensors.models import ReadingSession
+        from sensors.ingest import validate_readings
+        from sensors.parsers import CompactReadingParser
+
+        meta, readings = make_readings(args.rows, args.fields)
+        session = ReadingSession.objects.create(fields=meta)
+
+        json_body = json.dumps([
+            {**meta[r["index"]], "timestamp": r["timestamp"].isoformat(), "moisture": r["moisture"],
+             "temperature_c": r["temperature_c"], "humidity": r["humidity"]}
+            for r in readings
+        ], separators=(",", ":")).encode()
+        binary_body = wire.encode_frame(session.pk, [
+            (r["timestamp"].timestamp(), r["index"], r["moisture"], r["temperature_c"], r["humidity"])
+            for r in readings
+        ])
+
+        results = []
+        for name, body, body_parser in (
+            ("json", json_body, JSONParser()),
+            ("binary", binary_body, CompactReadingParser()),
+        ):
+            parse = time_call(lambda: body_parser.parse(io.BytesIO(body)), repeat=args.repeat)
+            # validate_readings is where JSON's ISO timestamps get parsed, so include it for a fair total
+            total = time_call(lambda: validate_readings(body_parser.parse(io.BytesIO(body))), repeat=args.repeat)
+            valid, errors = validate_readings(body_parser.parse(io.BytesIO(body)))
+            assert len(valid) == args.rows and not errors
+            results.append((name, body, parse, total))
+
+        print(f"{args.rows} readings across {args.fields} fields\n")
+        print(f"{'format':<10}{'bytes':>10}{'gzip':>10}{'B/row':>8}{'parse us/row':>14}{'+validate':>12}")
+        for name, body, parse, total in results:
+            print(f"{name:<10}{len(body):>10}{len(gzip.compress(body)):>10}{len(body) / args.rows:>8.1f}"
+                  f"{parse / args.rows * 1e6:>14.2f}{total / args.rows * 1e6:>12.2f}")
+        print(f"\nbinary is {len(json_body) / len(binary_body):.1f}x smaller raw, "
+              f"{len(gzip.compress(json_body)) / len(gzip.compress(binary_body)):.1f}x smaller gzipped")
+    finally:
+        destroy_benchmark_db(old_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Opt-in request instrumentation, exported in the Prometheus text format.
+
+Enabled with INSTRUMENTATION_ENABLED; InstrumentationMiddleware then times
+every request, counts its SQL queries and collects the ``stage()`` and
+``outbound()`` timings recorded by application code. When disabled the
+middleware removes itself at startup and ``stage()``/``outbound()`` return a
+shared no-op context manager, so the hot path pays one flag check.
+"""
+import bisect
+import contextvars
+import cProfile
+import os
+import random
+import threading
+import time
+from contextlib import ExitStack, nullcontext
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse, HttpResponseNotFound
+
+ENABLED = False
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_NOOP = nullcontext()
+_current = contextvars.ContextVar("instrumentation_request", default=None)
+
+
+def _label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_label_value(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for label_values, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(self.labels, label_values, [('le', repr(float(bound)))])} {cumulative}"
+            cumulative += series[len(self.buckets)]
+            yield f"{self.name}_bucket{_format_labels(self.labels, label_values, [('le', '+Inf')])} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, label_values)} {series[-1]}"
+            yield f"{self.name}_count{_format_labels(self.labels, label_values)} {cumulative}"
+
+
+REQUEST_SECONDS = Histogram(
+    "irrigation_http_request_duration_seconds", "Request latency by route.", ("view", "method", "status"))
+STAGE_SECONDS = Histogram(
+    "irrigation_stage_duration_seconds", "Time spent in instrumented stages of request handling.", ("stage",))
+QUERY_COUNT = Histogram(
+    "irrigation_db_queries_per_request", "SQL queries issued per request.", ("view",), QUERY_COUNT_BUCKETS)
+QUERY_SECONDS = Histogram(
+    "irrigation_db_query_duration_seconds", "Total SQL time per request.", ("view",))
+OUTBOUND_SECONDS = Histogram(
+    "irrigation_outbound_http_duration_seconds", "Latency of outbound HTTP calls.", ("service", "outcome"))
+
+HISTOGRAMS = (REQUEST_SECONDS, STAGE_SECONDS, QUERY_COUNT, QUERY_SECONDS, OUTBOUND_SECONDS)
+
+
+class _RequestStats:
+    __slots__ = ("queries", "query_seconds", "stages")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.stages = {}
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self.start
+        STAGE_SECONDS.observe(elapsed, self.name)
+        stats = _current.get()
+        if stats is not None:
+            stats.stages[self.name] = stats.stages.get(self.name, 0.0) + elapsed
+        return False
+
+
+class _Outbound:
+    __slots__ = ("service", "start")
+
+    def __init__(self, service: str):
+        self.service = service
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        OUTBOUND_SECONDS.observe(time.perf_counter() - self.start, self.service, "error" if exc_type else "ok")
+        return False
+
+
+def stage(name: str):
+    """Time a block as a named stage of the current request."""
+    return _Stage(name) if ENABLED else _NOOP
+
+
+def outbound(service: str):
+    """Time an outbound HTTP call; exceptions are counted with outcome="error"."""
+    return _Outbound(service) if ENABLED else _NOOP
+
+
+def _query_wrapper(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += time.perf_counter() - start
+
+
+def reset():
+    """Clear every recorded series."""
+    for histogram in HISTOGRAMS:
+        histogram.clear()
+
+
+def render() -> str:
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+
+    # Forecast cache counters, so one scrape covers the decision path
+    from weather.services import WeatherService
+    for key, value in WeatherService.forecast_cache().stats().items():
+        kind = "gauge" if key in ("entries", "refreshing") else "counter"
+        name = f"irrigation_forecast_cache_{key}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint (404 while instrumentation is disabled)."""
+    if not ENABLED:
+        return HttpResponseNotFound("Instrumentation is disabled\n", content_type="text/plain")
+    return HttpResponse(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class InstrumentationMiddleware:
+    """
+    Record latency, SQL queries and stage timings for every request.
+
+    A sampled fraction of requests (INSTRUMENTATION_PROFILE_SAMPLE_RATE) runs
+    under cProfile; the dump is kept in INSTRUMENTATION_PROFILE_DIR only if
+    the request took at least INSTRUMENTATION_SLOW_REQUEST_MS.
+    """
+
+    def __init__(self, get_response):
+        global ENABLED
+        ENABLED = getattr(settings, "INSTRUMENTATION_ENABLED", False)
+        if not ENABLED:
+            raise MiddlewareNotUsed("Instrumentation disabled")
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "INSTRUMENTATION_PROFILE_SAMPLE_RATE", 0.0)
+        self.slow_seconds = getattr(settings, "INSTRUMENTATION_SLOW_REQUEST_MS", 500) / 1000
+        self.profile_dir = getattr(settings, "INSTRUMENTATION_PROFILE_DIR", None)
+
+    def __call__(self, request):
+        stats = _RequestStats()
+        token = _current.set(stats)
+        profiler = None
+        if self.profile_dir and self.sample_rate and random.random() < self.sample_rate:
+            profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_query_wrapper))
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+            elapsed = time.perf_counter() - start
+        finally:
+            _current.reset(token)
+
+        match = request.resolver_match
+        # Route names, not raw paths, keep the label cardinality bounded
+        view = match.view_name if match else "unmatched"
+        REQUEST_SECONDS.observe(elapsed, view, request.method, response.status_code)
+        QUERY_COUNT.observe(stats.queries, view)
+        QUERY_SECONDS.observe(stats.query_seconds, view)
+
+        timings = [f"db;dur={stats.query_seconds * 1000:.1f}"]
+        timings.extend(f"{name};dur={seconds * 1000:.1f}" for name, seconds in stats.stages.items())
+        timings.append(f"total;dur={elapsed * 1000:.1f}")
+        response["Server-Timing"] = ", ".join(timings)
+
+        if profiler is not None and elapsed >= self.slow_seconds:
+            self._dump(profiler, view, elapsed)
+        return response
+
+    def _dump(self, profiler, view: str, elapsed: float):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        safe_view = "".join(c if c.isalnum() or c in "-_" else "_" for c in view)
+        profiler.dump_stats(os.path.join(self.profile_dir, f"{stamp}-{safe_view}-{elapsed * 1000:.0f}ms.prof"))
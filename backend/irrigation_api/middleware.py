@@ -0,0 +1,28 @@
+import io
+import zlib
+from django.conf import settings
+from django.http import JsonResponse
+
+
+class GzipRequestMiddleware:
+    """Decompress request bodies sent with ``Content-Encoding: gzip``."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.META.get("HTTP_CONTENT_ENCODING", "").lower() == "gzip":
+            max_bytes = getattr(settings, "GZIP_REQUEST_MAX_BYTES", 20 * 1024 * 1024)
+            try:
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                body = decompressor.decompress(request.body, max_bytes)
+                if decompressor.unconsumed_tail:
+                    return JsonResponse({"error": "Decompressed body too large"}, status=413)
+            except zlib.error:
+                return JsonResponse({"error": "Invalid gzip body"}, status=400)
+
+            request._body = body
+            request._stream = io.BytesIO(body)
+            request.META["CONTENT_LENGTH"] = str(len(body))
+            del request.META["HTTP_CONTENT_ENCODING"]
+        return self.get_response(request)
@@ -24,7 +24,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "irrigation_api.instrumentation.InstrumentationMiddleware",  # Removes itself unless enabled
     "corsheaders.middleware.CorsMiddleware",
+    "irrigation_api.middleware.GzipRequestMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -87,7 +89,58 @@ CORS_ALLOW_CREDENTIALS = True
 # Weather API settings
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY", "")
 WEATHER_LOCATION = os.getenv("WEATHER_LOCATION", "New York")
+# Forecast cache: fresh for TTL, served stale (while refreshing) for STALE more
+WEATHER_FORECAST_TTL_SECONDS = int(os.getenv("WEATHER_FORECAST_TTL_SECONDS", "1800"))
+WEATHER_FORECAST_STALE_SECONDS = int(os.getenv("WEATHER_FORECAST_STALE_SECONDS", "10800"))
+WEATHER_FORECAST_CACHE_SIZE = int(os.getenv("WEATHER_FORECAST_CACHE_SIZE", "1024"))
+WEATHER_FORECAST_RETRY_SECONDS = int(os.getenv("WEATHER_FORECAST_RETRY_SECONDS", "60"))  # back-off after a failed refresh
+WEATHER_API_BASE_URL = os.getenv("WEATHER_API_BASE_URL", "https://api.openweathermap.org/data/2.5")
+# Forecast prefetch (python manage.py refresh_forecasts): shared request budget across workers
+WEATHER_API_RATE_PER_SECOND = float(os.getenv("WEATHER_API_RATE_PER_SECOND", "1.0"))
+WEATHER_PREFETCH_WORKERS = int(os.getenv("WEATHER_PREFETCH_WORKERS", "4"))
+# Fields with coordinates share the forecast of their geohash cell (5 = ~4.9 km);
+# fields without coordinates use WEATHER_LOCATION
+WEATHER_GEOHASH_PRECISION = int(os.getenv("WEATHER_GEOHASH_PRECISION", "5"))
+FIELD_CACHE_SECONDS = 60  # how long a process trusts its field -> forecast location map
+# Decisions read only stored forecasts; refresh_forecasts is the only API caller
+WEATHER_LOCAL_ONLY = os.getenv("WEATHER_LOCAL_ONLY", "0") == "1"
+# Daily FAO-56 evapotranspiration; WEATHER_LOCATION and other place names have
+# no coordinates, so radiation uses ET_DEFAULT_LATITUDE for them
+ET_DEFAULT_LATITUDE = float(os.getenv("ET_DEFAULT_LATITUDE", "40.7"))
+ET_ELEVATION_M = float(os.getenv("ET_ELEVATION_M", "0"))
+ET_CACHE_SECONDS = 300  # how long a process trusts a stored daily ET0
+CROP_COEFFICIENTS = {}  # crop_stage -> Kc, overriding the built-in FAO-56 values
 
 # Irrigation settings
 DEFAULT_MOISTURE_THRESHOLD = 35.0
 DEFAULT_IRRIGATION_DURATION = 300  # seconds
+# Root-zone water balance (sensors/water_balance.py). Defaults describe a loam
+# with a ~0.5 m root zone; readings map linearly onto depletion between field
+# capacity (0 mm) and wilting point (TAW); RAW is the depletion at the field's
+# moisture threshold
+SOIL_TOTAL_AVAILABLE_WATER_MM = 70.0
+SOIL_FIELD_CAPACITY_PCT = 50.0
+SOIL_WILTING_POINT_PCT = 20.0
+WATER_BALANCE_SENSOR_WEIGHT = 1.0  # how far each reading pulls the modelled depletion toward the sensor's; < 1 smooths noisy sensors
+IRRIGATION_APPLICATION_MM_PER_HOUR = 12.0
+BULK_INGEST_MAX_ROWS = int(os.getenv("BULK_INGEST_MAX_ROWS", "10000"))
+EXPORT_CHUNK_SIZE = 2000  # rows fetched per server-side cursor round trip
+ROLLUP_MAX_BUCKETS = 5000  # per /api/readings/rollup/ response
+# Longest gap edge agents leave between unchanged readings (deadband reporting);
+# rollup fill=previous carries the last value across gaps up to this long
+READING_HEARTBEAT_SECONDS = int(os.getenv("READING_HEARTBEAT_SECONDS", "1800"))
+GZIP_REQUEST_MAX_BYTES = 20 * 1024 * 1024  # cap on decompressed request bodies
+
+# MQTT ingest (python manage.py mqtt_ingest)
+MQTT_BROKER_HOST = os.getenv("MQTT_BROKER_HOST", "localhost")
+MQTT_BROKER_PORT = int(os.getenv("MQTT_BROKER_PORT", "1883"))
+MQTT_CLIENT_ID = os.getenv("MQTT_CLIENT_ID", "irrigation-ingest")
+MQTT_BATCH_SIZE = int(os.getenv("MQTT_BATCH_SIZE", "500"))
+MQTT_BATCH_MAX_DELAY = float(os.getenv("MQTT_BATCH_MAX_DELAY", "1.0"))  # seconds a reading may wait for its batch
+
+# Request instrumentation: /api/metrics/ (Prometheus) and Server-Timing headers
+INSTRUMENTATION_ENABLED = os.getenv("INSTRUMENTATION_ENABLED", "0") == "1"
+# Fraction of requests run under cProfile; dumps are kept only for slow requests
+INSTRUMENTATION_PROFILE_SAMPLE_RATE = float(os.getenv("INSTRUMENTATION_PROFILE_SAMPLE_RATE", "0"))
+INSTRUMENTATION_SLOW_REQUEST_MS = float(os.getenv("INSTRUMENTATION_SLOW_REQUEST_MS", "500"))
+INSTRUMENTATION_PROFILE_DIR = os.getenv("INSTRUMENTATION_PROFILE_DIR", str(BASE_DIR / "logs" / "profiles"))
@@ -1,8 +1,10 @@
 from django.contrib import admin
 from django.urls import path, include
+from .instrumentation import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("api/metrics/", metrics_view, name="metrics"),
     path("api/", include("sensors.urls")),
     path("api/weather/", include("weather.urls")),
 ]
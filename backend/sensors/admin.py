@@ -1,5 +1,10 @@
 from django.contrib import admin
-from .models import SensorReading, IrrigationEvent
+from .models import Field, SensorReading, IrrigationEvent, SoilWaterBalance
+
+@admin.register(Field)
+class FieldAdmin(admin.ModelAdmin):
+    list_display = ("field_id", "name", "crop", "crop_stage", "moisture_threshold", "latitude", "longitude")
+    search_fields = ("field_id", "name")
 
 @admin.register(SensorReading)
 class SensorReadingAdmin(admin.ModelAdmin):
@@ -11,3 +16,8 @@ class SensorReadingAdmin(admin.ModelAdmin):
 class IrrigationEventAdmin(admin.ModelAdmin):
     list_display = ("start_time", "end_time", "duration_seconds", "field_id", "reason")
     ordering = ("-start_time",)
+
+@admin.register(SoilWaterBalance)
+class SoilWaterBalanceAdmin(admin.ModelAdmin):
+    list_display = ("field_id", "location", "depletion_mm", "readily_available_mm", "crop_et_mm", "as_of")
+    search_fields = ("field_id",)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SensorsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "sensors"
+
+    def ready(self):
+        from . import fields  # noqa: F401  (connects the Field cache invalidation signals)
+        from . import water_balance  # noqa: F401  (credits observed rain via weather_saved)
@@ -1,12 +1,31 @@
+import numpy as np
 from django.conf import settings
+from django.utils import timezone
+from weather import evapotranspiration
 from weather.services import WeatherService
+from . import fields, water_balance
+
+# Daily crop ET moves the moisture threshold: each mm/day above
+# REFERENCE_CROP_ET_MM raises it by THRESHOLD_PER_ET_MM, within +/-MAX_ET_ADJUSTMENT
+REFERENCE_CROP_ET_MM = 4.0
+THRESHOLD_PER_ET_MM = 2.0
+MAX_ET_ADJUSTMENT = 5.0
+
+
+def et_adjustment(crop_et):
+    """Threshold shift (moisture %) for a crop ET in mm/day; works on scalars and arrays."""
+    shift = (np.asarray(crop_et, dtype=float) - REFERENCE_CROP_ET_MM) * THRESHOLD_PER_ET_MM
+    return np.clip(shift, -MAX_ET_ADJUSTMENT, MAX_ET_ADJUSTMENT)
 
 
 def decide_action(moisture: float, temperature: float = None, humidity: float = None, 
-                 location: str = None, threshold: float = None) -> str:
+                 location: str = None, threshold: float = None, crop_stage: str = None,
+                 field_id: str = None, timestamp=None) -> str:
     """Enhanced decision logic considering weather conditions."""
     
-    # Use configured threshold or default
+    # Use the given threshold, the field's registered one, or the default
+    if not threshold and field_id:
+        threshold = fields.moisture_threshold(field_id)
     threshold = threshold or getattr(settings, 'DEFAULT_MOISTURE_THRESHOLD', 35.0)
     
     # Basic moisture check
@@ -16,13 +35,154 @@ def decide_action(moisture: float, temperature: float = None, humidity: float =
     # Check weather conditions to avoid irrigation before rain
     if WeatherService.will_rain_today(location):
         return "SKIP"  # Don't irrigate if rain expected
-    
-    # Consider temperature and humidity for evapotranspiration
-    if temperature and humidity:
+
+    # Today's stored crop ET for the location shifts the threshold, when the weather for it is known
+    if field_id:
+        crop_stage = fields.crop_stage(field_id, crop_stage)
+    crop_et = evapotranspiration.crop_et(location, crop_stage)
+    if crop_et is not None:
+        threshold += float(et_adjustment(crop_et))
+    # Otherwise approximate evapotranspiration from the reading's temperature and humidity
+    elif temperature and humidity:
         # High temperature + low humidity = higher water need
         if temperature > 30 and humidity < 40:
             threshold += 5  # More aggressive irrigation
         elif temperature < 20 and humidity > 70:
             threshold -= 5  # Less aggressive irrigation
+
+    # A field with a water balance irrigates once root-zone depletion, this reading included,
+    # reaches the RAW the shifted threshold implies
+    ratio = None
+    if field_id:
+        ratio = water_balance.depletion_ratio(field_id, timestamp or timezone.now(), moisture, threshold)
+    if ratio is not None:
+        return "IRRIGATE" if ratio >= 1 else "SKIP"
     
     return "IRRIGATE" if moisture < threshold else "SKIP"
+
+
+def adjusted_thresholds(moisture, temperature=None, humidity=None, threshold=None, crop_et=None):
+    """
+    Per-row (threshold, shifted threshold) arrays as decide_action computes them.
+
+    The threshold falls back to the default where NaN or 0; the shifted one
+    adds the crop ET adjustment where ``crop_et`` is known and the
+    temperature/humidity heuristic elsewhere.
+    """
+    moisture = np.asarray(moisture, dtype=float)
+    default = getattr(settings, 'DEFAULT_MOISTURE_THRESHOLD', 35.0)
+    if threshold is None:
+        threshold = np.full(moisture.shape, default)
+    else:
+        threshold = np.broadcast_to(np.asarray(threshold, dtype=float), moisture.shape)
+        threshold = np.where(np.isnan(threshold) | (threshold == 0), default, threshold)
+
+    adjustment = np.zeros(moisture.shape)
+    has_et = np.zeros(moisture.shape, dtype=bool)
+    if crop_et is not None:
+        crop_et = np.broadcast_to(np.asarray(crop_et, dtype=float), moisture.shape)
+        has_et = ~np.isnan(crop_et)
+        adjustment = np.where(has_et, et_adjustment(np.nan_to_num(crop_et)), 0.0)
+
+    if temperature is not None and humidity is not None:
+        temperature = np.asarray(temperature, dtype=float)
+        humidity = np.asarray(humidity, dtype=float)
+        # Same truthiness as the scalar path: missing (NaN) or zero means no adjustment
+        known = ~has_et & (temperature != 0) & (humidity != 0) & ~np.isnan(temperature) & ~np.isnan(humidity)
+        hot_dry = known & (temperature > 30) & (humidity < 40)
+        cool_humid = known & ~hot_dry & (temperature < 20) & (humidity > 70)
+        adjustment = adjustment + 5 * hot_dry - 5 * cool_humid
+
+    return threshold, threshold + adjustment
+
+
+def decide_actions(moisture, temperature=None, humidity=None, threshold=None, rain_expected=None,
+                   crop_et=None, depletion_ratio=None) -> np.ndarray:
+    """
+    Vectorized decide_action over arrays of readings.
+
+    Missing temperature/humidity are NaN. ``threshold`` may be a scalar or a
+    per-row array (NaN or 0 means the default); ``rain_expected`` is a
+    per-row boolean array, ``crop_et`` a per-row crop ET in mm/day and
+    ``depletion_ratio`` the field's root-zone depletion over the RAW of the
+    shifted threshold (both NaN where none is stored). Returns an array of
+    "IRRIGATE"/"SKIP" that matches decide_action row for row.
+    """
+    moisture = np.asarray(moisture, dtype=float)
+    threshold, shifted = adjusted_thresholds(moisture, temperature, humidity, threshold, crop_et)
+
+    irrigate = moisture < threshold
+    if rain_expected is not None:
+        irrigate &= ~np.asarray(rain_expected, dtype=bool)
+
+    needs_water = moisture < shifted
+    if depletion_ratio is not None:
+        depletion_ratio = np.broadcast_to(np.asarray(depletion_ratio, dtype=float), moisture.shape)
+        has_balance = ~np.isnan(depletion_ratio)
+        needs_water = np.where(has_balance, np.nan_to_num(depletion_ratio) >= 1, needs_water)
+    irrigate &= needs_water
+
+    return np.where(irrigate, "IRRIGATE", "SKIP")
+
+
+def _as_float(value):
+    return np.nan if value is None else value
+
+
+def decide_batch(readings, threshold: float = None) -> list:
+    """
+    Decide actions for many readings at once.
+    Each reading is a dict with moisture, temperature_c, humidity, field_id,
+    crop_stage and timestamp. The forecast, stored daily ET, water balance
+    and the field's registered threshold are looked up once per distinct
+    field (and crop stage); forecasts and ET come from the field's grid cell,
+    so fields in one cell share them. Each reading's balance includes the
+    batch's earlier readings for its field.
+    """
+    if not readings:
+        return []
+    rain = {}
+    thresholds = {}
+    crop_et = {}
+    for reading in readings:
+        field_id = reading.get("field_id")
+        key = (field_id, reading.get("crop_stage"))
+        if key in crop_et:
+            continue
+        location = fields.forecast_location(field_id)
+        if field_id not in rain:
+            rain[field_id] = WeatherService.will_rain_today(location)
+            thresholds[field_id] = _as_float(fields.moisture_threshold(field_id))
+        crop_et[key] = _as_float(evapotranspiration.crop_et(location, fields.crop_stage(field_id, key[1])))
+    if threshold is None:
+        threshold = [thresholds[reading.get("field_id")] for reading in readings]
+    moisture = [reading["moisture"] for reading in readings]
+    temperature = [_as_float(reading.get("temperature_c")) for reading in readings]
+    humidity = [_as_float(reading.get("humidity")) for reading in readings]
+    row_crop_et = [crop_et[reading.get("field_id"), reading.get("crop_stage")] for reading in readings]
+    _, shifted = adjusted_thresholds(moisture, temperature, humidity, threshold, row_crop_et)
+
+    # Balances are folded per field, in each field's reading order
+    ratios = np.full(len(readings), np.nan)
+    by_field = {}
+    for index, reading in enumerate(readings):
+        if reading.get("field_id"):
+            by_field.setdefault(reading["field_id"], []).append(index)
+    now = timezone.now()
+    for field_id, indexes in by_field.items():
+        field_ratios = water_balance.depletion_ratios(field_id, [
+            (readings[i].get("timestamp") or now, readings[i]["moisture"], float(shifted[i])) for i in indexes
+        ])
+        if field_ratios is not None:
+            ratios[indexes] = field_ratios
+
+    actions = decide_actions(
+        moisture=moisture,
+        temperature=temperature,
+        humidity=humidity,
+        threshold=threshold,
+        rain_expected=[rain[reading.get("field_id")] for reading in readings],
+        crop_et=row_crop_et,
+        depletion_ratio=ratios,
+    )
+    return actions.tolist()
@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+EXPORT_FIELDS = ["id", "timestamp", "field_id", "crop_stage", "moisture", "temperature_c", "humidity", "action"]
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def iter_rows(queryset, chunk_size: int):
+    """Stream reading tuples in timestamp order through a server-side iterator."""
+    return queryset.order_by("timestamp", "id").values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+
+
+class _LineBuffer:
+    """Write target for csv.writer that hands back what was written."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_LineBuffer())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow((row[0], row[1].isoformat(), *row[2:]))
+
+
+def iter_ndjson(rows):
+    for row in rows:
+        record = dict(zip(EXPORT_FIELDS, row))
+        record["timestamp"] = record["timestamp"].isoformat()
+        yield json.dumps(record, separators=(",", ":")) + "\n"
+
+
+class _ChunkSink(io.RawIOBase):
+    """File-like sink that accumulates Parquet output until it is drained."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_parquet(rows, chunk_size: int):
+    """Write one Parquet row group per chunk, yielding bytes as each group completes."""
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("timestamp", pa.timestamp("us", tz="UTC")),
+        ("field_id", pa.string()),
+        ("crop_stage", pa.string()),
+        ("moisture", pa.float64()),
+        ("temperature_c", pa.float64()),
+        ("humidity", pa.float64()),
+        ("action", pa.string()),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+
+    def write_batch(batch):
+        columns = list(zip(*batch))
+        writer.write_table(pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema
+        ))
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            write_batch(batch)
+            batch = []
+            yield sink.drain()
+    if batch:
+        write_batch(batch)
+    writer.close()
+    yield sink.drain()
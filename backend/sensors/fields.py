@@ -0,0 +1,129 @@
+"""
+In-memory snapshot of the Field registry.
+
+Decisions, forecast lookups and the edge config endpoint read field settings
+from a snapshot of every Field, so the hot path never queries the registry.
+Saving or deleting a Field drops the snapshot in this process; other
+processes check a cheap (count, latest update) stamp every
+FIELD_CACHE_SECONDS and reload only when it changed.
+
+Each field's config has a digest of its content; the digests make up the
+snapshot version and the ETags edge agents use to poll for changes.
+"""
+import hashlib
+import json
+import threading
+import time
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from weather import geo
+from .models import Field
+
+# Values edge agents receive from GET /api/fields/config/
+CONFIG_FIELDS = ("field_id", "name", "crop", "crop_stage", "moisture_threshold", "latitude", "longitude")
+
+
+class FieldConfig:
+    """One field's settings, as served to decisions and edge agents."""
+
+    __slots__ = CONFIG_FIELDS + ("location", "digest")
+
+    def __init__(self, field: Field, precision: int):
+        for name in CONFIG_FIELDS:
+            setattr(self, name, getattr(field, name))
+        has_coordinates = self.latitude is not None and self.longitude is not None
+        self.location = geo.cell_key(self.latitude, self.longitude, precision) if has_coordinates else None
+        self.digest = hashlib.sha1(json.dumps(self.as_dict(), sort_keys=True).encode()).hexdigest()
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in CONFIG_FIELDS}
+
+
+class Snapshot:
+    __slots__ = ("fields", "version", "stamp", "checked_at")
+
+    def __init__(self, fields: dict, stamp):
+        self.fields = fields
+        self.stamp = stamp
+        self.checked_at = time.monotonic()
+        self.version = etag(fields.values())
+
+
+def etag(configs) -> str:
+    """Version of a set of field configs; changes when any of them does."""
+    digest = hashlib.sha1()
+    for config in sorted(configs, key=lambda config: config.field_id):
+        digest.update(config.digest.encode())
+    return digest.hexdigest()[:20]
+
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+def _stamp():
+    stamp = Field.objects.aggregate(count=Count("id"), updated=Max("updated_at"))
+    return stamp["count"], stamp["updated"]
+
+
+def _load(stamp) -> Snapshot:
+    precision = getattr(settings, "WEATHER_GEOHASH_PRECISION", 5)
+    return Snapshot({field.field_id: FieldConfig(field, precision) for field in Field.objects.all()}, stamp)
+
+
+def snapshot() -> Snapshot:
+    """The current registry snapshot, revalidated at most every FIELD_CACHE_SECONDS."""
+    global _snapshot
+    ttl = getattr(settings, "FIELD_CACHE_SECONDS", 60)
+    with _lock:
+        current = _snapshot
+        if current is not None and time.monotonic() - current.checked_at < ttl:
+            return current
+    stamp = _stamp()
+    if current is not None and stamp == current.stamp:
+        current.checked_at = time.monotonic()
+        return current
+    loaded = _load(stamp)
+    with _lock:
+        _snapshot = loaded
+    return loaded
+
+
+def field_config(field_id: str) -> Optional[FieldConfig]:
+    return snapshot().fields.get(field_id)
+
+
+def forecast_location(field_id: str) -> str:
+    """Forecast location to use for a field's decisions: its grid cell, else WEATHER_LOCATION."""
+    config = snapshot().fields.get(field_id)
+    return (config and config.location) or settings.WEATHER_LOCATION
+
+
+def moisture_threshold(field_id: str) -> Optional[float]:
+    config = snapshot().fields.get(field_id)
+    return config.moisture_threshold if config else None
+
+
+def crop_stage(field_id: str, reported: Optional[str] = None) -> Optional[str]:
+    """The crop stage a reading reported, else the one registered for its field."""
+    if reported:
+        return reported
+    config = snapshot().fields.get(field_id)
+    return (config and config.crop_stage) or None
+
+
+def clear():
+    global _snapshot
+    with _lock:
+        _snapshot = None
+
+
+@receiver(post_save, sender=Field)
+@receiver(post_delete, sender=Field)
+def _field_changed(sender, **kwargs):
+    clear()
@@ -0,0 +1,103 @@
+import math
+from datetime import datetime
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from irrigation_api.instrumentation import stage
+from . import water_balance
+from .models import SensorReading
+from .decision import decide_batch
+from .rollups import apply_readings
+
+FIELD_ID_MAX = SensorReading._meta.get_field("field_id").max_length
+CROP_STAGE_MAX = SensorReading._meta.get_field("crop_stage").max_length
+
+
+def _to_float(value, required=False):
+    if value is None or value == "":
+        if required:
+            raise ValueError("This field is required.")
+        return None
+    if isinstance(value, bool):
+        raise ValueError("A valid number is required.")
+    try:
+        result = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("A valid number is required.")
+    if not math.isfinite(result):
+        raise ValueError("A valid number is required.")
+    return result
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime):
+        parsed = value
+    elif isinstance(value, str):
+        parsed = parse_datetime(value)
+    else:
+        parsed = None
+    if parsed is None:
+        raise ValueError("Datetime has wrong format.")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.get_default_timezone())
+    return parsed
+
+
+def validate_readings(rows):
+    """
+    Validate raw reading dicts in one pass.
+    Returns (readings, errors) where readings is a list of (index, cleaned dict)
+    and errors maps row index to a field -> message dict.
+    """
+    readings = []
+    errors = {}
+    for index, row in enumerate(rows):
+        if not isinstance(row, dict):
+            errors[index] = {"non_field_errors": "Expected an object."}
+            continue
+
+        row_errors = {}
+        cleaned = {}
+        for name, convert in (
+            ("timestamp", _to_datetime),
+            ("moisture", lambda v: _to_float(v, required=True)),
+            ("temperature_c", _to_float),
+            ("humidity", _to_float),
+        ):
+            try:
+                cleaned[name] = convert(row.get(name))
+            except ValueError as exc:
+                row_errors[name] = str(exc)
+
+        field_id = row.get("field_id")
+        if not isinstance(field_id, str) or not field_id:
+            row_errors["field_id"] = "This field is required."
+        elif len(field_id) > FIELD_ID_MAX:
+            row_errors["field_id"] = f"Ensure this field has no more than {FIELD_ID_MAX} characters."
+        cleaned["field_id"] = field_id
+
+        crop_stage = row.get("crop_stage")
+        if crop_stage is not None and (not isinstance(crop_stage, str) or len(crop_stage) > CROP_STAGE_MAX):
+            row_errors["crop_stage"] = f"Must be a string of at most {CROP_STAGE_MAX} characters."
+        cleaned["crop_stage"] = crop_stage
+
+        if row_errors:
+            errors[index] = row_errors
+        else:
+            readings.append((index, cleaned))
+    return readings, errors
+
+
+def store_readings(readings):
+    """Decide actions for cleaned readings and insert them in one transaction."""
+    with stage("decide"):
+        actions = decide_batch(readings)
+    objs = [SensorReading(action=act, **reading) for reading, act in zip(readings, actions)]
+    with transaction.atomic():
+        with stage("db_write"):
+            SensorReading.objects.bulk_create(objs)
+        with stage("rollups"):
+            apply_readings(objs)
+        with stage("water_balance"):
+            water_balance.apply_readings(objs)
+    return objs
@@ -0,0 +1,103 @@
+import logging
+import queue
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections
+from sensors import mqtt
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Consume edge readings from MQTT, insert them in batches and publish decisions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default=settings.MQTT_BROKER_HOST)
+        parser.add_argument("--port", type=int, default=settings.MQTT_BROKER_PORT)
+        parser.add_argument("--client-id", default=settings.MQTT_CLIENT_ID,
+                            help="Stable id so the broker keeps this consumer's session across restarts")
+        parser.add_argument("--share-group", default="",
+                            help="Subscribe via $share/<group>/ so several consumers split the load")
+        parser.add_argument("--batch-size", type=int, default=settings.MQTT_BATCH_SIZE)
+        parser.add_argument("--max-delay", type=float, default=settings.MQTT_BATCH_MAX_DELAY)
+        parser.add_argument("--keepalive", type=int, default=60)
+
+    def handle(self, *args, **options):
+        if not mqtt.MQTT_AVAILABLE:
+            raise CommandError("mqtt_ingest requires paho-mqtt (pip install paho-mqtt)")
+
+        topic = mqtt.READINGS_TOPIC
+        if options["share_group"]:
+            topic = f"$share/{options['share_group']}/{topic}"
+
+        # The network thread only enqueues; inserts happen here so a slow
+        # transaction never stalls keep-alives. A full queue blocks the network
+        # thread, which pushes back on the broker instead of growing memory.
+        inbox = queue.Queue(maxsize=options["batch_size"] * 4)
+
+        def on_connect(client, userdata, flags, reason_code, *extra):
+            if reason_code != 0:
+                self.stderr.write(f"MQTT connection refused: {reason_code}")
+                return
+            client.subscribe(topic, qos=1)
+            self.stdout.write(f"Subscribed to {topic} on {options['host']}:{options['port']}")
+
+        def on_message(client, userdata, message):
+            inbox.put((message.topic, message.payload))
+
+        client_args = {"client_id": options["client_id"], "clean_session": False}
+        if hasattr(mqtt.paho_mqtt, "CallbackAPIVersion"):  # paho-mqtt 2.x
+            client = mqtt.paho_mqtt.Client(mqtt.paho_mqtt.CallbackAPIVersion.VERSION1, **client_args)
+        else:
+            client = mqtt.paho_mqtt.Client(**client_args)
+        client.on_connect = on_connect
+        client.on_message = on_message
+        client.reconnect_delay_set(min_delay=1, max_delay=60)
+
+        batcher = mqtt.ReadingBatcher(
+            lambda command_topic, payload: client.publish(command_topic, payload, qos=1),
+            batch_size=options["batch_size"],
+            max_delay=options["max_delay"],
+        )
+
+        client.connect(options["host"], options["port"], keepalive=options["keepalive"])
+        client.loop_start()
+        retry_delay = 1.0
+        try:
+            while True:
+                # While a failed batch waits for the database, leave new messages
+                # in the inbox so the broker is pushed back on
+                if len(batcher) < options["batch_size"]:
+                    try:
+                        batcher.add(*inbox.get(timeout=batcher.timeout()))
+                    except queue.Empty:
+                        pass
+                if batcher.due():
+                    close_old_connections()
+                    try:
+                        batcher.flush()
+                    except DatabaseError:
+                        logger.exception("Storing %d readings failed; retrying in %.0fs", len(batcher), retry_delay)
+                        time.sleep(retry_delay)
+                        retry_delay = min(retry_delay * 2, 60.0)
+                    except Exception:
+                        logger.exception("Storing a batch of readings failed")
+                    else:
+                        retry_delay = 1.0
+        except KeyboardInterrupt:
+            pass
+        finally:
+            while not inbox.empty():
+                batcher.add(*inbox.get_nowait())
+            close_old_connections()
+            try:
+                batcher.flush()
+            except DatabaseError:
+                logger.exception("Dropping %d unsaved readings on shutdown", len(batcher))
+            client.loop_stop()
+            client.disconnect()
+            self.stdout.write(self.style.SUCCESS(
+                f"Stored {batcher.stored} readings, rejected {batcher.rejected}"
+            ))
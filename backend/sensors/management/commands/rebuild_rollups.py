@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from sensors.models import ReadingRollup, SensorReading
+from sensors.rollups import apply_readings
+
+
+class Command(BaseCommand):
+    help = "Rebuild reading rollups from stored sensor readings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        readings = (
+            SensorReading.objects.order_by()
+            .only("field_id", "timestamp", "moisture", "temperature_c", "humidity")
+            .iterator(chunk_size=chunk_size)
+        )
+        total = 0
+        with transaction.atomic():
+            ReadingRollup.objects.all().delete()
+            chunk = []
+            for reading in readings:
+                chunk.append(reading)
+                if len(chunk) >= chunk_size:
+                    apply_readings(chunk)
+                    total += len(chunk)
+                    chunk = []
+            apply_readings(chunk)
+            total += len(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rollups from {total} readings"))
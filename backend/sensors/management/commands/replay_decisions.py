@@ -0,0 +1,216 @@
+import json
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.module_loading import import_string
+
+from sensors import fields, water_balance
+from sensors.decision import adjusted_thresholds, decide_actions
+from sensors.models import SensorReading, SoilWaterBalance
+from weather import evapotranspiration
+from weather.models import WeatherForecast
+
+
+class FieldStats:
+    __slots__ = ("readings", "irrigate", "crossings", "below")
+
+    def __init__(self):
+        self.readings = 0
+        self.irrigate = [0, 0]
+        self.crossings = [0, 0]
+        # Whether the last reading seen was below each rule's threshold
+        self.below = [None, None]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay stored readings and forecasts through the decision engine and a candidate rule, "
+        "reporting irrigation decisions, water use and threshold crossings per field. "
+        "The baseline gets the same inputs as the server's decide_batch: registered thresholds, stored "
+        "crop ET and a water balance rebuilt from the replayed readings (rain and irrigation credits "
+        "are not replayed). Uses only stored weather rows; never calls the weather API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--field", action="append", dest="fields", help="Field id (repeatable; default all)")
+        parser.add_argument("--start", help="ISO datetime, inclusive")
+        parser.add_argument("--end", help="ISO datetime, exclusive")
+        parser.add_argument("--threshold", type=float,
+                            help="Candidate moisture threshold (default: the baseline's per-field thresholds)")
+        parser.add_argument("--rule", help="Dotted path to a candidate function with decide_actions' signature")
+        parser.add_argument("--duration", type=float, default=settings.DEFAULT_IRRIGATION_DURATION,
+                            help="Seconds of irrigation per IRRIGATE decision")
+        parser.add_argument("--flow-rate", type=float, default=10.0, help="Litres per minute while irrigating")
+        parser.add_argument("--rain-horizon-hours", type=float, default=12.0)
+        parser.add_argument("--chunk-size", type=int, default=50000)
+        parser.add_argument("--json", action="store_true", help="Emit the report as JSON")
+
+    def handle(self, *args, **options):
+        candidate = decide_actions
+        if options["rule"]:
+            try:
+                candidate = import_string(options["rule"])
+            except ImportError as exc:
+                raise CommandError(f"Cannot import rule {options['rule']}: {exc}")
+        self.rules = (decide_actions, candidate)
+        if options["threshold"] is not None and options["threshold"] <= 0:
+            # The engine reads a threshold of 0 as "use the default"
+            raise CommandError("--threshold must be positive")
+        self.candidate_threshold = options["threshold"]
+
+        readings = SensorReading.objects.all()
+        if options["fields"]:
+            readings = readings.filter(field_id__in=options["fields"])
+        for name, lookup in (("start", "timestamp__gte"), ("end", "timestamp__lt")):
+            if options[name]:
+                value = parse_datetime(options[name])
+                if value is None:
+                    raise CommandError(f"Invalid --{name}: {options[name]}")
+                if timezone.is_naive(value):
+                    value = timezone.make_aware(value, timezone.get_default_timezone())
+                readings = readings.filter(**{lookup: value})
+        rows = (
+            readings.order_by("field_id", "timestamp")
+            .values_list("field_id", "timestamp", "moisture", "temperature_c", "humidity", "crop_stage")
+            .iterator(chunk_size=options["chunk_size"])
+        )
+
+        self.horizon = options["rain_horizon_hours"] * 3600
+        self.rain_times = {}
+        self.crop_et = {}
+        self.balances = {}
+        stats = {}
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= options["chunk_size"]:
+                self.replay_chunk(chunk, stats)
+                chunk = []
+        if chunk:
+            self.replay_chunk(chunk, stats)
+
+        litres_per_run = options["duration"] / 60 * options["flow_rate"]
+        report = {
+            field_id: {
+                "readings": s.readings,
+                "baseline": {"irrigate": s.irrigate[0], "water_litres": s.irrigate[0] * litres_per_run,
+                             "threshold_crossings": s.crossings[0]},
+                "candidate": {"irrigate": s.irrigate[1], "water_litres": s.irrigate[1] * litres_per_run,
+                              "threshold_crossings": s.crossings[1]},
+            }
+            for field_id, s in sorted(stats.items())
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'field':<20}{'readings':>10}{'base irr':>10}{'cand irr':>10}"
+            f"{'base L':>12}{'cand L':>12}{'base x':>8}{'cand x':>8}"
+        )
+        for field_id, r in report.items():
+            base, cand = r["baseline"], r["candidate"]
+            self.stdout.write(
+                f"{field_id:<20}{r['readings']:>10}{base['irrigate']:>10}{cand['irrigate']:>10}"
+                f"{base['water_litres']:>12.0f}{cand['water_litres']:>12.0f}"
+                f"{base['threshold_crossings']:>8}{cand['threshold_crossings']:>8}"
+            )
+
+    def rainy_forecast_times(self, location: str) -> np.ndarray:
+        """Sorted epoch seconds of stored forecast periods with precipitation for a location."""
+        if location not in self.rain_times:
+            timestamps = (
+                WeatherForecast.objects.filter(location=location, precipitation_amount__gt=0)
+                .order_by("forecast_timestamp").values_list("forecast_timestamp", flat=True)
+            )
+            self.rain_times[location] = np.array([ts.timestamp() for ts in timestamps], dtype=float)
+        return self.rain_times[location]
+
+    def stored_crop_et(self, location: str, crop_stage, day) -> float:
+        key = (location, crop_stage, day)
+        if key not in self.crop_et:
+            value = evapotranspiration.crop_et(location, crop_stage, day)
+            self.crop_et[key] = np.nan if value is None else value
+        return self.crop_et[key]
+
+    def balance_depletion(self, field_id: str, timestamp, moisture: float, crop_et: float) -> float:
+        """
+        Depletion after folding a reading into the field's replayed balance, as
+        decide_batch sees it; NaN for the field's first reading, which creates it.
+        """
+        state = self.balances.get(field_id)
+        if state is None:
+            taw = water_balance.total_available_water()
+            self.balances[field_id] = SoilWaterBalance(
+                field_id=field_id, total_available_mm=taw, depletion_mm=water_balance.sensor_depletion(moisture, taw),
+                as_of=timestamp, crop_et_mm=0.0 if np.isnan(crop_et) else crop_et,
+            )
+            return np.nan
+        if timestamp >= state.as_of:
+            state.depletion_mm = water_balance.folded_depletion(state, timestamp, moisture)
+            state.as_of = timestamp
+            if not np.isnan(crop_et):
+                state.crop_et_mm = crop_et
+        return state.depletion_mm
+
+    def replay_chunk(self, chunk, stats):
+        field_ids = np.array([row[0] for row in chunk], dtype=object)
+        times = np.array([row[1].timestamp() for row in chunk])
+        moisture = np.array([row[2] for row in chunk], dtype=float)
+        temperature = np.array([np.nan if row[3] is None else row[3] for row in chunk])
+        humidity = np.array([np.nan if row[4] is None else row[4] for row in chunk])
+
+        # Rows are ordered by field, so each field is one contiguous run
+        boundaries = np.flatnonzero(field_ids[1:] != field_ids[:-1]) + 1
+        starts = [0] + boundaries.tolist()
+        ends = boundaries.tolist() + [len(chunk)]
+
+        rain = np.zeros(len(chunk), dtype=bool)
+        registered = np.full(len(chunk), np.nan)
+        crop_et = np.empty(len(chunk))
+        depletion = np.empty(len(chunk))
+        for start, end in zip(starts, ends):
+            field_id = field_ids[start]
+            location = fields.forecast_location(field_id)
+            threshold = fields.moisture_threshold(field_id)
+            if threshold:
+                registered[start:end] = threshold
+            rainy = self.rainy_forecast_times(location)
+            if len(rainy):
+                t = times[start:end]
+                nxt = np.searchsorted(rainy, t, side="right")
+                has_next = nxt < len(rainy)
+                rain[start:end][has_next] = rainy[nxt[has_next]] <= t[has_next] + self.horizon
+            for i in range(start, end):
+                timestamp, crop_stage = chunk[i][1], chunk[i][5]
+                crop_et[i] = self.stored_crop_et(
+                    location, fields.crop_stage(field_id, crop_stage), timezone.localdate(timestamp))
+                depletion[i] = self.balance_depletion(field_id, timestamp, moisture[i], crop_et[i])
+
+        taw = water_balance.total_available_water()
+        candidate = registered if self.candidate_threshold is None else self.candidate_threshold
+        for rule_index, (rule, threshold) in enumerate(zip(self.rules, (registered, candidate))):
+            threshold, shifted = adjusted_thresholds(moisture, temperature, humidity, threshold, crop_et)
+            # RAW of each row's shifted threshold, as water_balance.depletion_ratios computes it
+            raw = np.array([water_balance.sensor_depletion(value, taw) for value in shifted])
+            ratio = np.divide(depletion, raw, out=np.full(len(chunk), np.inf), where=raw > 0)
+            ratio[np.isnan(depletion)] = np.nan
+            irrigate = np.asarray(rule(
+                moisture, temperature, humidity, threshold=threshold, rain_expected=rain,
+                crop_et=crop_et, depletion_ratio=ratio,
+            )) == "IRRIGATE"
+            below = moisture < threshold
+            for start, end in zip(starts, ends):
+                s = stats.setdefault(field_ids[start], FieldStats())
+                if rule_index == 0:
+                    s.readings += end - start
+                s.irrigate[rule_index] += int(irrigate[start:end].sum())
+                run = below[start:end]
+                crossings = int((run[1:] & ~run[:-1]).sum())
+                if s.below[rule_index] is False and run[0]:
+                    crossings += 1
+                s.crossings[rule_index] += crossings
+                s.below[rule_index] = bool(run[-1])
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IrrigationEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field_id', models.CharField(max_length=64)),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField(blank=True, null=True)),
+                ('reason', models.CharField(blank=True, max_length=128, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SensorReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('timestamp', models.DateTimeField()),
+                ('field_id', models.CharField(max_length=64)),
+                ('crop_stage', models.CharField(blank=True, max_length=64, null=True)),
+                ('moisture', models.FloatField()),
+                ('temperature_c', models.FloatField(blank=True, null=True)),
+                ('humidity', models.FloatField(blank=True, null=True)),
+                ('action', models.CharField(blank=True, help_text='Action decided: IRRIGATE/SKIP', max_length=16, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReadingRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field_id', models.CharField(max_length=64)),
+                ('bucket_seconds', models.PositiveIntegerField()),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('moisture_sum', models.FloatField(default=0.0)),
+                ('moisture_min', models.FloatField(blank=True, null=True)),
+                ('moisture_max', models.FloatField(blank=True, null=True)),
+                ('temperature_count', models.PositiveIntegerField(default=0)),
+                ('temperature_sum', models.FloatField(default=0.0)),
+                ('temperature_min', models.FloatField(blank=True, null=True)),
+                ('temperature_max', models.FloatField(blank=True, null=True)),
+                ('humidity_count', models.PositiveIntegerField(default=0)),
+                ('humidity_sum', models.FloatField(default=0.0)),
+                ('humidity_min', models.FloatField(blank=True, null=True)),
+                ('humidity_max', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['bucket_start'],
+                'constraints': [models.UniqueConstraint(fields=('field_id', 'bucket_seconds', 'bucket_start'), name='unique_reading_rollup_bucket')],
+            },
+        ),
+    ]
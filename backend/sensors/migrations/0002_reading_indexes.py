@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='irrigationevent',
+            index=models.Index(condition=models.Q(('end_time__isnull', True)), fields=['field_id', 'start_time'], name='irrigation_event_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sensorreading',
+            index=models.Index(fields=['field_id', '-timestamp'], name='reading_field_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sensorreading',
+            index=models.Index(fields=['-timestamp'], name='reading_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0002_reading_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='sensorreading',
+            name='reading_field_recent_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='sensorreading',
+            name='reading_recent_idx',
+        ),
+        migrations.AddIndex(
+            model_name='irrigationevent',
+            index=models.Index(fields=['-start_time', '-id'], name='irrigation_event_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sensorreading',
+            index=models.Index(fields=['field_id', '-timestamp', '-id'], name='reading_field_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sensorreading',
+            index=models.Index(fields=['-timestamp', '-id'], name='reading_recent_idx'),
+        ),
+    ]
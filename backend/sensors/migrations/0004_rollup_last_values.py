@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0003_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='readingrollup',
+            name='humidity_last',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='readingrollup',
+            name='last_timestamp',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='readingrollup',
+            name='moisture_last',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='readingrollup',
+            name='temperature_last',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
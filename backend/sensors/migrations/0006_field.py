@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0005_reading_session'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Field',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field_id', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(blank=True, max_length=128)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['field_id'],
+            },
+        ),
+    ]
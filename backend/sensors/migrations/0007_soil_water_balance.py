@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0006_field'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SoilWaterBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('field_id', models.CharField(max_length=64, unique=True)),
+                ('location', models.CharField(help_text='Forecast location whose rain and ET apply', max_length=100)),
+                ('depletion_mm', models.FloatField(default=0.0)),
+                ('total_available_mm', models.FloatField(help_text='TAW: water held between field capacity and wilting point')),
+                ('readily_available_mm', models.FloatField(help_text='RAW: depletion at which the crop starts to stress')),
+                ('crop_et_mm', models.FloatField(default=0.0, help_text='Crop ET rate in force, mm/day')),
+                ('moisture', models.FloatField(blank=True, help_text='Last reading folded in', null=True)),
+                ('as_of', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['field_id'],
+                'indexes': [models.Index(fields=['location'], name='water_balance_location_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0007_soil_water_balance'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='field',
+            name='crop',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='field',
+            name='crop_stage',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='field',
+            name='moisture_threshold',
+            field=models.FloatField(blank=True, help_text='Moisture % below which to irrigate', null=True),
+        ),
+    ]
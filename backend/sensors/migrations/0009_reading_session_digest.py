@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:42
+
+from django.db import migrations, models
+
+
+def fill_digests(apps, schema_editor):
+    from sensors.wire import schema_digest
+    ReadingSession = apps.get_model('sensors', 'ReadingSession')
+    for session in ReadingSession.objects.all():
+        session.digest = schema_digest(session.fields)
+        session.save(update_fields=['digest'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensors', '0008_field_config'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='readingsession',
+            name='digest',
+            field=models.CharField(db_index=True, default='', help_text='sha1 of the field metadata', max_length=40),
+        ),
+        migrations.RunPython(fill_digests, migrations.RunPython.noop),
+    ]
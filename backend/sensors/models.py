@@ -2,6 +2,29 @@ from __future__ import annotations
 from django.db import models
 
 
+class Field(models.Model):
+    """
+    A monitored field's configuration. Coordinates pick the weather grid cell
+    it shares with neighbours; crop settings and the threshold drive decisions
+    and are pulled by edge agents (blank values fall back to theirs).
+    """
+    field_id = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=128, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    crop = models.CharField(max_length=64, blank=True)
+    crop_stage = models.CharField(max_length=64, blank=True)
+    moisture_threshold = models.FloatField(null=True, blank=True, help_text="Moisture % below which to irrigate")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["field_id"]
+
+    def __str__(self):
+        return self.name or self.field_id
+
+
 class SensorReading(models.Model):
     timestamp = models.DateTimeField()
     field_id = models.CharField(max_length=64)
@@ -14,6 +37,10 @@ class SensorReading(models.Model):
 
     class Meta:
         ordering = ["-timestamp"]
+        indexes = [
+            models.Index(fields=["field_id", "-timestamp", "-id"], name="reading_field_recent_idx"),
+            models.Index(fields=["-timestamp", "-id"], name="reading_recent_idx"),
+        ]
 
 
 class IrrigationEvent(models.Model):
@@ -22,8 +49,77 @@ class IrrigationEvent(models.Model):
     end_time = models.DateTimeField(null=True, blank=True)
     reason = models.CharField(max_length=128, blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-start_time", "-id"], name="irrigation_event_recent_idx"),
+            models.Index(
+                fields=["field_id", "start_time"],
+                condition=models.Q(end_time__isnull=True),
+                name="irrigation_event_active_idx",
+            ),
+        ]
+
     @property
     def duration_seconds(self):
         if self.end_time and self.start_time:
             return (self.end_time - self.start_time).total_seconds()
         return None
+
+
+class SoilWaterBalance(models.Model):
+    """
+    A field's root-zone water balance: depletion below field capacity as of
+    ``as_of``, updated in place by each reading, irrigation event and rain row.
+    """
+    field_id = models.CharField(max_length=64, unique=True)
+    location = models.CharField(max_length=100, help_text="Forecast location whose rain and ET apply")
+    depletion_mm = models.FloatField(default=0.0)
+    total_available_mm = models.FloatField(help_text="TAW: water held between field capacity and wilting point")
+    readily_available_mm = models.FloatField(help_text="RAW: depletion at which the crop starts to stress")
+    crop_et_mm = models.FloatField(default=0.0, help_text="Crop ET rate in force, mm/day")
+    moisture = models.FloatField(null=True, blank=True, help_text="Last reading folded in")
+    as_of = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["field_id"]
+        indexes = [models.Index(fields=["location"], name="water_balance_location_idx")]
+
+
+class ReadingRollup(models.Model):
+    """Min/sum/max of a field's readings over one time bucket, kept current on insert."""
+    field_id = models.CharField(max_length=64)
+    bucket_seconds = models.PositiveIntegerField()
+    bucket_start = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+    moisture_sum = models.FloatField(default=0.0)
+    moisture_min = models.FloatField(null=True, blank=True)
+    moisture_max = models.FloatField(null=True, blank=True)
+    temperature_count = models.PositiveIntegerField(default=0)
+    temperature_sum = models.FloatField(default=0.0)
+    temperature_min = models.FloatField(null=True, blank=True)
+    temperature_max = models.FloatField(null=True, blank=True)
+    humidity_count = models.PositiveIntegerField(default=0)
+    humidity_sum = models.FloatField(default=0.0)
+    humidity_min = models.FloatField(null=True, blank=True)
+    humidity_max = models.FloatField(null=True, blank=True)
+    # Most recent values in the bucket, carried forward over deadband gaps
+    last_timestamp = models.DateTimeField(null=True, blank=True)
+    moisture_last = models.FloatField(null=True, blank=True)
+    temperature_last = models.FloatField(null=True, blank=True)
+    humidity_last = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["bucket_start"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["field_id", "bucket_seconds", "bucket_start"], name="unique_reading_rollup_bucket"
+            ),
+        ]
+
+
+class ReadingSession(models.Model):
+    """Field metadata an edge agent registers once so binary frames can refer to fields by index."""
+    fields = models.JSONField()
+    digest = models.CharField(max_length=40, db_index=True, default="", help_text="sha1 of the field metadata")
+    created_at = models.DateTimeField(auto_now_add=True)
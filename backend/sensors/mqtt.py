@@ -0,0 +1,140 @@
+"""
+MQTT ingest: edge agents publish readings on ``irrigation/<field_id>/readings``
+and receive decisions on ``irrigation/<field_id>/commands``.
+
+ReadingBatcher is broker-agnostic: it takes (topic, payload) messages, stores
+them with the same validation and batch insert as /api/readings/bulk/, and
+hands each field's newest decision to a ``publish(topic, payload)`` callable.
+The ``mqtt_ingest`` command wires it to a paho-mqtt client.
+"""
+import json
+import logging
+import time
+
+from django.db import DatabaseError
+
+from .ingest import store_readings, validate_readings
+
+try:
+    import paho.mqtt.client as paho_mqtt
+    MQTT_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    paho_mqtt = None
+    MQTT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TOPIC_PREFIX = "irrigation"
+READINGS_TOPIC = f"{TOPIC_PREFIX}/+/readings"
+
+
+def command_topic(field_id: str) -> str:
+    return f"{TOPIC_PREFIX}/{field_id}/commands"
+
+
+def field_from_topic(topic: str):
+    """Field id of an ``irrigation/<field_id>/readings`` topic, or None."""
+    parts = topic.split("/")
+    if len(parts) != 3 or parts[0] != TOPIC_PREFIX or parts[2] != "readings" or not parts[1]:
+        return None
+    return parts[1]
+
+
+class ReadingBatcher:
+    """
+    Collect readings from many topics and insert them in batches.
+
+    A batch is flushed once it holds ``batch_size`` rows or its oldest row has
+    waited ``max_delay`` seconds. Only the newest decision per field in a batch
+    is published, so a backlog drained from an edge outbox yields one command.
+    """
+
+    def __init__(self, publish, batch_size: int = 500, max_delay: float = 1.0, clock=time.monotonic):
+        self.publish = publish
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.clock = clock
+        self.rows = []
+        self.first_added = None
+        self.stored = 0
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def add(self, topic: str, payload: bytes) -> int:
+        """Queue the reading(s) in one message; returns how many rows were accepted."""
+        field_id = field_from_topic(topic)
+        if field_id is None:
+            logger.warning("Ignoring message on unexpected topic %s", topic)
+            return 0
+        try:
+            data = json.loads(payload)
+        except (UnicodeDecodeError, ValueError):
+            logger.warning("Ignoring malformed message on %s", topic)
+            self.rejected += 1
+            return 0
+
+        rows = data if isinstance(data, list) else [data]
+        accepted = 0
+        for row in rows:
+            if not isinstance(row, dict) or row.setdefault("field_id", field_id) != field_id:
+                # The topic is the edge's identity; a payload may not write to another field
+                self.rejected += 1
+                continue
+            self.rows.append(row)
+            accepted += 1
+        if accepted and self.first_added is None:
+            self.first_added = self.clock()
+        return accepted
+
+    def due(self) -> bool:
+        if not self.rows:
+            return False
+        return len(self.rows) >= self.batch_size or self.clock() - self.first_added >= self.max_delay
+
+    def timeout(self) -> float:
+        """Seconds until the current batch is due (max_delay when empty)."""
+        if not self.rows:
+            return self.max_delay
+        return max(0.0, self.max_delay - (self.clock() - self.first_added))
+
+    def flush(self) -> int:
+        """
+        Store queued rows and publish decisions; returns the number stored.
+        The messages are already acknowledged, so on a database error the
+        valid rows go back to the front of the queue before it propagates.
+        """
+        rows, first_added = self.rows, self.first_added
+        self.rows, self.first_added = [], None
+        if not rows:
+            return 0
+
+        valid, errors = validate_readings(rows)
+        for index, row_errors in errors.items():
+            logger.warning("Rejected reading for %s: %s", rows[index].get("field_id"), row_errors)
+        self.rejected += len(errors)
+        if not valid:
+            return 0
+
+        try:
+            created = store_readings([reading for _, reading in valid])
+        except DatabaseError:
+            self.rows = [rows[index] for index, _ in valid] + self.rows
+            self.first_added = first_added
+            raise
+        self.stored += len(created)
+
+        newest = {}
+        for obj in created:
+            current = newest.get(obj.field_id)
+            if current is None or obj.timestamp >= current.timestamp:
+                newest[obj.field_id] = obj
+        for field_id, obj in newest.items():
+            self.publish(command_topic(field_id), json.dumps({
+                "action": obj.action,
+                "reading_id": obj.pk,
+                "timestamp": obj.timestamp.isoformat(),
+                "moisture": obj.moisture,
+            }))
+        return len(created)
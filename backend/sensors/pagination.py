@@ -0,0 +1,109 @@
+import base64
+import json
+from collections import OrderedDict
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first cursor pagination on (ordering_field, id).
+
+    Each page is a range scan from the cursor position, so deep pages cost
+    the same as the first and no COUNT(*) is issued.
+    """
+    ordering_field = "timestamp"
+    page_size = 100
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            position = parse_datetime(data["p"])
+            if position is None:
+                raise ValueError
+            return position, int(data["i"]), bool(data.get("r"))
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, obj, reverse=False):
+        data = {"p": getattr(obj, self.ordering_field).isoformat(), "i": obj.pk}
+        if reverse:
+            data["r"] = 1
+        encoded = base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        field = self.ordering_field
+
+        reverse = False
+        if cursor is None:
+            queryset = queryset.order_by(f"-{field}", "-id")
+        else:
+            position, pk, reverse = cursor
+            if reverse:
+                queryset = queryset.filter(
+                    Q(**{f"{field}__gt": position}) | Q(**{field: position, "id__gt": pk})
+                ).order_by(field, "id")
+            else:
+                queryset = queryset.filter(
+                    Q(**{f"{field}__lt": position}) | Q(**{field: position, "id__lt": pk})
+                ).order_by(f"-{field}", "-id")
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_link = None
+        self.previous_link = None
+        if rows:
+            if has_more or reverse:
+                self.next_link = self.encode_cursor(rows[-1])
+            if cursor is not None and (has_more or not reverse):
+                self.previous_link = self.encode_cursor(rows[0], reverse=True)
+        elif cursor is not None and reverse:
+            self.next_link = remove_query_param(self.base_url, self.cursor_query_param)
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.next_link),
+            ("previous", self.previous_link),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class IrrigationEventPagination(KeysetPagination):
+    ordering_field = "start_time"
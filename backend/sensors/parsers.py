@@ -0,0 +1,40 @@
+import json
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.parsers import BaseParser
+from . import wire
+from .models import ReadingSession
+
+
+class NDJSONParser(BaseParser):
+    """Parse newline-delimited JSON into a list of objects."""
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", "utf-8")
+        rows = []
+        for line_no, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line.decode(encoding)))
+            except ValueError as exc:
+                raise ParseError(f"NDJSON parse error on line {line_no}: {exc}")
+        return rows
+
+
+class CompactReadingParser(BaseParser):
+    """Parse a binary reading frame (see sensors/wire.py) into a list of objects."""
+    media_type = wire.CONTENT_TYPE
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        body = stream.read() if stream is not None else b""
+        try:
+            session_id, _ = wire.read_header(body)
+            session = ReadingSession.objects.filter(pk=session_id).first()
+            if session is None:
+                raise NotFound("Unknown reading session")
+            return wire.decode_frame(body, session.fields)
+        except wire.FrameError as exc:
+            raise ParseError(f"Binary frame error: {exc}")
@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.db import transaction
+from .models import ReadingRollup
+
+# Supported bucket widths, in seconds
+BUCKETS = {"1m": 60, "5m": 300, "1h": 3600, "1d": 86400}
+
+# (reading attribute, rollup column prefix, rollup count column)
+METRICS = (
+    ("moisture", "moisture", "count"),
+    ("temperature_c", "temperature", "temperature_count"),
+    ("humidity", "humidity", "humidity_count"),
+)
+
+
+def bucket_floor(timestamp: datetime, seconds: int) -> datetime:
+    """Start of the UTC-aligned bucket of the given width containing timestamp."""
+    epoch = int(timestamp.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=dt_timezone.utc)
+
+
+def _carry_last(rollup: ReadingRollup, timestamp, values):
+    """Keep the newest value of each metric; a missing metric leaves the earlier one."""
+    if rollup.last_timestamp is not None and timestamp < rollup.last_timestamp:
+        return
+    rollup.last_timestamp = timestamp
+    for (_, prefix, _), value in zip(METRICS, values):
+        if value is not None:
+            setattr(rollup, f"{prefix}_last", value)
+
+
+def _add_reading(rollup: ReadingRollup, reading):
+    _carry_last(rollup, reading.timestamp, [getattr(reading, attr) for attr, _, _ in METRICS])
+    for attr, prefix, count_attr in METRICS:
+        value = getattr(reading, attr)
+        if value is None:
+            continue
+        setattr(rollup, count_attr, getattr(rollup, count_attr) + 1)
+        setattr(rollup, f"{prefix}_sum", getattr(rollup, f"{prefix}_sum") + value)
+        low = getattr(rollup, f"{prefix}_min")
+        high = getattr(rollup, f"{prefix}_max")
+        setattr(rollup, f"{prefix}_min", value if low is None else min(low, value))
+        setattr(rollup, f"{prefix}_max", value if high is None else max(high, value))
+
+
+def _merge(target: ReadingRollup, other: ReadingRollup):
+    if other.last_timestamp is not None:
+        _carry_last(target, other.last_timestamp, [getattr(other, f"{prefix}_last") for _, prefix, _ in METRICS])
+    for _, prefix, count_attr in METRICS:
+        if not getattr(other, count_attr):
+            continue
+        setattr(target, count_attr, getattr(target, count_attr) + getattr(other, count_attr))
+        setattr(target, f"{prefix}_sum", getattr(target, f"{prefix}_sum") + getattr(other, f"{prefix}_sum"))
+        for suffix, pick in (("min", min), ("max", max)):
+            name = f"{prefix}_{suffix}"
+            mine, theirs = getattr(target, name), getattr(other, name)
+            setattr(target, name, theirs if mine is None else pick(mine, theirs))
+
+
+def apply_readings(readings):
+    """
+    Fold newly stored readings into every rollup width.
+    Touches each affected bucket row once, however many readings land in it.
+    Missing buckets are first inserted empty, skipping any another request
+    created meanwhile, so every bucket is then merged under a row lock and
+    concurrent writers never collide on the unique constraint.
+    """
+    pending = {}
+    for reading in readings:
+        for seconds in BUCKETS.values():
+            key = (reading.field_id, seconds, bucket_floor(reading.timestamp, seconds))
+            rollup = pending.get(key)
+            if rollup is None:
+                rollup = pending[key] = ReadingRollup(field_id=key[0], bucket_seconds=seconds, bucket_start=key[2])
+            _add_reading(rollup, reading)
+    if not pending:
+        return
+
+    starts = {}
+    for field_id, seconds, start in pending:
+        starts.setdefault((field_id, seconds), set()).add(start)
+
+    update_fields = [f.name for f in ReadingRollup._meta.concrete_fields
+                     if f.name not in ("id", "field_id", "bucket_seconds", "bucket_start")]
+    with transaction.atomic():
+        ReadingRollup.objects.bulk_create(
+            [ReadingRollup(field_id=field_id, bucket_seconds=seconds, bucket_start=start)
+             for field_id, seconds, start in pending],
+            ignore_conflicts=True,
+        )
+        rows = []
+        for (field_id, seconds), bucket_starts in starts.items():
+            for row in ReadingRollup.objects.select_for_update().filter(
+                field_id=field_id, bucket_seconds=seconds, bucket_start__in=bucket_starts
+            ):
+                _merge(row, pending[field_id, seconds, row.bucket_start])
+                rows.append(row)
+        ReadingRollup.objects.bulk_update(rows, update_fields)
+
+
+def _summary(rollup: ReadingRollup, prefix: str, count_attr: str):
+    count = getattr(rollup, count_attr)
+    if not count:
+        return None
+    return {
+        "min": getattr(rollup, f"{prefix}_min"),
+        "mean": getattr(rollup, f"{prefix}_sum") / count,
+        "max": getattr(rollup, f"{prefix}_max"),
+    }
+
+
+def _carried(rollup: ReadingRollup, prefix: str):
+    value = getattr(rollup, f"{prefix}_last")
+    if value is None:
+        return None
+    return {"min": value, "mean": value, "max": value}
+
+
+def _bucket(row: ReadingRollup) -> dict:
+    return {
+        "bucket_start": row.bucket_start,
+        "count": row.count,
+        "moisture": _summary(row, "moisture", "count"),
+        "temperature_c": _summary(row, "temperature", "temperature_count"),
+        "humidity": _summary(row, "humidity", "humidity_count"),
+    }
+
+
+def query_rollups(field_id: str, start: datetime, end: datetime, bucket: str,
+                  fill: str = None, heartbeat_seconds: int = None) -> list:
+    """
+    Return min/mean/max per bucket for field_id over [start, end).
+
+    With fill="previous", empty buckets within heartbeat_seconds of the last
+    reading are filled with that reading's values: edge agents using deadband
+    reporting skip uploads while nothing changes, so a short gap means
+    "unchanged" rather than "missing".
+    """
+    seconds = BUCKETS[bucket]
+    first = bucket_floor(start, seconds)
+    rows = ReadingRollup.objects.filter(
+        field_id=field_id,
+        bucket_seconds=seconds,
+        bucket_start__gte=first,
+        bucket_start__lt=end,
+    ).order_by("bucket_start")
+    if fill != "previous":
+        return [_bucket(row) for row in rows]
+
+    previous = ReadingRollup.objects.filter(
+        field_id=field_id, bucket_seconds=seconds, bucket_start__lt=first, last_timestamp__isnull=False,
+    ).order_by("-bucket_start").first()
+    heartbeat = timedelta(seconds=heartbeat_seconds)
+    by_start = {row.bucket_start: row for row in rows}
+
+    buckets = []
+    current = first
+    step = timedelta(seconds=seconds)
+    while current < end:
+        row = by_start.get(current)
+        if row is not None:
+            buckets.append({**_bucket(row), "filled": False})
+            if row.last_timestamp is not None:
+                previous = row
+        elif previous is not None and current < previous.last_timestamp + heartbeat:
+            buckets.append({
+                "bucket_start": current,
+                "count": 0,
+                "moisture": _carried(previous, "moisture"),
+                "temperature_c": _carried(previous, "temperature"),
+                "humidity": _carried(previous, "humidity"),
+                "filled": True,
+            })
+        current += step
+    return buckets
@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import SensorReading, IrrigationEvent
+from django.utils import timezone
+from .models import Field, SensorReading, IrrigationEvent, SoilWaterBalance
+from .water_balance import accrued_depletion
 
 
 class SensorReadingSerializer(serializers.ModelSerializer):
@@ -17,9 +19,67 @@ class SensorReadingSerializer(serializers.ModelSerializer):
         ]
 
 
+class FieldSerializer(serializers.ModelSerializer):
+    latitude = serializers.FloatField(min_value=-90, max_value=90, required=False, allow_null=True)
+    longitude = serializers.FloatField(min_value=-180, max_value=180, required=False, allow_null=True)
+    moisture_threshold = serializers.FloatField(min_value=0, max_value=100, required=False, allow_null=True)
+
+    class Meta:
+        model = Field
+        fields = [
+            "field_id", "name", "crop", "crop_stage", "moisture_threshold",
+            "latitude", "longitude", "created_at", "updated_at",
+        ]
+        read_only_fields = ["created_at", "updated_at"]
+
+    def validate(self, attrs):
+        latitude = attrs.get("latitude", getattr(self.instance, "latitude", None))
+        longitude = attrs.get("longitude", getattr(self.instance, "longitude", None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError("Set both latitude and longitude, or neither.")
+        return attrs
+
+
 class IrrigationEventSerializer(serializers.ModelSerializer):
     duration_seconds = serializers.ReadOnlyField()
 
     class Meta:
         model = IrrigationEvent
         fields = ["id", "field_id", "start_time", "end_time", "reason", "duration_seconds"]
+
+
+class ReadingSessionFieldSerializer(serializers.Serializer):
+    field_id = serializers.CharField(max_length=SensorReading._meta.get_field("field_id").max_length)
+    crop_stage = serializers.CharField(
+        max_length=SensorReading._meta.get_field("crop_stage").max_length, required=False, allow_null=True
+    )
+    location = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+
+
+class SoilWaterBalanceSerializer(serializers.ModelSerializer):
+    depletion_mm = serializers.SerializerMethodField()
+    depletion_fraction = serializers.SerializerMethodField()
+    irrigation_due = serializers.SerializerMethodField()
+
+    class Meta:
+        model = SoilWaterBalance
+        fields = [
+            "field_id", "location", "depletion_mm", "depletion_fraction", "irrigation_due",
+            "total_available_mm", "readily_available_mm", "crop_et_mm", "moisture", "as_of",
+        ]
+
+    def _depletion(self, obj):
+        # Accrued once per object, at one "now" per response
+        if not hasattr(obj, "_accrued_depletion"):
+            now = self.context.setdefault("now", timezone.now())
+            obj._accrued_depletion = accrued_depletion(obj, now)
+        return obj._accrued_depletion
+
+    def get_depletion_mm(self, obj):
+        return round(self._depletion(obj), 2)
+
+    def get_depletion_fraction(self, obj):
+        return round(self._depletion(obj) / obj.total_available_mm, 3) if obj.total_available_mm else None
+
+    def get_irrigation_due(self, obj):
+        return self._depletion(obj) >= obj.readily_available_mm
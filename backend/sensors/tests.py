@@ -1,8 +1,30 @@
-from django.test import TestCase
+from django.conf import settings
+from django.utils import timezone
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from datetime import datetime
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError
+import gzip
+import io
+import json
+import os
+import tempfile
+from unittest import mock, skipUnless
+import numpy as np
+from . import export, mqtt, wire
+from .decision import decide_action, decide_actions, decide_batch
+from . import fields
+from . import water_balance
+from .models import Field, IrrigationEvent, SensorReading, SoilWaterBalance
+from weather import geo
+from weather import evapotranspiration
+from weather.models import DailyEvapotranspiration, WeatherData, WeatherForecast
+from weather.services import WeatherService
+from irrigation_api import instrumentation
 
 
 class ReadingTests(TestCase):
@@ -17,3 +39,606 @@ class ReadingTests(TestCase):
         }, format='json')
         self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
         self.assertIn("action", resp.data)
+
+
+class BulkIngestTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_bulk_json_reports_per_row_status(self):
+        now = datetime.utcnow().isoformat()
+        resp = self.client.post("/api/readings/bulk/", [
+            {"timestamp": now, "field_id": "f1", "moisture": 20.0},
+            {"timestamp": now, "field_id": "f1", "moisture": "wet"},
+            {"timestamp": now, "field_id": "f2", "moisture": 60.0, "temperature_c": 25, "humidity": 50},
+        ], format="json")
+        self.assertEqual(resp.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual((resp.data["created"], resp.data["failed"]), (2, 1))
+        statuses = [row["status"] for row in resp.data["results"]]
+        self.assertEqual(statuses, ["created", "error", "created"])
+        self.assertIn("moisture", resp.data["results"][1]["errors"])
+        self.assertEqual(resp.data["results"][2]["action"], "SKIP")
+        self.assertEqual(SensorReading.objects.count(), 2)
+
+    def test_bulk_rejects_non_finite_numbers(self):
+        now = datetime.utcnow().isoformat()
+        resp = self.client.post("/api/readings/bulk/", [
+            {"timestamp": now, "field_id": "f1", "moisture": "nan"},
+            {"timestamp": now, "field_id": "f1", "moisture": 30.0, "temperature_c": "inf"},
+            {"timestamp": now, "field_id": "f1", "moisture": 30.0, "humidity": "-Infinity"},
+        ], format="json")
+        self.assertEqual((resp.data["created"], resp.data["failed"]), (0, 3))
+        errors = [row["errors"] for row in resp.data["results"]]
+        self.assertEqual([list(e) for e in errors], [["moisture"], ["temperature_c"], ["humidity"]])
+        self.assertEqual(SensorReading.objects.count(), 0)
+
+    def test_bulk_ndjson(self):
+        now = datetime.utcnow().isoformat()
+        body = "\n".join(json.dumps({"timestamp": now, "field_id": "f1", "moisture": m}) for m in (10, 50))
+        resp = self.client.post("/api/readings/bulk/", data=body, content_type="application/x-ndjson")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([row["action"] for row in resp.data["results"]], ["IRRIGATE", "SKIP"])
+
+    def test_bulk_gzip_body(self):
+        now = datetime.utcnow().isoformat()
+        body = gzip.compress(json.dumps([{"timestamp": now, "field_id": "f1", "moisture": 50}]).encode())
+        resp = self.client.post("/api/readings/bulk/", data=body, content_type="application/json",
+                                HTTP_CONTENT_ENCODING="gzip")
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(resp.data["created"], 1)
+
+
+class RollupTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_rollup_buckets_single_and_bulk_inserts(self):
+        self.client.post("/api/readings/", {
+            "timestamp": "2026-05-01T10:01:00Z", "field_id": "f1", "moisture": 40, "temperature_c": 20,
+        }, format="json")
+        self.client.post("/api/readings/bulk/", [
+            {"timestamp": "2026-05-01T10:03:00Z", "field_id": "f1", "moisture": 50, "humidity": 60},
+            {"timestamp": "2026-05-01T10:07:00Z", "field_id": "f1", "moisture": 30},
+            {"timestamp": "2026-05-01T10:03:00Z", "field_id": "f2", "moisture": 90},
+        ], format="json")
+
+        resp = self.client.get("/api/readings/rollup/", {
+            "field_id": "f1", "bucket": "5m", "start": "2026-05-01T10:00:00Z", "end": "2026-05-01T11:00:00Z",
+        })
+        self.assertEqual(resp.status_code, 200)
+        first, second = resp.data["buckets"]
+        self.assertEqual(first["count"], 2)
+        self.assertEqual(first["moisture"], {"min": 40, "mean": 45, "max": 50})
+        self.assertEqual(first["temperature_c"]["mean"], 20)
+        self.assertEqual(first["humidity"]["mean"], 60)
+        self.assertIsNone(second["temperature_c"])
+
+        hourly = self.client.get("/api/readings/rollup/", {
+            "field_id": "f1", "bucket": "1h", "start": "2026-05-01T00:00:00Z", "end": "2026-05-02T00:00:00Z",
+        }).data["buckets"]
+        self.assertEqual(len(hourly), 1)
+        self.assertEqual(hourly[0]["moisture"]["mean"], 40)
+
+    def test_rollup_fill_previous_carries_last_value_up_to_heartbeat(self):
+        self.client.post("/api/readings/bulk/", [
+            {"timestamp": "2026-05-01T10:01:00Z", "field_id": "f1", "moisture": 40, "temperature_c": 20},
+            {"timestamp": "2026-05-01T10:04:00Z", "field_id": "f1", "moisture": 44},
+            {"timestamp": "2026-05-01T10:31:00Z", "field_id": "f1", "moisture": 38},
+        ], format="json")
+        params = {"field_id": "f1", "bucket": "5m", "start": "2026-05-01T10:00:00Z", "end": "2026-05-01T11:00:00Z"}
+
+        sparse = self.client.get("/api/readings/rollup/", params).data["buckets"]
+        self.assertEqual(len(sparse), 2)
+
+        with self.settings(READING_HEARTBEAT_SECONDS=900):
+            filled = self.client.get("/api/readings/rollup/", {**params, "fill": "previous"}).data["buckets"]
+        # 10:00 real, 10:05/10:10/10:15 carried (within 15 min of 10:04), 10:30 real, then 10:35-10:45 carried
+        self.assertEqual(
+            [(b["bucket_start"].strftime("%H:%M"), b["filled"]) for b in filled],
+            [("10:00", False), ("10:05", True), ("10:10", True), ("10:15", True),
+             ("10:30", False), ("10:35", True), ("10:40", True), ("10:45", True)],
+        )
+        self.assertEqual(filled[1]["moisture"], {"min": 44, "mean": 44, "max": 44})
+        self.assertEqual(filled[1]["temperature_c"]["mean"], 20)
+        self.assertEqual(filled[1]["count"], 0)
+
+        bad = self.client.get("/api/readings/rollup/", {**params, "fill": "linear"})
+        self.assertEqual(bad.status_code, 400)
+
+    def test_rollup_rejects_too_many_buckets(self):
+        resp = self.client.get("/api/readings/rollup/", {
+            "field_id": "f1", "bucket": "1m", "start": "2026-01-01T00:00:00Z", "end": "2026-03-01T00:00:00Z",
+        })
+        self.assertEqual(resp.status_code, 400)
+
+
+class LatestReadingTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_latest_per_field(self):
+        self.client.post("/api/readings/bulk/", [
+            {"timestamp": "2026-05-01T10:00:00Z", "field_id": "f1", "moisture": 40},
+            {"timestamp": "2026-05-01T11:00:00Z", "field_id": "f1", "moisture": 41},
+            {"timestamp": "2026-05-01T12:00:00Z", "field_id": "f2", "moisture": 42},
+        ], format="json")
+        self.assertEqual(self.client.get("/api/readings/latest/").data["field_id"], "f2")
+        self.assertEqual(self.client.get("/api/readings/latest/", {"field_id": "f1"}).data["moisture"], 41)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.post("/api/readings/bulk/", [
+            {"timestamp": f"2026-05-01T10:{minute:02d}:00Z", "field_id": field, "moisture": minute}
+            for minute in range(10) for field in ("f1", "f2")
+        ], format="json")
+
+    def test_pages_forward_and_back_without_count(self):
+        resp = self.client.get("/api/readings/", {"field_id": "f1", "page_size": 4})
+        self.assertNotIn("count", resp.data)
+        self.assertIsNone(resp.data["previous"])
+        seen = [row["moisture"] for row in resp.data["results"]]
+        while resp.data["next"]:
+            resp = self.client.get(resp.data["next"])
+            seen += [row["moisture"] for row in resp.data["results"]]
+        self.assertEqual(seen, list(range(9, -1, -1)))
+
+        resp = self.client.get(resp.data["previous"])
+        self.assertEqual([row["moisture"] for row in resp.data["results"]], [5, 4, 3, 2])
+
+    def test_time_range_filter(self):
+        resp = self.client.get("/api/readings/", {
+            "field_id": "f2", "start": "2026-05-01T10:03:00Z", "end": "2026-05-01T10:06:00Z",
+        })
+        self.assertEqual([row["moisture"] for row in resp.data["results"]], [5, 4, 3])
+        self.assertEqual(self.client.get("/api/readings/", {"cursor": "bogus"}).status_code, 404)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.post("/api/readings/bulk/", [
+            {"timestamp": f"2026-05-01T10:0{minute}:00Z", "field_id": "f1", "moisture": 30 + minute}
+            for minute in range(3)
+        ], format="json")
+
+    def test_csv_and_ndjson_stream(self):
+        resp = self.client.get("/api/readings/export/csv/", {"field_id": "f1"})
+        self.assertTrue(resp.streaming)
+        lines = b"".join(resp.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["id", "timestamp", "field_id"])
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(resp["Content-Disposition"], 'attachment; filename="readings-f1.csv"')
+        resp = self.client.get("/api/readings/export/csv/", {"field_id": 'f1"; x=y'})
+        self.assertEqual(resp["Content-Disposition"], 'attachment; filename="readings-f1___x_y.csv"')
+
+        resp = self.client.get("/api/readings/export/ndjson/", {"start": "2026-05-01T10:01:00Z"})
+        records = [json.loads(line) for line in b"".join(resp.streaming_content).splitlines()]
+        self.assertEqual([record["moisture"] for record in records], [31, 32])
+
+    @skipUnless(export.PARQUET_AVAILABLE, "pyarrow not installed")
+    def test_parquet_stream(self):
+        import io
+        import pyarrow.parquet as pq
+        resp = self.client.get("/api/readings/export/parquet/", {"field_id": "f1"})
+        table = pq.read_table(io.BytesIO(b"".join(resp.streaming_content)))
+        self.assertEqual(table.column("moisture").to_pylist(), [30, 31, 32])
+
+
+class CompactWireTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        resp = self.client.post("/api/readings/sessions/", {"fields": [
+            {"field_id": "f1", "crop_stage": "vegetative"},
+            {"field_id": "f2", "location": "North"},
+        ]}, format="json")
+        self.assertEqual(resp.status_code, 201)
+        self.session = resp.data["id"]
+        self.epoch = int(datetime(2026, 5, 1, 10, tzinfo=dt_timezone.utc).timestamp())
+
+    def post_frame(self, path, rows, session=None):
+        body = wire.encode_frame(session or self.session, rows)
+        return self.client.generic("POST", path, body, content_type=wire.CONTENT_TYPE)
+
+    def test_bulk_frame_resolves_session_fields(self):
+        resp = self.post_frame("/api/readings/bulk/", [
+            (self.epoch, 0, 41.257, 21.5, None),
+            (self.epoch + 300, 1, 12.0, None, 55.55),
+        ])
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data["created"], 2)
+
+        first, second = SensorReading.objects.order_by("timestamp")
+        self.assertEqual((first.field_id, first.crop_stage), ("f1", "vegetative"))
+        self.assertAlmostEqual(first.moisture, 41.26)
+        self.assertIsNone(first.humidity)
+        self.assertEqual(first.timestamp, datetime(2026, 5, 1, 10, tzinfo=dt_timezone.utc))
+        self.assertEqual(second.field_id, "f2")
+        self.assertIsNone(second.temperature_c)
+        self.assertEqual(second.action, "IRRIGATE")
+
+    def test_single_reading_frame(self):
+        resp = self.post_frame("/api/readings/", [(self.epoch, 1, 50.0, 20.0, 60.0)])
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.data["field_id"], "f2")
+        self.assertEqual(resp.data["action"], "SKIP")
+
+        two = self.post_frame("/api/readings/", [(self.epoch, 0, 1, 1, 1), (self.epoch, 1, 1, 1, 1)])
+        self.assertEqual(two.status_code, 400)
+
+    def test_single_frame_is_decided_at_its_measured_time(self):
+        with mock.patch("sensors.views.decide_action", return_value="SKIP") as decide:
+            self.post_frame("/api/readings/", [(self.epoch, 0, 50.0, None, None)])
+        self.assertEqual(decide.call_args.kwargs["timestamp"], datetime(2026, 5, 1, 10, tzinfo=dt_timezone.utc))
+
+    def test_reregistering_the_same_zones_reuses_the_session(self):
+        resp = self.client.post("/api/readings/sessions/", {"fields": [
+            {"field_id": "f1", "crop_stage": "vegetative"},
+            {"field_id": "f2", "location": "North"},
+        ]}, format="json")
+        self.assertEqual((resp.status_code, resp.data["id"]), (200, self.session))
+        resp = self.client.post("/api/readings/sessions/", {"fields": [{"field_id": "f1"}]}, format="json")
+        self.assertEqual(resp.status_code, 201)
+        self.assertNotEqual(resp.data["id"], self.session)
+
+    def test_rejects_unknown_session_and_bad_frames(self):
+        self.assertEqual(self.post_frame("/api/readings/bulk/", [(self.epoch, 0, 1, 1, 1)], session=999).status_code, 404)
+        self.assertEqual(self.post_frame("/api/readings/bulk/", [(self.epoch, 5, 1, 1, 1)]).status_code, 400)
+        truncated = wire.encode_frame(self.session, [(self.epoch, 0, 1, 1, 1)])[:-1]
+        resp = self.client.generic("POST", "/api/readings/bulk/", truncated, content_type=wire.CONTENT_TYPE)
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(SensorReading.objects.count(), 0)
+
+
+class MqttIngestTests(TestCase):
+    def setUp(self):
+        self.published = []
+        self.now = 0.0
+        self.batcher = mqtt.ReadingBatcher(lambda topic, payload: self.published.append((topic, json.loads(payload))),
+                                           batch_size=3, max_delay=1.0, clock=lambda: self.now)
+
+    def test_batch_is_stored_and_newest_decision_published_per_field(self):
+        start = datetime(2026, 5, 1, tzinfo=dt_timezone.utc)
+        self.batcher.add("irrigation/f1/readings", json.dumps([
+            {"timestamp": (start + timedelta(minutes=i)).isoformat(), "moisture": m} for i, m in enumerate((50, 20))
+        ]).encode())
+        self.assertFalse(self.batcher.due())
+        self.batcher.add("irrigation/f2/readings", json.dumps({"timestamp": start.isoformat(), "moisture": 60}).encode())
+        self.assertTrue(self.batcher.due())
+
+        self.assertEqual(self.batcher.flush(), 3)
+        self.assertEqual(SensorReading.objects.count(), 3)
+        commands = dict(self.published)
+        self.assertEqual(sorted(commands), ["irrigation/f1/commands", "irrigation/f2/commands"])
+        self.assertEqual(commands["irrigation/f1/commands"]["action"], "IRRIGATE")
+        self.assertEqual(commands["irrigation/f1/commands"]["moisture"], 20)
+        self.assertEqual(commands["irrigation/f2/commands"]["action"], "SKIP")
+
+    def test_partial_batch_flushes_after_max_delay(self):
+        self.batcher.add("irrigation/f1/readings", json.dumps({"timestamp": datetime.utcnow().isoformat(), "moisture": 40}).encode())
+        self.assertFalse(self.batcher.due())
+        self.now = 1.5
+        self.assertTrue(self.batcher.due())
+        self.assertEqual(self.batcher.flush(), 1)
+
+    def test_rows_are_kept_when_the_database_fails(self):
+        self.batcher.add("irrigation/f1/readings", json.dumps(
+            {"timestamp": datetime.utcnow().isoformat(), "moisture": 40}).encode())
+        with mock.patch("sensors.mqtt.store_readings", side_effect=OperationalError("database is locked")):
+            with self.assertRaises(OperationalError):
+                self.batcher.flush()
+        self.assertEqual(len(self.batcher), 1)
+        self.assertEqual(self.batcher.flush(), 1)
+        self.assertEqual(SensorReading.objects.count(), 1)
+
+    def test_invalid_messages_are_rejected(self):
+        now = datetime.utcnow().isoformat()
+        self.assertEqual(self.batcher.add("irrigation/f1/readings", b"not json"), 0)
+        self.assertEqual(self.batcher.add("irrigation/f1/status", b"{}"), 0)
+        # A payload may not claim another field than its topic
+        self.assertEqual(self.batcher.add("irrigation/f1/readings", json.dumps(
+            {"timestamp": now, "field_id": "f2", "moisture": 10}).encode()), 0)
+        self.batcher.add("irrigation/f1/readings", json.dumps({"timestamp": now, "moisture": "wet"}).encode())
+        self.assertEqual(self.batcher.flush(), 0)
+        self.assertEqual(self.batcher.rejected, 3)
+        self.assertEqual(self.published, [])
+        self.assertEqual(SensorReading.objects.count(), 0)
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.ENABLED = False
+
+    def post_reading(self, client):
+        return client.post("/api/readings/", {
+            "timestamp": datetime.utcnow().isoformat(), "field_id": "f1", "moisture": 20.0,
+        }, format="json")
+
+    def test_disabled_by_default(self):
+        resp = self.post_reading(APIClient())
+        self.assertNotIn("Server-Timing", resp)
+        self.assertEqual(self.client.get("/api/metrics/").status_code, status.HTTP_404_NOT_FOUND)
+
+    @override_settings(INSTRUMENTATION_ENABLED=True)
+    def test_metrics_record_stages_queries_and_outbound_calls(self):
+        client = APIClient()
+        resp = self.post_reading(client)
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertIn("decide;dur=", resp["Server-Timing"])
+        with instrumentation.outbound("test-service"):
+            pass
+
+        metrics = client.get("/api/metrics/")
+        self.assertEqual(metrics.status_code, status.HTTP_200_OK)
+        body = metrics.content.decode()
+        self.assertIn('irrigation_http_request_duration_seconds_count{view="readings-list",method="POST",status="201"} 1',
+                      body)
+        for stage_name in ("parse", "decide", "validate", "db_write", "rollups"):
+            self.assertIn(f'irrigation_stage_duration_seconds_count{{stage="{stage_name}"}} 1', body)
+        self.assertIn('irrigation_outbound_http_duration_seconds_count{service="test-service",outcome="ok"} 1', body)
+        # At least one INSERT was counted, so the "0 queries" bucket is empty
+        self.assertIn('irrigation_db_queries_per_request_bucket{view="readings-list",le="0.0"} 0', body)
+        self.assertIn("irrigation_forecast_cache_misses_total", body)
+
+    def test_slow_sampled_requests_are_profiled(self):
+        with tempfile.TemporaryDirectory() as profile_dir:
+            with override_settings(INSTRUMENTATION_ENABLED=True, INSTRUMENTATION_PROFILE_SAMPLE_RATE=1.0,
+                                   INSTRUMENTATION_SLOW_REQUEST_MS=0, INSTRUMENTATION_PROFILE_DIR=profile_dir):
+                self.post_reading(APIClient())
+            dumps = os.listdir(profile_dir)
+            self.assertEqual(len(dumps), 1)
+            self.assertTrue(dumps[0].endswith(".prof") and "readings-list" in dumps[0])
+
+
+class BatchDecisionTests(TestCase):
+    def test_batch_engine_matches_scalar_path(self):
+        rng = np.random.default_rng(7)
+        n = 2000
+        edges = [None, 0.0, float("nan"), 20.0, 30.0, 40.0, 70.0]
+
+        def sample(low, high):
+            values = rng.uniform(low, high, n).round(1).tolist()
+            for i in rng.choice(n, n // 5, replace=False):
+                values[i] = edges[rng.integers(len(edges))]
+            return values
+
+        moisture = rng.uniform(0, 60, n).round(1).tolist()
+        temperature = sample(5, 45)
+        humidity = sample(10, 100)
+        thresholds = rng.choice([0.0, 25.0, 35.0, 40.0], n).tolist()
+        rain = rng.random(n) < 0.2
+        # Stored crop ET for half the rows; the rest fall back to temperature/humidity
+        crop_et = np.where(rng.random(n) < 0.5, rng.uniform(0, 9, n).round(2), np.nan)
+        # And a water balance for a third, which then decides on its own
+        ratio = np.where(rng.random(n) < 0.3, rng.uniform(0, 2, n).round(2), np.nan)
+        optional = lambda value: None if np.isnan(value) else float(value)
+
+        expected = []
+        for i in range(n):
+            with mock.patch("sensors.decision.WeatherService.will_rain_today", return_value=bool(rain[i])), \
+                    mock.patch("sensors.decision.evapotranspiration.crop_et", return_value=optional(crop_et[i])), \
+                    mock.patch("sensors.decision.water_balance.depletion_ratio", return_value=optional(ratio[i])):
+                expected.append(decide_action(
+                    moisture[i], temperature[i], humidity[i], location="f", threshold=thresholds[i], field_id="f"
+                ))
+
+        as_array = lambda values: np.array([np.nan if v is None else v for v in values])
+        actual = decide_actions(
+            moisture, as_array(temperature), as_array(humidity), threshold=thresholds, rain_expected=rain,
+            crop_et=crop_et, depletion_ratio=ratio,
+        )
+        self.assertEqual(actual.tolist(), expected)
+
+
+class ReplayDecisionsTests(TestCase):
+    def setUp(self):
+        fields.clear()
+
+    def test_replay_reports_baseline_and_candidate(self):
+        start = datetime(2026, 5, 1, tzinfo=dt_timezone.utc)
+        SensorReading.objects.bulk_create([
+            SensorReading(field_id="f1", timestamp=start + timedelta(hours=i), moisture=m)
+            for i, m in enumerate([50, 32, 38, 30, 45, 20])
+        ])
+        Field.objects.create(field_id="f1", latitude=52.52, longitude=13.40)
+        # Rain 11h after the last reading suppresses it; earlier readings are outside the 12h horizon
+        WeatherForecast.objects.create(location=geo.cell_key(52.52, 13.40), forecast_timestamp=start + timedelta(hours=16),
+                                       temperature_c=15, humidity=90, precipitation_amount=4)
+        out = io.StringIO()
+        with mock.patch("weather.services.requests.get") as get:
+            call_command("replay_decisions", "--threshold", "40", "--json", "--chunk-size", "4", stdout=out)
+            get.assert_not_called()
+        report = json.loads(out.getvalue())["f1"]
+        self.assertEqual(report["readings"], 6)
+        self.assertEqual(report["baseline"]["irrigate"], 2)
+        self.assertEqual(report["candidate"]["irrigate"], 3)
+        self.assertEqual(report["baseline"]["threshold_crossings"], 3)
+        self.assertEqual(report["candidate"]["threshold_crossings"], 2)
+        self.assertEqual(report["baseline"]["water_litres"], 100)
+
+    def test_baseline_uses_registered_thresholds(self):
+        start = datetime(2026, 5, 1, tzinfo=dt_timezone.utc)
+        SensorReading.objects.bulk_create([
+            SensorReading(field_id="f2", timestamp=start + timedelta(hours=i), moisture=m)
+            for i, m in enumerate([40, 50, 42])
+        ])
+        Field.objects.create(field_id="f2", moisture_threshold=45)
+        out = io.StringIO()
+        call_command("replay_decisions", "--json", stdout=out)
+        report = json.loads(out.getvalue())["f2"]
+        self.assertEqual(report["baseline"]["irrigate"], 2)
+        self.assertEqual(report["candidate"]["irrigate"], 2)
+        with self.assertRaises(CommandError):
+            call_command("replay_decisions", "--threshold", "0", stdout=io.StringIO())
+
+
+class WaterBalanceTests(TestCase):
+    def setUp(self):
+        fields.clear()
+        evapotranspiration.clear_cache()
+        self.start = datetime(2026, 6, 1, 6, tzinfo=dt_timezone.utc)
+        DailyEvapotranspiration.objects.create(
+            location=settings.WEATHER_LOCATION, date=self.start.date(), temperature_min=15, temperature_max=30,
+            humidity_mean=50, et0=6.0, updated_at=self.start,
+        )
+
+    def reading(self, hours, moisture):
+        return SensorReading(field_id="f1", timestamp=self.start + timedelta(hours=hours),
+                             moisture=moisture, crop_stage="flowering")
+
+    @override_settings(WATER_BALANCE_SENSOR_WEIGHT=0.5)
+    def test_events_update_depletion_in_place(self):
+        water_balance.apply_readings([self.reading(0, 40)])
+        state = SoilWaterBalance.objects.get(field_id="f1")
+        self.assertAlmostEqual(state.depletion_mm, 70 * 10 / 30)
+        self.assertAlmostEqual(state.crop_et_mm, 1.15 * 6.0)
+        self.assertAlmostEqual(state.readily_available_mm, 35)
+        created_at = state.updated_at
+
+        # 12h of crop ET, then halfway back toward what the sensor implies; stale readings are skipped
+        water_balance.apply_readings([self.reading(12, 40)])
+        water_balance.apply_readings([self.reading(1, 20)])
+        state.refresh_from_db()
+        expected = (70 * 10 / 30 + 6.9 / 2 + 70 * 10 / 30) / 2
+        self.assertAlmostEqual(state.depletion_mm, expected)
+        self.assertEqual(state.moisture, 40)
+        self.assertGreater(state.updated_at, created_at)
+        updated_at = state.updated_at
+
+        # 30 minutes of irrigation at 12 mm/h
+        water_balance.apply_irrigation(IrrigationEvent(
+            field_id="f1", start_time=self.start, end_time=self.start + timedelta(minutes=30)))
+        state.refresh_from_db()
+        self.assertAlmostEqual(state.depletion_mm, expected - 6)
+        self.assertGreater(state.updated_at, updated_at)
+
+        # Observed rain: an hour's worth, then half an hour's worth of the next observation
+        WeatherService.save_weather_rows([
+            WeatherData(location=settings.WEATHER_LOCATION, timestamp=self.start + timedelta(hours=13, minutes=minutes),
+                        temperature_c=20, humidity=90, precipitation=precipitation)
+            for minutes, precipitation in ((0, 4.0), (30, 2.0))
+        ])
+        state.refresh_from_db()
+        self.assertAlmostEqual(state.depletion_mm, expected - 6 - 5)
+
+    def test_decisions_fold_the_current_reading(self):
+        Field.objects.create(field_id="z1", moisture_threshold=60)
+        for field_id in ("z1", "z2"):
+            water_balance.apply_readings([SensorReading(field_id=field_id, timestamp=self.start, moisture=45)])
+        later = self.start + timedelta(hours=1)
+        with mock.patch("sensors.decision.WeatherService.will_rain_today", return_value=False):
+            # The registered threshold sets RAW; 60% is above field capacity, so any drier reading is due
+            self.assertEqual(decide_action(25.7, field_id="z1", timestamp=later), "IRRIGATE")
+            # The stored balance still reflects the wet reading; the incoming one is what counts
+            self.assertEqual(decide_action(28.7, field_id="z2", timestamp=later), "IRRIGATE")
+            self.assertEqual(decide_action(36, field_id="z2", timestamp=later), "SKIP")
+            self.assertEqual(decide_batch([
+                {"field_id": "z2", "moisture": moisture, "timestamp": later + timedelta(minutes=minutes)}
+                for minutes, moisture in ((10, 34), (5, 28.7), (0, 45))
+            ]), ["IRRIGATE", "IRRIGATE", "SKIP"])
+            # Smoothing noisy sensors: a dry reading only pulls the balance halfway toward RAW
+            with override_settings(WATER_BALANCE_SENSOR_WEIGHT=0.5):
+                self.assertEqual(decide_action(30, field_id="z2", timestamp=later), "SKIP")
+
+    def test_stored_irrigation_events_credit_the_balance(self):
+        water_balance.apply_readings([self.reading(0, 20)])
+        client = APIClient()
+        resp = client.post("/api/irrigation-events/", {
+            "field_id": "f1", "start_time": self.start.isoformat(),
+            "end_time": (self.start + timedelta(minutes=30)).isoformat(),
+        }, format="json")
+        self.assertEqual(resp.status_code, 201)
+        state = SoilWaterBalance.objects.get(field_id="f1")
+        self.assertAlmostEqual(state.depletion_mm, 70 - 6)
+
+        # Editing the event credits only the change in duration
+        client.patch(f"/api/irrigation-events/{resp.data['id']}/",
+                     {"end_time": (self.start + timedelta(minutes=20)).isoformat()}, format="json")
+        state.refresh_from_db()
+        self.assertAlmostEqual(state.depletion_mm, 70 - 4)
+
+    def test_crop_et_still_shifts_decisions_for_fields_with_a_balance(self):
+        water_balance.apply_readings([SensorReading(field_id="z2", timestamp=self.start, moisture=45)])
+        now = timezone.now()
+        # Low crop ET today (1.15 x 1 mm) lowers the threshold by 5 points, so 32% can wait
+        DailyEvapotranspiration.objects.create(
+            location="low-et", date=timezone.localdate(now), temperature_min=5, temperature_max=12,
+            humidity_mean=90, et0=1.0, updated_at=now,
+        )
+        with mock.patch("sensors.decision.WeatherService.will_rain_today", return_value=False):
+            self.assertEqual(decide_action(32, location="low-et", crop_stage="flowering", field_id="z2",
+                                           timestamp=now), "SKIP")
+            self.assertEqual(decide_action(32, location="no-et", crop_stage="flowering", field_id="z2",
+                                           timestamp=now), "IRRIGATE")
+            # Without stored ET the temperature/humidity heuristic applies the same way
+            self.assertEqual(decide_action(32, 15, 80, location="no-et", field_id="z2", timestamp=now), "SKIP")
+            with mock.patch("sensors.decision.fields.forecast_location", return_value="low-et"):
+                self.assertEqual(decide_batch([{"field_id": "z2", "moisture": 32, "crop_stage": "flowering",
+                                                "timestamp": now}]), ["SKIP"])
+
+    def test_api_reads_current_depletion(self):
+        water_balance.apply_readings([self.reading(0, 36)])
+
+        resp = APIClient().get("/api/water-balance/f1/")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["depletion_mm"], 70)  # Months of ET since, capped at TAW
+        self.assertTrue(resp.data["irrigation_due"])
+        self.assertEqual(APIClient().get("/api/water-balance/").data["count"], 1)
+
+
+class FieldRegistryTests(TestCase):
+    def setUp(self):
+        fields.clear()
+        self.client = APIClient()
+
+    def test_crud_and_threshold_lookup(self):
+        resp = self.client.post("/api/fields/", {"field_id": "f1", "crop": "maize", "crop_stage": "flowering",
+                                                 "moisture_threshold": 45}, format="json")
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(self.client.post("/api/fields/", {"field_id": "f2", "latitude": 48.1},
+                                          format="json").status_code, 400)
+
+        fields.snapshot()
+        with self.assertNumQueries(0):
+            self.assertEqual(fields.moisture_threshold("f1"), 45)
+            self.assertEqual(fields.crop_stage("f1"), "flowering")
+            self.assertIsNone(fields.moisture_threshold("unknown"))
+        with mock.patch("sensors.decision.WeatherService.will_rain_today", return_value=False):
+            self.assertEqual(decide_action(40, field_id="f1"), "IRRIGATE")
+            self.assertEqual(decide_action(40, field_id="other"), "SKIP")
+
+        # Edits invalidate the snapshot
+        self.client.patch("/api/fields/f1/", {"moisture_threshold": 30}, format="json")
+        self.assertEqual(fields.moisture_threshold("f1"), 30)
+        self.assertEqual(self.client.delete("/api/fields/f1/").status_code, 204)
+        self.assertIsNone(fields.field_config("f1"))
+
+    def test_config_pull_uses_etags(self):
+        Field.objects.create(field_id="f1", moisture_threshold=40)
+        Field.objects.create(field_id="f2", crop_stage="vegetative")
+        resp = self.client.get("/api/fields/config/?field_id=f1,f2&field_id=unregistered")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(sorted(resp.data["fields"]), ["f1", "f2"])
+        self.assertEqual(resp.data["fields"]["f1"]["moisture_threshold"], 40)
+        etag = resp["ETag"]
+        self.assertEqual(etag, f'"{resp.data["version"]}"')
+
+        # Unchanged: an empty 304 served from memory
+        with self.assertNumQueries(0):
+            resp = self.client.get("/api/fields/config/?field_id=f1,f2", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp["ETag"], etag)
+
+        # Changing another field leaves this edge's ETag valid; changing its own does not
+        Field.objects.create(field_id="f3", moisture_threshold=20)
+        self.assertEqual(self.client.get("/api/fields/config/?field_id=f1,f2",
+                                         HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.client.patch("/api/fields/f2/", {"moisture_threshold": 38}, format="json")
+        resp = self.client.get("/api/fields/config/?field_id=f1,f2", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.data["fields"]["f2"]["moisture_threshold"], 38)
+        self.assertNotEqual(resp["ETag"], etag)
@@ -1,10 +1,12 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include
-from .views import SensorReadingViewSet, IrrigationEventViewSet
+from .views import FieldViewSet, SensorReadingViewSet, IrrigationEventViewSet, SoilWaterBalanceViewSet
 
 router = DefaultRouter()
+router.register(r"fields", FieldViewSet, basename="fields")
 router.register(r"readings", SensorReadingViewSet, basename="readings")
 router.register(r"irrigation-events", IrrigationEventViewSet, basename="irrigation-events")
+router.register(r"water-balance", SoilWaterBalanceViewSet, basename="water-balance")
 
 urlpatterns = [
     path("", include(router.urls)),
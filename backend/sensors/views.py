@@ -1,19 +1,78 @@
+import re
 from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets, mixins, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
-from .models import SensorReading, IrrigationEvent
-from .serializers import SensorReadingSerializer, IrrigationEventSerializer
+from irrigation_api.instrumentation import stage
+from .models import Field, SensorReading, IrrigationEvent, ReadingSession, SoilWaterBalance
+from .serializers import (
+    FieldSerializer, SensorReadingSerializer, IrrigationEventSerializer, ReadingSessionFieldSerializer,
+    SoilWaterBalanceSerializer,
+)
 from .decision import decide_action
+from .fields import forecast_location
+from . import export, fields, water_balance, wire
+from .ingest import validate_readings, store_readings
+from .pagination import KeysetPagination, IrrigationEventPagination
+from .parsers import NDJSONParser, CompactReadingParser
+from .rollups import BUCKETS, apply_readings, query_rollups
+
+
+def _parse_time_param(value, default):
+    """Parse an ISO datetime query parameter, assuming the default timezone if naive."""
+    if not value:
+        return default
+    # Binary frames already decode to datetimes
+    parsed = value if isinstance(value, datetime) else parse_datetime(value)
+    if parsed is None:
+        raise ValueError(value)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.get_default_timezone())
+    return parsed
+
+
+def _filter_history(queryset, params, time_field):
+    """Apply the field_id, start and end query parameters to a queryset."""
+    field_id = params.get("field_id")
+    if field_id:
+        queryset = queryset.filter(field_id=field_id)
+    try:
+        start = _parse_time_param(params.get("start"), None)
+        end = _parse_time_param(params.get("end"), None)
+    except ValueError as exc:
+        raise ValidationError({"error": f"Invalid datetime: {exc}"})
+    if start:
+        queryset = queryset.filter(**{f"{time_field}__gte": start})
+    if end:
+        queryset = queryset.filter(**{f"{time_field}__lt": end})
+    return queryset
 
 
 class SensorReadingViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
     queryset = SensorReading.objects.all()
     serializer_class = SensorReadingSerializer
+    pagination_class = KeysetPagination
+    parser_classes = [JSONParser, CompactReadingParser]
+
+    def get_queryset(self):
+        return _filter_history(super().get_queryset(), self.request.query_params, "timestamp")
 
     def create(self, request, *args, **kwargs):
-        data = request.data.copy()
+        with stage("parse"):
+            data = request.data
+        if isinstance(data, list):
+            # Binary frames always decode to a list
+            if len(data) != 1:
+                return Response({"error": "Post one reading here; use /api/readings/bulk/ for batches"}, status=400)
+            data = data[0]
+        data = data.copy()
         try:
             moisture = float(data.get("moisture"))
             temperature = data.get("temperature_c")
@@ -21,25 +80,85 @@ class SensorReadingViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, views
             field_id = data.get("field_id")
         except (TypeError, ValueError):
             return Response({"error": "Invalid sensor data"}, status=400)
+        try:
+            timestamp = _parse_time_param(data.get("timestamp"), None)
+        except (TypeError, ValueError):
+            timestamp = None  # Reported by the serializer below
         
         # Enhanced decision making
-        action_decision = decide_action(
-            moisture=moisture,
-            temperature=float(temperature) if temperature else None,
-            humidity=float(humidity) if humidity else None,
-            location=field_id
-        )
+        with stage("decide"):
+            action_decision = decide_action(
+                moisture=moisture,
+                temperature=float(temperature) if temperature else None,
+                humidity=float(humidity) if humidity else None,
+                location=forecast_location(field_id),
+                crop_stage=data.get("crop_stage"),
+                field_id=field_id,
+                timestamp=timestamp,
+            )
         data["action"] = action_decision
         
-        serializer = self.get_serializer(data=data)
-        serializer.is_valid(raise_exception=True)
+        with stage("validate"):
+            serializer = self.get_serializer(data=data)
+            serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            with stage("db_write"):
+                reading = serializer.save()
+            with stage("rollups"):
+                apply_readings([reading])
+            with stage("water_balance"):
+                water_balance.apply_readings([reading])
+
+    @action(detail=False, methods=["post"], url_path="sessions", parser_classes=[JSONParser])
+    def sessions(self, request):
+        """Register field metadata once; binary frames then refer to fields by index."""
+        fields = request.data.get("fields") if isinstance(request.data, dict) else None
+        if not isinstance(fields, list) or not 0 < len(fields) <= wire.MAX_FIELDS:
+            return Response({"error": f"fields must be a list of 1 to {wire.MAX_FIELDS} objects"}, status=400)
+        serializer = ReadingSessionFieldSerializer(data=fields, many=True)
+        serializer.is_valid(raise_exception=True)
+        # Restarts and config reloads re-register the same zones; reuse their session
+        digest = wire.schema_digest(serializer.validated_data)
+        session = ReadingSession.objects.filter(digest=digest).order_by("pk").first()
+        if session is not None:
+            return Response({"id": session.pk, "fields": session.fields}, status=status.HTTP_200_OK)
+        session = ReadingSession.objects.create(fields=serializer.validated_data, digest=digest)
+        return Response({"id": session.pk, "fields": session.fields}, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], url_path="bulk", parser_classes=[JSONParser, NDJSONParser, CompactReadingParser])
+    def bulk(self, request):
+        """Ingest a JSON array or NDJSON stream of readings in one transaction."""
+        rows = request.data
+        if not isinstance(rows, list):
+            return Response({"error": "Expected a list of readings"}, status=400)
+        max_rows = getattr(settings, "BULK_INGEST_MAX_ROWS", 10000)
+        if len(rows) > max_rows:
+            return Response({"error": f"At most {max_rows} readings per request"}, status=400)
+
+        with stage("validate"):
+            valid, errors = validate_readings(rows)
+        created = store_readings([reading for _, reading in valid])
+
+        results = [None] * len(rows)
+        for (index, _), obj in zip(valid, created):
+            results[index] = {"index": index, "status": "created", "id": obj.pk, "action": obj.action}
+        for index, row_errors in errors.items():
+            results[index] = {"index": index, "status": "error", "errors": row_errors}
+
+        return Response(
+            {"created": len(created), "failed": len(errors), "results": results},
+            status=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED,
+        )
+
     @action(detail=False, methods=["get"], url_path="latest")
     def latest(self, request):
-        obj = self.get_queryset().first()
+        """Most recent reading, optionally for one field (an index seek, not a sort)."""
+        obj = self.get_queryset().order_by("-timestamp").first()
         if not obj:
             return Response({}, status=200)
         return Response(self.get_serializer(obj).data)
@@ -47,14 +166,86 @@ class SensorReadingViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, views
     @action(detail=False, methods=["get"], url_path="chart-data")
     def chart_data(self, request):
         """Return last 24 hours of data for charts."""
-        since = datetime.now() - timedelta(hours=24)
-        readings = self.get_queryset().filter(timestamp__gte=since)[:100]
-        return Response(self.get_serializer(readings, many=True).data)
+        since = timezone.now() - timedelta(hours=24)
+        readings = self.get_queryset().filter(timestamp__gte=since)
+        return Response(self.get_serializer(readings.order_by("timestamp"), many=True).data)
+
+    @action(detail=False, methods=["get"], url_path=r"export/(?P<export_format>csv|ndjson|parquet)", url_name="export")
+    def export_readings(self, request, export_format=None):
+        """Stream readings matching field_id/start/end as CSV, NDJSON or Parquet."""
+        if export_format == "parquet" and not export.PARQUET_AVAILABLE:
+            return Response({"error": "Parquet export requires pyarrow"}, status=status.HTTP_501_NOT_IMPLEMENTED)
+
+        chunk_size = getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+        rows = export.iter_rows(self.get_queryset(), chunk_size)
+        if export_format == "csv":
+            content = export.iter_csv(rows)
+        elif export_format == "ndjson":
+            content = export.iter_ndjson(rows)
+        else:
+            content = export.iter_parquet(rows, chunk_size)
+
+        response = StreamingHttpResponse(content, content_type=export.CONTENT_TYPES[export_format])
+        # field_id comes straight from the query string; keep quotes and ';' out of the header
+        name = re.sub(r"[^\w.-]", "_", request.query_params.get("field_id") or "all-fields")
+        response["Content-Disposition"] = f'attachment; filename="readings-{name}.{export_format}"'
+        return response
+
+    @action(detail=False, methods=["get"], url_path="rollup")
+    def rollup(self, request):
+        """Return min/mean/max per time bucket for one field (fill=previous carries values over gaps)."""
+        field_id = request.query_params.get("field_id")
+        bucket = request.query_params.get("bucket", "5m")
+        fill = request.query_params.get("fill")
+        if not field_id:
+            return Response({"error": "field_id is required"}, status=400)
+        if bucket not in BUCKETS:
+            return Response({"error": f"bucket must be one of {', '.join(BUCKETS)}"}, status=400)
+        if fill not in (None, "previous"):
+            return Response({"error": "fill must be 'previous'"}, status=400)
+        try:
+            end = _parse_time_param(request.query_params.get("end"), timezone.now())
+            start = _parse_time_param(request.query_params.get("start"), end - timedelta(hours=24))
+        except ValueError as exc:
+            return Response({"error": f"Invalid datetime: {exc}"}, status=400)
+
+        max_buckets = getattr(settings, "ROLLUP_MAX_BUCKETS", 5000)
+        if (end - start).total_seconds() / BUCKETS[bucket] > max_buckets:
+            return Response({"error": f"Range spans more than {max_buckets} buckets; use a wider bucket"}, status=400)
+
+        return Response({
+            "field_id": field_id,
+            "bucket": bucket,
+            "start": start,
+            "end": end,
+            "buckets": query_rollups(
+                field_id, start, end, bucket,
+                fill=fill, heartbeat_seconds=getattr(settings, "READING_HEARTBEAT_SECONDS", 1800),
+            ),
+        })
 
 
 class IrrigationEventViewSet(viewsets.ModelViewSet):
     queryset = IrrigationEvent.objects.all()
     serializer_class = IrrigationEventSerializer
+    pagination_class = IrrigationEventPagination
+
+    def get_queryset(self):
+        return _filter_history(super().get_queryset(), self.request.query_params, "start_time")
+
+    # Every stored end_time credits the field's water balance
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            water_balance.apply_irrigation(serializer.save())
+
+    def perform_update(self, serializer):
+        field_id, credited = serializer.instance.field_id, serializer.instance.duration_seconds or 0.0
+        with transaction.atomic():
+            event = serializer.save()
+            if event.field_id != field_id:
+                water_balance.credit_irrigation(field_id, -credited)
+                credited = 0.0
+            water_balance.apply_irrigation(event, credited)
 
     @action(detail=False, methods=["post"], url_path="start")
     def start(self, request):
@@ -62,7 +253,7 @@ class IrrigationEventViewSet(viewsets.ModelViewSet):
         reason = request.data.get("reason")
         event = IrrigationEvent.objects.create(
             field_id=field_id, 
-            start_time=datetime.now(), 
+            start_time=timezone.now(), 
             reason=reason
         )
         return Response(IrrigationEventSerializer(event).data, status=201)
@@ -75,8 +266,10 @@ class IrrigationEventViewSet(viewsets.ModelViewSet):
         except IrrigationEvent.DoesNotExist:
             return Response({"error": "Active irrigation event not found"}, status=404)
         
-        event.end_time = datetime.now()
-        event.save()
+        event.end_time = timezone.now()
+        with transaction.atomic():
+            event.save()
+            water_balance.apply_irrigation(event)
         return Response(IrrigationEventSerializer(event).data)
 
     @action(detail=False, methods=["get"], url_path="active")
@@ -84,3 +277,45 @@ class IrrigationEventViewSet(viewsets.ModelViewSet):
         """Get currently active irrigation events."""
         active_events = self.get_queryset().filter(end_time__isnull=True)
         return Response(self.get_serializer(active_events, many=True).data)
+
+
+class SoilWaterBalanceViewSet(viewsets.ReadOnlyModelViewSet):
+    """Current root-zone water balance per field, with crop ET accrued to now."""
+    queryset = SoilWaterBalance.objects.all()
+    serializer_class = SoilWaterBalanceSerializer
+    lookup_field = "field_id"
+
+
+class FieldViewSet(viewsets.ModelViewSet):
+    """Field registry: coordinates, crop and moisture threshold per field."""
+    queryset = Field.objects.all()
+    serializer_class = FieldSerializer
+    lookup_field = "field_id"
+    lookup_value_regex = "[^/]+"
+
+    @action(detail=False, methods=["get"], url_path="config")
+    def config(self, request):
+        """
+        Settings for the fields named by ``field_id`` (repeated or comma-separated; default all),
+        served from the in-memory registry snapshot. Clients send their last ETag as
+        If-None-Match and get an empty 304 while nothing they asked for has changed.
+        """
+        requested = [
+            field_id for value in request.query_params.getlist("field_id")
+            for field_id in value.split(",") if field_id
+        ]
+        registry = fields.snapshot().fields
+        if requested:
+            configs = [registry[field_id] for field_id in dict.fromkeys(requested) if field_id in registry]
+        else:
+            configs = list(registry.values())
+
+        version = fields.etag(configs)
+        headers = {"ETag": f'"{version}"', "Cache-Control": "no-cache"}
+        known = [tag.strip().removeprefix("W/") for tag in request.headers.get("If-None-Match", "").split(",")]
+        if headers["ETag"] in known or "*" in known:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(
+            {"version": version, "fields": {config.field_id: config.as_dict() for config in configs}},
+            headers=headers,
+        )
@@ -0,0 +1,242 @@
+"""
+Per-field root-zone water balance (FAO-56 chapter 8), kept incrementally.
+
+SoilWaterBalance holds one row per field: root-zone depletion Dr (mm below
+field capacity) as of a timestamp and the crop ET rate in force. Each event
+is O(1) on that row, never a re-aggregation of history:
+
+- time passing accrues ETc x elapsed days (applied lazily, on the next
+  reading or when the balance is read);
+- a reading moves Dr toward the depletion its moisture implies, by
+  WATER_BALANCE_SENSOR_WEIGHT (all the way by default), and refreshes the ET
+  rate from the stored daily crop ET;
+- a finished irrigation event, however it is stored, subtracts
+  IRRIGATION_APPLICATION_MM_PER_HOUR x its duration;
+- an observed weather row subtracts its rain.
+
+Dr stays within [0, TAW]: water beyond field capacity drains away. Water
+added by irrigation and rain is applied whenever it arrives, so late rows
+still count; readings older than the state are skipped.
+
+Irrigation is due at RAW, the depletion the field's moisture threshold
+implies, so a field's registered threshold sets its trigger here too.
+Decisions shift that threshold by the day's crop ET first (FAO-56 likewise
+lowers p as ETc rises); the stored readily_available_mm is the unshifted one.
+"""
+from datetime import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from weather import evapotranspiration
+from weather.models import WeatherData
+from weather.signals import weather_saved
+from . import fields
+from .models import SoilWaterBalance
+
+
+def total_available_water() -> float:
+    """TAW in mm from settings."""
+    return getattr(settings, "SOIL_TOTAL_AVAILABLE_WATER_MM", 70.0)
+
+
+def sensor_depletion(moisture: float, total_available_mm: float) -> float:
+    """Depletion implied by a moisture reading, linear between field capacity and wilting point."""
+    field_capacity = getattr(settings, "SOIL_FIELD_CAPACITY_PCT", 50.0)
+    wilting_point = getattr(settings, "SOIL_WILTING_POINT_PCT", 20.0)
+    fraction = (field_capacity - moisture) / (field_capacity - wilting_point)
+    return min(max(fraction, 0.0), 1.0) * total_available_mm
+
+
+def readily_available(field_id: str, total_available_mm: float, threshold: float = None) -> float:
+    """RAW in mm: the depletion at ``threshold``, else at the field's registered or the default threshold."""
+    if threshold is None:
+        threshold = fields.moisture_threshold(field_id) or getattr(settings, "DEFAULT_MOISTURE_THRESHOLD", 35.0)
+    return sensor_depletion(threshold, total_available_mm)
+
+
+def _clamp(state: SoilWaterBalance):
+    state.depletion_mm = min(max(state.depletion_mm, 0.0), state.total_available_mm)
+
+
+def accrued_depletion(state: SoilWaterBalance, now: datetime = None) -> float:
+    """Depletion with crop ET accrued from ``as_of`` to ``now``, without saving."""
+    now = now or timezone.now()
+    elapsed_days = max((now - state.as_of).total_seconds(), 0.0) / 86400
+    return min(state.depletion_mm + state.crop_et_mm * elapsed_days, state.total_available_mm)
+
+
+def folded_depletion(state: SoilWaterBalance, timestamp: datetime, moisture: float) -> float:
+    """Depletion once a reading taken at ``timestamp`` is folded in, without changing ``state``."""
+    depletion = accrued_depletion(state, timestamp)
+    weight = getattr(settings, "WATER_BALANCE_SENSOR_WEIGHT", 1.0)
+    depletion += weight * (sensor_depletion(moisture, state.total_available_mm) - depletion)
+    return min(max(depletion, 0.0), state.total_available_mm)
+
+
+def _fold_reading(state: SoilWaterBalance, reading, crop_et):
+    state.depletion_mm = folded_depletion(state, reading.timestamp, reading.moisture)
+    state.as_of = reading.timestamp
+    state.moisture = reading.moisture
+    if crop_et is not None:
+        state.crop_et_mm = crop_et
+
+
+def apply_readings(readings):
+    """Fold newly stored readings into their fields' balances, one row write per field."""
+    by_field = {}
+    for reading in readings:
+        by_field.setdefault(reading.field_id, []).append(reading)
+    if not by_field:
+        return
+
+    taw = total_available_water()
+    now = timezone.now()
+    with transaction.atomic():
+        states = {
+            state.field_id: state
+            for state in SoilWaterBalance.objects.select_for_update().filter(field_id__in=by_field)
+        }
+        existing, created = [], []
+        for field_id, field_readings in by_field.items():
+            location = fields.forecast_location(field_id)
+            state = states.get(field_id)
+            if state is None:
+                first = min(field_readings, key=lambda reading: reading.timestamp)
+                state = SoilWaterBalance(
+                    field_id=field_id, location=location, total_available_mm=taw,
+                    depletion_mm=sensor_depletion(first.moisture, taw), as_of=first.timestamp,
+                )
+                created.append(state)
+            else:
+                existing.append(state)
+            state.location = location
+            state.readily_available_mm = readily_available(field_id, state.total_available_mm)
+            # bulk_update skips auto_now
+            state.updated_at = now
+            crop_et = {}
+            for reading in sorted(field_readings, key=lambda reading: reading.timestamp):
+                if reading.timestamp < state.as_of:
+                    continue
+                if reading.crop_stage not in crop_et:
+                    crop_et[reading.crop_stage] = evapotranspiration.crop_et(
+                        location, fields.crop_stage(field_id, reading.crop_stage),
+                        timezone.localdate(reading.timestamp))
+                _fold_reading(state, reading, crop_et[reading.crop_stage])
+        if existing:
+            SoilWaterBalance.objects.bulk_update(
+                existing, ["location", "readily_available_mm", "depletion_mm", "crop_et_mm", "moisture", "as_of",
+                           "updated_at"]
+            )
+        SoilWaterBalance.objects.bulk_create(created)
+
+
+def _add_water(states, depth_mm: float):
+    now = timezone.now()
+    for state in states:
+        state.depletion_mm -= depth_mm
+        _clamp(state)
+        state.updated_at = now
+
+
+def apply_irrigation(event, credited_seconds: float = 0.0):
+    """
+    Credit a stored irrigation event's water to its field.
+
+    ``credited_seconds`` is the duration already credited for an event being
+    edited, so only the change is applied (a shortened event takes water back).
+    """
+    credit_irrigation(event.field_id, (event.duration_seconds or 0.0) - credited_seconds)
+
+
+def credit_irrigation(field_id: str, seconds: float):
+    """Credit ``seconds`` of irrigation to a field (negative seconds take it back)."""
+    if not seconds:
+        return
+    depth = getattr(settings, "IRRIGATION_APPLICATION_MM_PER_HOUR", 12.0) * seconds / 3600
+    with transaction.atomic():
+        states = list(SoilWaterBalance.objects.select_for_update().filter(field_id=field_id))
+        _add_water(states, depth)
+        SoilWaterBalance.objects.bulk_update(states, ["depletion_mm", "updated_at"])
+
+
+@receiver(weather_saved)
+def apply_rain(sender, rows, **kwargs):
+    """
+    Credit observed rain to every field in the rows' locations.
+
+    Each row's precipitation is the last hour's, so it is scaled by the time
+    since the location's previous observation (capped at one hour) to avoid
+    counting an hour twice when observations are closer together.
+    """
+    by_location = {}
+    for row in rows:
+        by_location.setdefault(row.location, []).append(row)
+
+    rain = {}
+    for location, location_rows in by_location.items():
+        location_rows.sort(key=lambda row: row.timestamp)
+        previous = (
+            WeatherData.objects.filter(location=location, timestamp__lt=location_rows[0].timestamp)
+            .order_by("-timestamp").values_list("timestamp", flat=True).first()
+        )
+        total = 0.0
+        for row in location_rows:
+            hours = 1.0 if previous is None else min(max((row.timestamp - previous).total_seconds(), 0.0) / 3600, 1.0)
+            total += (row.precipitation or 0.0) * hours
+            previous = row.timestamp
+        if total > 0:
+            rain[location] = total
+    if not rain:
+        return
+
+    with transaction.atomic():
+        states = list(SoilWaterBalance.objects.select_for_update().filter(location__in=rain))
+        for state in states:
+            _add_water([state], rain[state.location])
+        SoilWaterBalance.objects.bulk_update(states, ["depletion_mm", "updated_at"])
+
+
+def current(field_id: str, now: datetime = None):
+    """A field's balance with ET accrued to ``now`` (unsaved), or None before its first reading."""
+    state = SoilWaterBalance.objects.filter(field_id=field_id).first()
+    if state is not None:
+        state.depletion_mm = accrued_depletion(state, now)
+    return state
+
+
+def _ratio(depletion: float, readily_available_mm: float) -> float:
+    # A threshold at or above field capacity leaves no RAW: any reading below it is due
+    return depletion / readily_available_mm if readily_available_mm > 0 else float("inf")
+
+
+def depletion_ratios(field_id: str, readings) -> list:
+    """
+    Depletion over RAW (>= 1 means irrigation is due) after each of ``readings``,
+    as the stored balance will have it once they are folded in; nothing is saved.
+
+    ``readings`` are (timestamp, moisture, threshold) tuples; RAW comes from
+    each one's threshold (None for the field's registered one). Returns one
+    ratio per reading, in order, or None before the field's first reading.
+    """
+    state = SoilWaterBalance.objects.filter(field_id=field_id).first()
+    if state is None:
+        return None
+    ratios = [None] * len(readings)
+    order = sorted(range(len(readings)), key=lambda index: readings[index][0])
+    for index in order:
+        timestamp, moisture, threshold = readings[index]
+        if timestamp >= state.as_of:
+            state.depletion_mm = folded_depletion(state, timestamp, moisture)
+            state.as_of = timestamp
+        raw = readily_available(field_id, state.total_available_mm, threshold)
+        ratios[index] = _ratio(state.depletion_mm, raw)
+    return ratios
+
+
+def depletion_ratio(field_id: str, timestamp: datetime, moisture: float, threshold: float = None):
+    """depletion_ratios for a single reading, or None if the field has no balance yet."""
+    ratios = depletion_ratios(field_id, [(timestamp, moisture, threshold)])
+    return ratios[0] if ratios else None
@@ -0,0 +1,178 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Tuple
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class ForecastEntry:
+    """Forecast periods for one location as (timestamp, precipitation mm) pairs."""
+
+    __slots__ = ("periods", "fetched_at")
+
+    def __init__(self, periods: Tuple[Tuple[datetime, float], ...], fetched_at: float):
+        self.periods = tuple(sorted(periods))
+        self.fetched_at = fetched_at
+
+    def rain_expected(self, now: datetime, horizon: timedelta = timedelta(hours=12)) -> bool:
+        """True if any period in (now, now + horizon] forecasts precipitation."""
+        end = now + horizon
+        for timestamp, amount in self.periods:
+            if timestamp <= now:
+                continue
+            if timestamp > end:
+                break
+            if amount > 0:
+                return True
+        return False
+
+
+class ForecastCache:
+    """
+    TTL-bounded LRU cache of forecasts keyed by location.
+
+    Entries younger than ``ttl`` are served as fresh. Entries up to
+    ``ttl + stale_ttl`` old are still served, but trigger a background
+    refresh (stale-while-revalidate). Callers never wait on the network:
+    a cold miss returns None and schedules a refresh. After a failed refresh
+    (an error or no forecast) the location is neither reloaded nor
+    refreshed again for ``retry_delay`` seconds.
+    """
+
+    def __init__(self, fetch: Callable[[str], Optional[ForecastEntry]],
+                 load: Callable[[str], Optional[ForecastEntry]] = None,
+                 ttl: float = 1800, stale_ttl: float = 10800, max_entries: int = 1024,
+                 retry_delay: float = 60):
+        self.fetch = fetch
+        self.load = load
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.retry_delay = retry_delay
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._failed = {}  # location -> monotonic time of its last failed refresh
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.stored_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+    def get(self, location: str) -> Optional[ForecastEntry]:
+        """Return the cached forecast for ``location`` without blocking on the network."""
+        with self._lock:
+            entry = self._entries.get(location)
+            if entry is not None:
+                self._entries.move_to_end(location)
+
+        if entry is None and self._backing_off(location):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        from_store = False
+        if entry is None and self.load is not None:
+            entry = self.load(location)
+            if entry is not None:
+                from_store = True
+                self.put(location, entry)
+
+        age = time.time() - entry.fetched_at if entry is not None else None
+        if entry is None or age > self.ttl + self.stale_ttl:
+            with self._lock:
+                self.misses += 1
+                self._entries.pop(location, None)
+            self._schedule_refresh(location)
+            return None
+
+        with self._lock:
+            if age > self.ttl:
+                self.stale_hits += 1
+            elif from_store:
+                self.stored_hits += 1
+            else:
+                self.hits += 1
+        if age > self.ttl:
+            self._schedule_refresh(location)
+        return entry
+
+    def put(self, location: str, entry: ForecastEntry):
+        with self._lock:
+            self._entries[location] = entry
+            self._entries.move_to_end(location)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def refresh(self, location: str) -> Optional[ForecastEntry]:
+        """Fetch ``location`` synchronously and store the result."""
+        try:
+            entry = self.fetch(location)
+        except Exception:
+            with self._lock:
+                self._failed[location] = time.monotonic()
+            raise
+        with self._lock:
+            self.refreshes += 1
+            if entry is None:
+                self._failed[location] = time.monotonic()
+            else:
+                self._failed.pop(location, None)
+        if entry is not None:
+            self.put(location, entry)
+        return entry
+
+    def _backing_off(self, location: str) -> bool:
+        with self._lock:
+            failed_at = self._failed.get(location)
+            return failed_at is not None and time.monotonic() - failed_at < self.retry_delay
+
+    def _schedule_refresh(self, location: str):
+        if self._backing_off(location):
+            return
+        with self._lock:
+            if location in self._refreshing:
+                return
+            self._refreshing.add(location)
+        thread = threading.Thread(target=self._refresh_worker, args=(location,), daemon=True)
+        thread.start()
+
+    def _refresh_worker(self, location: str):
+        try:
+            self.refresh(location)
+        except Exception:
+            logger.exception("Forecast refresh for %s failed", location)
+            with self._lock:
+                self.refresh_errors += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(location)
+            # Refresh threads get their own DB connection; don't leak it
+            connections.close_all()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._failed.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "stored_hits": self.stored_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "refreshing": len(self._refreshing),
+            }
@@ -0,0 +1,338 @@
+"""
+FAO-56 Penman-Monteith reference evapotranspiration (ET0) and crop ET (ETc).
+
+The equations work on numpy arrays, so a whole series of days is computed
+in one pass; a single day is the same call with length-1 arrays. Stored
+weather (observed WeatherData and forecast WeatherForecast rows) is
+aggregated to daily Tmin/Tmax/mean humidity/wind and kept in
+DailyEvapotranspiration, one row per location and day. ``update_days``
+recomputes only the days new weather rows touched; the decision path reads
+those rows through a small in-process cache and multiplies by the crop
+coefficient, so nothing is recomputed per reading.
+
+Solar radiation is not measured, so it is estimated from the temperature
+range (FAO-56 eq. 50, the Hargreaves radiation formula).
+"""
+import threading
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Optional
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import geo
+from .models import DailyEvapotranspiration, WeatherData, WeatherForecast
+
+SOLAR_CONSTANT = 0.0820  # MJ m-2 min-1
+STEFAN_BOLTZMANN = 4.903e-9  # MJ K-4 m-2 day-1
+ALBEDO = 0.23  # grass reference crop
+KRS = 0.16  # interior locations; 0.19 for coastal ones
+DEFAULT_WIND_2M = 2.0  # m/s, FAO-56's recommended substitute when wind is missing
+WIND_HEIGHT_M = 10.0  # OpenWeatherMap reports wind at 10 m
+
+# Single crop coefficients by growth stage (generic FAO-56 Table 12 values;
+# development stages sit between the initial and mid-season values)
+CROP_COEFFICIENTS = {
+    "initial": 0.35,
+    "germination": 0.35,
+    "seedling": 0.5,
+    "development": 0.75,
+    "vegetative": 0.75,
+    "mid": 1.15,
+    "mid-season": 1.15,
+    "flowering": 1.15,
+    "fruiting": 1.1,
+    "late": 0.8,
+    "late-season": 0.8,
+    "ripening": 0.7,
+    "maturity": 0.6,
+    "harvest": 0.5,
+}
+DEFAULT_CROP_COEFFICIENT = 1.0
+
+UPDATE_FIELDS = [
+    "temperature_min", "temperature_max", "humidity_mean", "wind_speed", "precipitation",
+    "samples", "observed", "et0", "updated_at",
+]
+
+
+def saturation_vapour_pressure(temperature):
+    """e°(T) in kPa (FAO-56 eq. 11)."""
+    temperature = np.asarray(temperature, dtype=float)
+    return 0.6108 * np.exp(17.27 * temperature / (temperature + 237.3))
+
+
+def wind_at_2m(speed, height: float = WIND_HEIGHT_M):
+    """Convert wind speed measured at ``height`` metres to 2 m (FAO-56 eq. 47)."""
+    return np.asarray(speed, dtype=float) * 4.87 / np.log(67.8 * height - 5.42)
+
+
+def extraterrestrial_radiation(latitude, day_of_year):
+    """Ra in MJ m-2 day-1 (FAO-56 eqs. 21-25)."""
+    phi = np.radians(np.asarray(latitude, dtype=float))
+    j = np.asarray(day_of_year, dtype=float)
+    dr = 1 + 0.033 * np.cos(2 * np.pi / 365 * j)
+    declination = 0.409 * np.sin(2 * np.pi / 365 * j - 1.39)
+    # Clipped so polar day and night stay finite
+    ws = np.arccos(np.clip(-np.tan(phi) * np.tan(declination), -1.0, 1.0))
+    return (24 * 60 / np.pi * SOLAR_CONSTANT * dr
+            * (ws * np.sin(phi) * np.sin(declination) + np.cos(phi) * np.cos(declination) * np.sin(ws)))
+
+
+def et0(temperature_min, temperature_max, humidity_mean, wind_2m, latitude, day_of_year,
+        elevation: float = 0.0, solar_radiation=None):
+    """
+    Daily reference evapotranspiration in mm/day (FAO-56 eq. 6).
+
+    Every argument may be a scalar or an array; arrays broadcast against
+    each other. ``wind_2m`` NaNs are replaced with DEFAULT_WIND_2M and
+    ``solar_radiation`` (MJ m-2 day-1) defaults to the temperature-range
+    estimate. Soil heat flux is taken as zero, as FAO-56 does for days.
+    """
+    tmin = np.asarray(temperature_min, dtype=float)
+    tmax = np.asarray(temperature_max, dtype=float)
+    rh = np.clip(np.asarray(humidity_mean, dtype=float), 0.0, 100.0)
+    u2 = np.asarray(wind_2m, dtype=float)
+    u2 = np.where(np.isnan(u2), DEFAULT_WIND_2M, u2)
+    tmean = (tmin + tmax) / 2
+
+    pressure = 101.3 * ((293 - 0.0065 * elevation) / 293) ** 5.26
+    gamma = 0.000665 * pressure
+    delta = 4098 * saturation_vapour_pressure(tmean) / (tmean + 237.3) ** 2
+    es = (saturation_vapour_pressure(tmax) + saturation_vapour_pressure(tmin)) / 2
+    ea = rh / 100 * es  # eq. 19
+
+    ra = extraterrestrial_radiation(latitude, day_of_year)
+    if solar_radiation is None:
+        rs = KRS * np.sqrt(np.maximum(tmax - tmin, 0.0)) * ra
+    else:
+        rs = np.asarray(solar_radiation, dtype=float)
+    rso = np.maximum((0.75 + 2e-5 * elevation) * ra, 1e-6)
+    # Rs/Rso is at least a/(a+b) = 0.25/0.75 under full overcast
+    relative_rs = np.clip(rs / rso, 0.33, 1.0)
+    rnl = (STEFAN_BOLTZMANN * ((tmax + 273.16) ** 4 + (tmin + 273.16) ** 4) / 2
+           * (0.34 - 0.14 * np.sqrt(ea)) * (1.35 * relative_rs - 0.35))
+    rn = (1 - ALBEDO) * rs - rnl
+
+    numerator = 0.408 * delta * rn + gamma * 900 / (tmean + 273) * u2 * (es - ea)
+    return np.maximum(numerator / (delta + gamma * (1 + 0.34 * u2)), 0.0)
+
+
+def crop_coefficient(crop_stage: Optional[str]) -> float:
+    """Kc for a crop stage name; CROP_COEFFICIENTS in settings overrides or extends the defaults."""
+    if not crop_stage:
+        return DEFAULT_CROP_COEFFICIENT
+    stage = crop_stage.strip().lower()
+    overrides = getattr(settings, "CROP_COEFFICIENTS", {})
+    return overrides.get(stage, CROP_COEFFICIENTS.get(stage, DEFAULT_CROP_COEFFICIENT))
+
+
+def daily_series(days, temperature, humidity, wind_speed, precipitation) -> dict:
+    """
+    Aggregate sub-daily samples to days.
+
+    ``days`` holds each sample's day as an integer (e.g. a date ordinal).
+    Returns arrays, one element per distinct day in ascending order:
+    ``day``, ``temperature_min``/``max``, ``humidity_mean``, ``wind_speed``
+    (mean of the non-NaN samples, NaN if none), ``precipitation`` (sum) and
+    ``samples``.
+    """
+    unique_days, index = np.unique(np.asarray(days, dtype=np.int64), return_inverse=True)
+    n = len(unique_days)
+    temperature = np.asarray(temperature, dtype=float)
+    samples = np.bincount(index, minlength=n)
+
+    tmin = np.full(n, np.inf)
+    tmax = np.full(n, -np.inf)
+    np.minimum.at(tmin, index, temperature)
+    np.maximum.at(tmax, index, temperature)
+
+    wind = np.asarray(wind_speed, dtype=float)
+    has_wind = ~np.isnan(wind)
+    wind_count = np.bincount(index, weights=has_wind, minlength=n)
+    wind_sum = np.bincount(index, weights=np.where(has_wind, wind, 0.0), minlength=n)
+    wind_mean = np.divide(wind_sum, wind_count, out=np.full(n, np.nan), where=wind_count > 0)
+
+    return {
+        "day": unique_days,
+        "temperature_min": tmin,
+        "temperature_max": tmax,
+        "humidity_mean": np.bincount(index, weights=np.asarray(humidity, dtype=float), minlength=n) / samples,
+        "wind_speed": wind_mean,
+        "precipitation": np.bincount(index, weights=np.asarray(precipitation, dtype=float), minlength=n),
+        "samples": samples,
+    }
+
+
+def location_latitude(location: str) -> float:
+    """Latitude used for radiation: the grid cell's centre, else ET_DEFAULT_LATITUDE."""
+    centre = geo.cell_centre(location)
+    if centre is not None:
+        return centre[0]
+    return getattr(settings, "ET_DEFAULT_LATITUDE", 40.7)
+
+
+def _day_bounds(day: date):
+    start = timezone.make_aware(datetime.combine(day, dt_time.min), timezone.get_default_timezone())
+    return start, start + timedelta(days=1)
+
+
+def _local_day(timestamp: datetime) -> int:
+    return timezone.localtime(timestamp).date().toordinal()
+
+
+def touched_days(rows, timestamp_field: str) -> dict:
+    """location -> set of local dates for a batch of weather rows."""
+    days = {}
+    for row in rows:
+        days.setdefault(row.location, set()).add(timezone.localtime(getattr(row, timestamp_field)).date())
+    return days
+
+
+def update_days(days_by_location: dict) -> int:
+    """
+    Recompute DailyEvapotranspiration for the given location/day pairs.
+
+    Each day is rebuilt from all stored weather samples that fall in it:
+    observed WeatherData where present, with forecast periods filling the
+    hours not yet observed. Rows are upserted in one transaction and the
+    in-process lookup cache is invalidated for those locations. Returns the
+    number of day rows written.
+    """
+    elevation = getattr(settings, "ET_ELEVATION_M", 0.0)
+    results = []
+    for location, days in days_by_location.items():
+        if not days:
+            continue
+        start, _ = _day_bounds(min(days))
+        _, end = _day_bounds(max(days))
+        wanted = {day.toordinal() for day in days}
+
+        observed = [
+            row for row in WeatherData.objects
+            .filter(location=location, timestamp__gte=start, timestamp__lt=end)
+            .values_list("timestamp", "temperature_c", "humidity", "wind_speed", "precipitation")
+            if _local_day(row[0]) in wanted
+        ]
+        # Observed samples win: forecast periods only cover hours after the last observation of the day
+        last_observed = {}
+        for row in observed:
+            day = _local_day(row[0])
+            last_observed[day] = max(last_observed.get(day, row[0]), row[0])
+
+        def unobserved(timestamp):
+            day = _local_day(timestamp)
+            return day in wanted and (day not in last_observed or timestamp > last_observed[day])
+
+        forecast = [
+            row for row in WeatherForecast.objects
+            .filter(location=location, forecast_timestamp__gte=start, forecast_timestamp__lt=end)
+            .values_list("forecast_timestamp", "temperature_c", "humidity", "wind_speed", "precipitation_amount")
+            if unobserved(row[0])
+        ]
+        samples = observed + forecast
+        if not samples:
+            continue
+
+        series = daily_series(
+            days=[_local_day(row[0]) for row in samples],
+            temperature=[row[1] for row in samples],
+            humidity=[row[2] for row in samples],
+            wind_speed=[np.nan if row[3] is None else row[3] for row in samples],
+            precipitation=[row[4] or 0.0 for row in samples],
+        )
+        day_dates = [date.fromordinal(int(day)) for day in series["day"]]
+        values = et0(
+            series["temperature_min"], series["temperature_max"], series["humidity_mean"],
+            wind_at_2m(series["wind_speed"]), location_latitude(location),
+            [day.timetuple().tm_yday for day in day_dates], elevation=elevation,
+        )
+        now = timezone.now()
+        for i, day in enumerate(day_dates):
+            wind = series["wind_speed"][i]
+            results.append(DailyEvapotranspiration(
+                location=location,
+                date=day,
+                temperature_min=float(series["temperature_min"][i]),
+                temperature_max=float(series["temperature_max"][i]),
+                humidity_mean=float(series["humidity_mean"][i]),
+                wind_speed=None if np.isnan(wind) else float(wind),
+                precipitation=float(series["precipitation"][i]),
+                samples=int(series["samples"][i]),
+                observed=int(series["day"][i]) in last_observed,
+                et0=round(float(values[i]), 3),
+                updated_at=now,
+            ))
+
+    if results:
+        with transaction.atomic():
+            DailyEvapotranspiration.objects.bulk_create(
+                results,
+                update_conflicts=True,
+                unique_fields=["location", "date"],
+                update_fields=UPDATE_FIELDS,
+            )
+        _cache.invalidate({row.location for row in results})
+    return len(results)
+
+
+class DailyEtCache:
+    """
+    ET0 per (location, day), read from DailyEvapotranspiration and kept for
+    ``ttl`` seconds, including misses. ``update_days`` invalidates a
+    location in this process; other processes pick changes up after ``ttl``.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, location: str, day: date) -> Optional[float]:
+        key = (location, day)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                return entry[0]
+        value = (
+            DailyEvapotranspiration.objects.filter(location=location, date=day)
+            .values_list("et0", flat=True).first()
+        )
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (value, now)
+        return value
+
+    def invalidate(self, locations=None):
+        with self._lock:
+            if locations is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] in locations]:
+                del self._entries[key]
+
+
+_cache = DailyEtCache(ttl=getattr(settings, "ET_CACHE_SECONDS", 300))
+
+
+def reference_et(location: str, day: date = None) -> Optional[float]:
+    """Stored ET0 (mm/day) for a location and day (default today), or None."""
+    return _cache.get(location or settings.WEATHER_LOCATION, day or timezone.localdate())
+
+
+def crop_et(location: str, crop_stage: Optional[str] = None, day: date = None) -> Optional[float]:
+    """ETc = Kc x ET0 in mm/day, or None when no ET0 is stored for the day."""
+    value = reference_et(location, day)
+    if value is None:
+        return None
+    return crop_coefficient(crop_stage) * value
+
+
+def clear_cache():
+    _cache.invalidate()
@@ -0,0 +1,72 @@
+"""
+Geohash grid cells used to share one forecast between nearby fields.
+
+A forecast location is either a place name (sent to the API as ``q``) or a
+cell key ``"geo:<geohash>"`` (sent as the cell centre's ``lat``/``lon``).
+Precision 5 cells are about 4.9 x 4.9 km, finer than the weather model grid.
+"""
+from typing import Optional, Tuple
+
+CELL_PREFIX = "geo:"
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {char: index for index, char in enumerate(_BASE32)}
+
+
+def encode(latitude: float, longitude: float, precision: int = 5) -> str:
+    """Geohash of a point, ``precision`` characters long."""
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("Coordinates out of range")
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True  # Bits alternate longitude, latitude
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= mid:
+            value |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def decode(geohash: str) -> Tuple[float, float]:
+    """Centre (latitude, longitude) of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            mid = (interval[0] + interval[1]) / 2
+            if value >> shift & 1:
+                interval[0] = mid
+            else:
+                interval[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+
+def cell_key(latitude: float, longitude: float, precision: int = 5) -> str:
+    return f"{CELL_PREFIX}{encode(latitude, longitude, precision)}"
+
+
+def cell_centre(location: str) -> Optional[Tuple[float, float]]:
+    """Centre of a ``geo:`` cell key, or None for a place name."""
+    if not location or not location.startswith(CELL_PREFIX):
+        return None
+    try:
+        return decode(location[len(CELL_PREFIX):])
+    except KeyError:
+        return None
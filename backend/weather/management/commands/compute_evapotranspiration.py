@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from weather import evapotranspiration
+from weather.models import WeatherData, WeatherForecast
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild DailyEvapotranspiration from stored weather. New weather rows keep it current on "
+        "their own; run this after importing history or changing ET settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--location", action="append", default=[],
+                            help="Location to rebuild (repeatable; default every location with weather)")
+        parser.add_argument("--days", type=int, default=30, help="Rebuild this many days back")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        days = {today + timedelta(days=offset) for offset in range(-options["days"], 6)}
+        locations = options["location"] or sorted(
+            set(WeatherData.objects.order_by().values_list("location", flat=True).distinct())
+            | set(WeatherForecast.objects.order_by().values_list("location", flat=True).distinct())
+        )
+        written = evapotranspiration.update_days({location: days for location in locations})
+        self.stdout.write(self.style.SUCCESS(f"Stored {written} daily ET rows for {len(locations)} locations"))
@@ -0,0 +1,61 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from sensors.fields import forecast_location
+from sensors.models import SensorReading
+from weather.prefetch import prefetch_forecasts
+
+
+class Command(BaseCommand):
+    help = "Prefetch forecasts for every location in use and upsert them into WeatherForecast."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--location", action="append", default=[],
+                            help="Extra location to refresh (repeatable)")
+        parser.add_argument("--active-days", type=int, default=7,
+                            help="Include fields that reported within this many days")
+        parser.add_argument("--workers", type=int, default=settings.WEATHER_PREFETCH_WORKERS)
+        parser.add_argument("--rate", type=float, default=settings.WEATHER_API_RATE_PER_SECOND,
+                            help="Weather API requests per second across all workers")
+        parser.add_argument("--burst", type=float, default=5)
+        parser.add_argument("--current", action="store_true", help="Also store current weather (WeatherData)")
+        parser.add_argument("--loop", type=int, default=0, metavar="SECONDS",
+                            help="Keep running, refreshing every SECONDS (default: refresh once)")
+
+    def locations(self, options) -> list:
+        """
+        Locations the decision path looks up: the grid cell of each active
+        field, plus the default location. Nearby fields share a cell, so this
+        is one request per cell rather than per field.
+        """
+        since = timezone.now() - timedelta(days=options["active_days"])
+        fields = (
+            SensorReading.objects.filter(timestamp__gte=since)
+            .order_by().values_list("field_id", flat=True).distinct()
+        )
+        cells = [forecast_location(field_id) for field_id in fields]
+        return list(dict.fromkeys([settings.WEATHER_LOCATION, *options["location"], *cells]))
+
+    def handle(self, *args, **options):
+        if not settings.WEATHER_API_KEY:
+            self.stderr.write("WEATHER_API_KEY is not set; requests will return nothing")
+        while True:
+            started = time.monotonic()
+            stats = prefetch_forecasts(
+                self.locations(options),
+                workers=options["workers"],
+                rate=options["rate"],
+                burst=options["burst"],
+                current=options["current"],
+            )
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(
+                f"Refreshed {stats['fetched']}/{stats['locations']} locations in {elapsed:.1f}s "
+                f"({stats['forecast_rows']} forecast rows, {stats['current_rows']} current, {stats['failed']} failed)"
+            ))
+            if not options["loop"]:
+                return
+            time.sleep(max(0.0, options["loop"] - elapsed))
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeatherData',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=100)),
+                ('timestamp', models.DateTimeField()),
+                ('temperature_c', models.FloatField()),
+                ('humidity', models.FloatField()),
+                ('pressure', models.FloatField(blank=True, null=True)),
+                ('wind_speed', models.FloatField(blank=True, null=True)),
+                ('precipitation', models.FloatField(default=0.0)),
+                ('weather_description', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['location', '-timestamp'], name='weather_wea_locatio_819d67_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WeatherForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=100)),
+                ('forecast_timestamp', models.DateTimeField()),
+                ('temperature_c', models.FloatField()),
+                ('humidity', models.FloatField()),
+                ('precipitation_probability', models.FloatField(default=0.0)),
+                ('precipitation_amount', models.FloatField(default=0.0)),
+                ('weather_description', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-forecast_timestamp'],
+                'indexes': [models.Index(fields=['location', '-forecast_timestamp'], name='weather_wea_locatio_a09af8_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+def drop_duplicate_periods(apps, schema_editor):
+    """Keep the newest row of each (location, forecast_timestamp) before adding the constraint."""
+    WeatherForecast = apps.get_model("weather", "WeatherForecast")
+    keep = (
+        WeatherForecast.objects.values("location", "forecast_timestamp")
+        .annotate(newest=models.Max("id"))
+        .values_list("newest", flat=True)
+    )
+    WeatherForecast.objects.exclude(id__in=list(keep)).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("weather", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_periods, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="weatherforecast",
+            constraint=models.UniqueConstraint(
+                fields=("location", "forecast_timestamp"), name="weather_forecast_period_unique"
+            ),
+        ),
+    ]
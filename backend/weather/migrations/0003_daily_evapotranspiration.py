@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('weather', '0002_forecast_period_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weatherforecast',
+            name='wind_speed',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='DailyEvapotranspiration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(max_length=100)),
+                ('date', models.DateField()),
+                ('temperature_min', models.FloatField()),
+                ('temperature_max', models.FloatField()),
+                ('humidity_mean', models.FloatField()),
+                ('wind_speed', models.FloatField(blank=True, null=True)),
+                ('precipitation', models.FloatField(default=0.0)),
+                ('samples', models.PositiveIntegerField(default=0)),
+                ('observed', models.BooleanField(default=False, help_text='Built at least partly from observed weather')),
+                ('et0', models.FloatField(help_text='Reference evapotranspiration, mm/day')),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('location', 'date'), name='daily_et_location_date_unique')],
+            },
+        ),
+    ]
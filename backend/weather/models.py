@@ -29,6 +29,7 @@ class WeatherForecast(models.Model):
     humidity = models.FloatField()
     precipitation_probability = models.FloatField(default=0.0)  # percentage
     precipitation_amount = models.FloatField(default=0.0)  # mm
+    wind_speed = models.FloatField(null=True, blank=True)  # m/s at 10 m
     weather_description = models.CharField(max_length=100, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -37,3 +38,31 @@ class WeatherForecast(models.Model):
         indexes = [
             models.Index(fields=["location", "-forecast_timestamp"]),
         ]
+        constraints = [
+            # One row per period, so refreshes can upsert
+            models.UniqueConstraint(fields=["location", "forecast_timestamp"], name="weather_forecast_period_unique"),
+        ]
+
+
+class DailyEvapotranspiration(models.Model):
+    """Daily weather summary and FAO-56 reference ET0 for one forecast location."""
+    location = models.CharField(max_length=100)
+    date = models.DateField()
+    temperature_min = models.FloatField()
+    temperature_max = models.FloatField()
+    humidity_mean = models.FloatField()
+    wind_speed = models.FloatField(null=True, blank=True)  # m/s at 10 m; null = none reported
+    precipitation = models.FloatField(default=0.0)  # mm
+    samples = models.PositiveIntegerField(default=0)
+    observed = models.BooleanField(default=False, help_text="Built at least partly from observed weather")
+    et0 = models.FloatField(help_text="Reference evapotranspiration, mm/day")
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["-date"]
+        constraints = [
+            models.UniqueConstraint(fields=["location", "date"], name="daily_et_location_date_unique"),
+        ]
+
+    def __str__(self):
+        return f"{self.location} - {self.date}: {self.et0:.2f} mm"
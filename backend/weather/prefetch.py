@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .services import WeatherService
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: ``rate`` tokens per second, bursts up to
+    ``capacity``. ``acquire`` blocks until a token is available.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self.sleep(wait)
+
+
+def prefetch_forecasts(locations, workers: int = 4, rate: float = 1.0, burst: float = 5,
+                       current: bool = False, batch_size: int = 50) -> dict:
+    """
+    Fetch forecasts (and optionally current weather) for every location.
+
+    API calls run on a bounded thread pool and share one token bucket, so
+    ``rate`` caps requests per second across all workers. Database writes
+    stay on the calling thread: forecasts are upserted every ``batch_size``
+    locations in one transaction. Returns counters for reporting.
+    """
+    bucket = TokenBucket(rate, burst)
+    stats = {"locations": 0, "fetched": 0, "failed": 0, "forecast_rows": 0, "current_rows": 0}
+
+    def fetch(location):
+        bucket.acquire()
+        forecast = WeatherService.fetch_forecast(location)
+        weather = None
+        if current:
+            bucket.acquire()
+            weather = WeatherService.fetch_current_weather(location)
+        return location, forecast, weather
+
+    pending_forecasts = {}
+    pending_current = []
+
+    def write():
+        stats["forecast_rows"] += WeatherService.upsert_forecasts(pending_forecasts)
+        stats["current_rows"] += WeatherService.save_weather_rows(pending_current)
+        pending_forecasts.clear()
+        pending_current.clear()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="forecast-prefetch") as pool:
+        futures = [pool.submit(fetch, location) for location in dict.fromkeys(locations)]
+        for future in as_completed(futures):
+            location, forecast, weather = future.result()
+            stats["locations"] += 1
+            try:
+                if not forecast or "list" not in forecast:
+                    raise ValueError("no forecast")
+                pending_forecasts[location] = WeatherService.forecast_rows(location, forecast)
+                if weather:
+                    pending_current.append(WeatherService.current_weather_row(weather, location))
+                stats["fetched"] += 1
+            except (KeyError, IndexError, TypeError, ValueError):
+                stats["failed"] += 1
+            if len(pending_forecasts) >= batch_size:
+                write()
+    write()
+    return stats
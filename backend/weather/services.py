@@ -1,11 +1,55 @@
+import time
 import requests
-from datetime import datetime
+from datetime import datetime, timedelta, timezone as dt_timezone
 from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from irrigation_api.instrumentation import outbound
+from . import evapotranspiration, geo
+from .cache import ForecastCache, ForecastEntry
 from .models import WeatherData, WeatherForecast
+from .signals import weather_saved
+
+
+# Refreshed on upsert; created_at doubles as the fetch time for the cache
+FORECAST_UPDATE_FIELDS = [
+    "temperature_c", "humidity", "precipitation_probability", "precipitation_amount",
+    "wind_speed", "weather_description", "created_at",
+]
 
 
 class WeatherService:
     BASE_URL = "https://api.openweathermap.org/data/2.5"
+    _forecast_cache = None
+
+    @classmethod
+    def forecast_cache(cls) -> ForecastCache:
+        """Process-wide forecast cache, created on first use from settings."""
+        if cls._forecast_cache is None:
+            # With WEATHER_LOCAL_ONLY, refresh_forecasts owns the API calls and
+            # the cache only ever re-reads the rows it stored
+            local_only = getattr(settings, "WEATHER_LOCAL_ONLY", False)
+            cls._forecast_cache = ForecastCache(
+                fetch=cls.load_stored_forecast if local_only else cls.refresh_forecast,
+                load=cls.load_stored_forecast,
+                ttl=getattr(settings, "WEATHER_FORECAST_TTL_SECONDS", 1800),
+                stale_ttl=getattr(settings, "WEATHER_FORECAST_STALE_SECONDS", 10800),
+                max_entries=getattr(settings, "WEATHER_FORECAST_CACHE_SIZE", 1024),
+                retry_delay=getattr(settings, "WEATHER_FORECAST_RETRY_SECONDS", 60),
+            )
+        return cls._forecast_cache
+
+    @classmethod
+    def base_url(cls) -> str:
+        return getattr(settings, "WEATHER_API_BASE_URL", "") or cls.BASE_URL
+
+    @classmethod
+    def location_params(cls, location: str) -> dict:
+        """API query for a location: a grid cell's centre, or a place name."""
+        centre = geo.cell_centre(location)
+        if centre is None:
+            return {"q": location}
+        return {"lat": round(centre[0], 4), "lon": round(centre[1], 4)}
 
     @classmethod
     def fetch_current_weather(cls, location: str = None) -> dict:
@@ -14,16 +58,17 @@ class WeatherService:
             return {}
         
         location = location or settings.WEATHER_LOCATION
-        url = f"{cls.BASE_URL}/weather"
+        url = f"{cls.base_url()}/weather"
         params = {
-            "q": location,
+            **cls.location_params(location),
             "appid": settings.WEATHER_API_KEY,
             "units": "metric"
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
+            with outbound("openweathermap.weather"):
+                response = requests.get(url, params=params, timeout=10)
+                response.raise_for_status()
             return response.json()
         except requests.RequestException:
             return {}
@@ -35,16 +80,17 @@ class WeatherService:
             return {}
         
         location = location or settings.WEATHER_LOCATION
-        url = f"{cls.BASE_URL}/forecast"
+        url = f"{cls.base_url()}/forecast"
         params = {
-            "q": location,
+            **cls.location_params(location),
             "appid": settings.WEATHER_API_KEY,
             "units": "metric"
         }
         
         try:
-            response = requests.get(url, params=params, timeout=10)
-            response.raise_for_status()
+            with outbound("openweathermap.forecast"):
+                response = requests.get(url, params=params, timeout=10)
+                response.raise_for_status()
             return response.json()
         except requests.RequestException:
             return {}
@@ -55,10 +101,29 @@ class WeatherService:
         data = cls.fetch_current_weather(location)
         if not data:
             return None
-        
-        weather_data = WeatherData.objects.create(
-            location=data["name"],
-            timestamp=datetime.fromtimestamp(data["dt"]),
+        weather_data = cls.current_weather_row(data)
+        cls.save_weather_rows([weather_data])
+        return weather_data
+
+    @classmethod
+    def save_weather_rows(cls, rows: list) -> int:
+        """
+        Insert observed weather rows, refresh daily ET for the days they fall
+        in and send ``weather_saved`` (which credits rain to field water balances).
+        """
+        if not rows:
+            return 0
+        WeatherData.objects.bulk_create(rows)
+        evapotranspiration.update_days(evapotranspiration.touched_days(rows, "timestamp"))
+        weather_saved.send(sender=WeatherData, rows=rows)
+        return len(rows)
+
+    @classmethod
+    def current_weather_row(cls, data: dict, location: str = None) -> WeatherData:
+        """Unsaved WeatherData for a current-weather API response."""
+        return WeatherData(
+            location=location or data["name"],
+            timestamp=datetime.fromtimestamp(data["dt"], tz=dt_timezone.utc),
             temperature_c=data["main"]["temp"],
             humidity=data["main"]["humidity"],
             pressure=data["main"].get("pressure"),
@@ -66,17 +131,94 @@ class WeatherService:
             precipitation=data.get("rain", {}).get("1h", 0) + data.get("snow", {}).get("1h", 0),
             weather_description=data["weather"][0]["description"]
         )
-        return weather_data
+
+    @classmethod
+    def forecast_rows(cls, location: str, data: dict) -> list:
+        """Unsaved WeatherForecast rows for a forecast API response."""
+        rows = []
+        for item in data.get("list", []):
+            main = item.get("main", {})
+            weather = item.get("weather") or [{}]
+            rows.append(WeatherForecast(
+                location=location,
+                forecast_timestamp=datetime.fromtimestamp(item["dt"], tz=dt_timezone.utc),
+                temperature_c=main.get("temp", 0.0),
+                humidity=main.get("humidity", 0.0),
+                precipitation_probability=item.get("pop", 0) * 100,
+                precipitation_amount=item.get("rain", {}).get("3h", 0),
+                wind_speed=item.get("wind", {}).get("speed"),
+                weather_description=weather[0].get("description", ""),
+            ))
+        return rows
+
+    @classmethod
+    def upsert_forecasts(cls, rows_by_location: dict) -> int:
+        """
+        Store fresh forecast periods for many locations in one transaction.
+        Periods are upserted on (location, forecast_timestamp); later periods
+        the new forecast no longer contains are removed, and daily ET is
+        recomputed for the days covered. Returns rows written.
+        """
+        rows = [row for location_rows in rows_by_location.values() for row in location_rows]
+        if not rows:
+            return 0
+        with transaction.atomic():
+            WeatherForecast.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["location", "forecast_timestamp"],
+                update_fields=FORECAST_UPDATE_FIELDS,
+            )
+            for location, location_rows in rows_by_location.items():
+                if not location_rows:
+                    continue
+                timestamps = [row.forecast_timestamp for row in location_rows]
+                (WeatherForecast.objects
+                    .filter(location=location, forecast_timestamp__gte=min(timestamps))
+                    .exclude(forecast_timestamp__in=timestamps)
+                    .delete())
+        evapotranspiration.update_days(evapotranspiration.touched_days(rows, "forecast_timestamp"))
+        return len(rows)
+
+    @classmethod
+    def save_forecast(cls, location: str, data: dict) -> list:
+        """Replace stored forecast periods for location with a fresh API response."""
+        rows = cls.forecast_rows(location, data)
+        cls.upsert_forecasts({location: rows})
+        return rows
+
+    @classmethod
+    def refresh_forecast(cls, location: str) -> ForecastEntry:
+        """Fetch the forecast for location, persist it and return a cache entry."""
+        data = cls.fetch_forecast(location)
+        if not data or "list" not in data:
+            return None
+        rows = cls.save_forecast(location, data)
+        periods = [(row.forecast_timestamp, row.precipitation_amount) for row in rows]
+        return ForecastEntry(periods, fetched_at=time.time())
+
+    @classmethod
+    def load_stored_forecast(cls, location: str) -> ForecastEntry:
+        """Build a cache entry from stored forecast rows, if any are still current."""
+        since = timezone.now() - timedelta(hours=3)
+        rows = list(
+            WeatherForecast.objects
+            .filter(location=location, forecast_timestamp__gte=since)
+            .values_list("forecast_timestamp", "precipitation_amount", "created_at")
+        )
+        if not rows:
+            return None
+        fetched_at = max(created_at for _, _, created_at in rows).timestamp()
+        return ForecastEntry([(ts, amount) for ts, amount, _ in rows], fetched_at=fetched_at)
 
     @classmethod
     def will_rain_today(cls, location: str = None) -> bool:
-        """Check if rain is expected in the next 12 hours."""
-        forecast_data = cls.fetch_forecast(location)
-        if not forecast_data or "list" not in forecast_data:
+        """Check if rain is expected in the next 12 hours.
+
+        Served from the forecast cache; never waits on the weather API.
+        """
+        location = location or settings.WEATHER_LOCATION
+        entry = cls.forecast_cache().get(location)
+        if entry is None:
             return False
-        
-        # Check next 4 forecast periods (12 hours)
-        for item in forecast_data["list"][:4]:
-            if item.get("rain", {}).get("3h", 0) > 0:
-                return True
-        return False
+        return entry.rain_expected(timezone.now())
@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Sent after observed weather is stored, with rows=[WeatherData, ...]
+weather_saved = Signal()
@@ -0,0 +1,254 @@
+import io
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from sensors import fields
+from sensors.models import Field, SensorReading
+from . import evapotranspiration, geo
+from .cache import ForecastCache, ForecastEntry
+from .models import DailyEvapotranspiration, WeatherData, WeatherForecast
+from .prefetch import TokenBucket
+from .services import WeatherService
+
+
+class ForecastCacheTests(TestCase):
+    def test_fresh_stale_and_expired(self):
+        refreshed = threading.Event()
+
+        def fetch(location):
+            refreshed.set()
+            return None
+
+        cache = ForecastCache(fetch=fetch, ttl=60, stale_ttl=60)
+        cache.put("farm", ForecastEntry([], fetched_at=time.time()))
+        self.assertIsNotNone(cache.get("farm"))
+        self.assertFalse(refreshed.is_set())
+
+        cache.put("farm", ForecastEntry([], fetched_at=time.time() - 90))
+        self.assertIsNotNone(cache.get("farm"))
+        self.assertTrue(refreshed.wait(5))
+
+        cache.put("farm", ForecastEntry([], fetched_at=time.time() - 300))
+        self.assertIsNone(cache.get("farm"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["stale_hits"], stats["misses"]), (1, 1, 1))
+
+    def test_refresh_failures_are_logged_and_counted(self):
+        def fetch(location):
+            raise ValueError("unexpected payload")
+
+        cache = ForecastCache(fetch=fetch)
+        with self.assertLogs("weather.cache", level="ERROR") as logs:
+            self.assertIsNone(cache.get("farm"))
+            for _ in range(50):
+                if cache.stats()["refresh_errors"]:
+                    break
+                time.sleep(0.05)
+        self.assertEqual(cache.stats()["refresh_errors"], 1)
+        self.assertIn("Forecast refresh for farm failed", logs.output[0])
+
+    def test_failed_refresh_backs_off(self):
+        calls = []
+
+        def fetch(location):
+            calls.append(location)
+            return None
+
+        loads = []
+        cache = ForecastCache(fetch=fetch, load=lambda location: loads.append(location), retry_delay=60)
+        cache.refresh("farm")
+        with mock.patch.object(cache, "_schedule_refresh", wraps=cache._schedule_refresh) as schedule:
+            for _ in range(3):
+                self.assertIsNone(cache.get("farm"))
+        # Neither reloaded from the store nor refreshed again until retry_delay passes
+        self.assertEqual((calls, loads), (["farm"], []))
+        self.assertEqual(schedule.call_count, 0)
+        self.assertEqual(cache.stats()["misses"], 3)
+
+    def test_lru_eviction(self):
+        cache = ForecastCache(fetch=lambda location: None, max_entries=2)
+        for location in ("a", "b", "c"):
+            cache.put(location, ForecastEntry([], fetched_at=time.time()))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_will_rain_reads_stored_forecast(self):
+        now = timezone.now()
+        WeatherForecast.objects.create(
+            location="stored-farm", forecast_timestamp=now + timedelta(hours=3),
+            temperature_c=18, humidity=90, precipitation_amount=2.5,
+        )
+        WeatherService._forecast_cache = None
+        self.addCleanup(setattr, WeatherService, "_forecast_cache", None)
+        with mock.patch("weather.services.requests.get") as get:
+            self.assertTrue(WeatherService.will_rain_today("stored-farm"))
+            get.assert_not_called()
+        self.assertEqual(WeatherService.forecast_cache().stats()["stored_hits"], 1)
+
+
+class StubWeatherAPI(ThreadingHTTPServer):
+    """Local stand-in for the OpenWeatherMap endpoints used by WeatherService."""
+
+    def __init__(self):
+        self.forecast_periods = []  # (epoch seconds, rain mm)
+        self.requests = []
+        super().__init__(("127.0.0.1", 0), StubWeatherHandler)
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+
+class StubWeatherHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        location = query["q"][0] if "q" in query else f"{query['lat'][0]},{query['lon'][0]}"
+        self.server.requests.append((url.path, location))
+        if url.path == "/forecast":
+            body = {"list": [
+                {"dt": dt, "main": {"temp": 20, "humidity": 60}, "rain": {"3h": rain}, "weather": [{"description": "x"}]}
+                for dt, rain in self.server.forecast_periods
+            ]}
+        elif url.path == "/weather":
+            body = {"name": location, "dt": int(time.time()), "main": {"temp": 21, "humidity": 55},
+                    "weather": [{"description": "clear"}]}
+        else:
+            self.send_error(404)
+            return
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ForecastPrefetchTests(TestCase):
+    def setUp(self):
+        fields.clear()
+        self.api = StubWeatherAPI()
+        self.addCleanup(self.api.server_close)
+        self.addCleanup(self.api.shutdown)
+        hour = 3600 * (int(time.time()) // 3600)
+        self.periods = [hour + 3600 * 3 * i for i in range(1, 5)]
+
+    def refresh(self, *args):
+        out = io.StringIO()
+        with override_settings(WEATHER_API_KEY="test", WEATHER_API_BASE_URL=self.api.url, WEATHER_LOCATION="default"):
+            call_command("refresh_forecasts", "--rate", "100", *args, stdout=out)
+        return out.getvalue()
+
+    def test_refresh_upserts_forecasts_for_active_fields(self):
+        # Two neighbouring fields share a grid cell; one without coordinates uses the default location
+        Field.objects.create(field_id="f1", latitude=48.1371, longitude=11.5754)
+        Field.objects.create(field_id="f2", latitude=48.1380, longitude=11.5760)
+        for field_id in ("f1", "f2", "f3"):
+            SensorReading.objects.create(field_id=field_id, timestamp=timezone.now(), moisture=30)
+        cell = geo.cell_key(48.1371, 11.5754)
+        self.api.forecast_periods = [(dt, 0) for dt in self.periods]
+        self.assertIn("Refreshed 3/3 locations", self.refresh("--location", "extra", "--current"))
+        self.assertEqual(WeatherForecast.objects.filter(location=cell).count(), 4)
+        self.assertEqual(sorted(WeatherData.objects.values_list("location", flat=True)), ["default", "extra", cell])
+        # The cell is requested by its centre's coordinates
+        self.assertEqual(sum(1 for path, _ in self.api.requests if path == "/forecast"), 3)
+        self.assertIn(("/forecast", "48.1421,11.5796"), self.api.requests)
+
+        # Second run: periods are updated in place, and ones the new forecast dropped are removed
+        self.api.forecast_periods = [(dt, 2.0) for dt in self.periods[:3]]
+        self.refresh()
+        rows = WeatherForecast.objects.filter(location=cell)
+        self.assertEqual(rows.count(), 3)
+        self.assertTrue(all(row.precipitation_amount == 2.0 for row in rows))
+        self.assertEqual(WeatherForecast.objects.filter(location="extra").count(), 4)
+
+    def test_local_only_decisions_never_call_the_api(self):
+        WeatherForecast.objects.create(location="f1", forecast_timestamp=timezone.now() + timedelta(hours=2),
+                                       temperature_c=18, humidity=90, precipitation_amount=1)
+        WeatherService._forecast_cache = None
+        self.addCleanup(setattr, WeatherService, "_forecast_cache", None)
+        with override_settings(WEATHER_LOCAL_ONLY=True, WEATHER_API_KEY="test", WEATHER_API_BASE_URL=self.api.url):
+            self.assertTrue(WeatherService.will_rain_today("f1"))
+            # The cold miss's background refresh would outlive the test
+            with mock.patch("weather.cache.ForecastCache._schedule_refresh") as schedule:
+                self.assertFalse(WeatherService.will_rain_today("unknown"))
+            schedule.assert_called_once_with("unknown")
+            # A refresh re-reads stored rows instead of calling the API
+            WeatherService.forecast_cache().refresh("f1")
+        self.assertEqual(self.api.requests, [])
+
+
+class TokenBucketTests(TestCase):
+    def test_bursts_then_waits_for_refill(self):
+        now = [0.0]
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            bucket.acquire()
+        self.assertEqual(sleeps, [0.5])
+
+
+class EvapotranspirationTests(TestCase):
+    def setUp(self):
+        evapotranspiration.clear_cache()
+
+    def test_matches_fao56_example_and_vectorizes(self):
+        # FAO-56 Example 18: Brussels, 6 July, measured radiation -> 3.9 mm/day
+        es = (evapotranspiration.saturation_vapour_pressure(21.5) + evapotranspiration.saturation_vapour_pressure(12.3)) / 2
+        value = evapotranspiration.et0(12.3, 21.5, 1.409 / es * 100, 2.078, 50.8, 187,
+                                       elevation=100, solar_radiation=22.07)
+        self.assertAlmostEqual(float(value), 3.9, delta=0.05)
+
+        days = [(12.3, 21.5, 70, 2.0, 50.8, 187), (25, 35, 40, float("nan"), 10, 100), (-2, 4, 90, 5.0, 60, 10)]
+        batch = evapotranspiration.et0(*np.array(days).T)
+        for row, expected in zip(days, batch):
+            self.assertEqual(float(evapotranspiration.et0(*row)), expected)
+
+    def test_daily_rows_follow_new_weather(self):
+        location = geo.cell_key(48.1371, 11.5754)
+        day = timezone.localdate() - timedelta(days=1)
+        start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        WeatherService.upsert_forecasts({location: [
+            WeatherForecast(location=location, forecast_timestamp=start + timedelta(hours=h),
+                            temperature_c=t, humidity=60, precipitation_amount=1.0, wind_speed=3.0)
+            for h, t in ((3, 12.0), (9, 20.0), (15, 26.0), (21, 16.0), (27, 14.0))
+        ]})
+        rows = {row.date: row for row in DailyEvapotranspiration.objects.filter(location=location)}
+        self.assertEqual(sorted(rows), [day, day + timedelta(days=1)])
+        first = rows[day]
+        self.assertEqual((first.temperature_min, first.temperature_max, first.samples), (12.0, 26.0, 4))
+        self.assertEqual(first.precipitation, 4.0)
+        self.assertFalse(first.observed)
+        self.assertAlmostEqual(evapotranspiration.reference_et(location, day), first.et0)
+
+        # An observation replaces the forecast periods before it, for that day only
+        WeatherService.save_weather_rows([WeatherData(
+            location=location, timestamp=start + timedelta(hours=16), temperature_c=31.0, humidity=30, wind_speed=3.0)])
+        updated = DailyEvapotranspiration.objects.get(location=location, date=day)
+        self.assertEqual((updated.temperature_min, updated.temperature_max, updated.samples), (16.0, 31.0, 2))
+        self.assertTrue(updated.observed)
+        self.assertGreater(evapotranspiration.reference_et(location, day), first.et0)
+        self.assertEqual(DailyEvapotranspiration.objects.get(location=location, date=day + timedelta(days=1)).updated_at,
+                         rows[day + timedelta(days=1)].updated_at)
+
+        self.assertAlmostEqual(evapotranspiration.crop_et(location, "Flowering", day), 1.15 * updated.et0)
+        self.assertIsNone(evapotranspiration.crop_et("elsewhere", "flowering", day))
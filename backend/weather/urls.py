@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import WeatherDataView
+from .views import WeatherDataView, ForecastCacheStatsView
 
 urlpatterns = [
     path("current/", WeatherDataView.as_view(), name="current-weather"),
+    path("forecast-cache/", ForecastCacheStatsView.as_view(), name="forecast-cache-stats"),
 ]
@@ -9,3 +9,9 @@ class WeatherDataView(APIView):
         location = request.GET.get('location')
         weather_data = WeatherService.fetch_current_weather(location)
         return Response(weather_data)
+
+
+class ForecastCacheStatsView(APIView):
+    def get(self, request):
+        """Get forecast cache hit/miss counters."""
+        return Response(WeatherService.forecast_cache().stats())
@@ -7,10 +7,19 @@ import './styles.css';
 
 const API_BASE = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 
+// Chart ranges and the rollup bucket width used for each
+const CHART_RANGES = {
+  '24h': { hours: 24, bucket: '5m' },
+  '7d': { hours: 24 * 7, bucket: '1h' },
+  '30d': { hours: 24 * 30, bucket: '1h' },
+};
+
 export default function App() {
+  const [chartRange, setChartRange] = useState('24h');
   const [systemData, setSystemData] = useState({
     latest: null,
     chartData: [],
+    waterBalance: null,
     activeEvents: [],
     loading: true,
     error: null
@@ -19,19 +28,35 @@ export default function App() {
   // Fetch all system data
   const fetchSystemData = async () => {
     try {
-      const [latestRes, chartRes, eventsRes] = await Promise.all([
+      const [latestRes, eventsRes] = await Promise.all([
         fetch(`${API_BASE}/api/readings/latest/`),
-        fetch(`${API_BASE}/api/readings/chart-data/`),
         fetch(`${API_BASE}/api/irrigation-events/active/`)
       ]);
 
       const latest = latestRes.ok ? await latestRes.json() : null;
-      const chartData = chartRes.ok ? await chartRes.json() : [];
       const activeEvents = eventsRes.ok ? await eventsRes.json() : [];
 
+      let chartData = [];
+      let waterBalance = null;
+      if (latest && latest.field_id) {
+        const balanceRes = await fetch(`${API_BASE}/api/water-balance/${encodeURIComponent(latest.field_id)}/`);
+        waterBalance = balanceRes.ok ? await balanceRes.json() : null;
+
+        const { hours, bucket } = CHART_RANGES[chartRange];
+        const params = new URLSearchParams({
+          field_id: latest.field_id,
+          bucket,
+          fill: 'previous',
+          start: new Date(Date.now() - hours * 3600 * 1000).toISOString(),
+        });
+        const chartRes = await fetch(`${API_BASE}/api/readings/rollup/?${params}`);
+        chartData = chartRes.ok ? (await chartRes.json()).buckets : [];
+      }
+
       setSystemData({
         latest,
         chartData,
+        waterBalance,
         activeEvents,
         loading: false,
         error: null
@@ -50,7 +75,7 @@ export default function App() {
     fetchSystemData();
     const interval = setInterval(fetchSystemData, 30000); // Update every 30 seconds
     return () => clearInterval(interval);
-  }, []);
+  }, [chartRange]);
 
   if (systemData.loading) {
     return (
@@ -91,11 +116,22 @@ export default function App() {
 
       <div className="card">
         <h3>📊 Sensor Data Trends</h3>
-        <SensorChart data={systemData.chartData} />
+        <div className="chart-range">
+          {Object.keys(CHART_RANGES).map(range => (
+            <button
+              key={range}
+              className={range === chartRange ? 'active' : ''}
+              onClick={() => setChartRange(range)}
+            >
+              {range}
+            </button>
+          ))}
+        </div>
+        <SensorChart data={systemData.chartData} range={chartRange} />
       </div>
 
       <div className="card">
-        <LatestReading data={systemData.latest} />
+        <LatestReading data={systemData.latest} waterBalance={systemData.waterBalance} />
       </div>
     </div>
   );
@@ -1,6 +1,6 @@
 import React from 'react';
 
-export function LatestReading({ data }) {
+export function LatestReading({ data, waterBalance }) {
   if (!data) {
     return (
       <div className="latest-reading">
@@ -103,6 +103,23 @@ export function LatestReading({ data }) {
           </div>
         </div>
 
+        {waterBalance && (
+          <div className="metric-card">
+            <div className="metric-icon">🪴</div>
+            <div className="metric-content">
+              <div className="metric-label">Root-Zone Depletion</div>
+              <div className="metric-value">
+                {waterBalance.depletion_mm.toFixed(1)} mm
+              </div>
+              <div className="metric-status">
+                {waterBalance.irrigation_due
+                  ? 'Irrigation due'
+                  : `${(waterBalance.readily_available_mm - waterBalance.depletion_mm).toFixed(1)} mm until irrigation`}
+              </div>
+            </div>
+          </div>
+        )}
+
         {data.action && (
           <div className="metric-card">
             <div className="metric-icon">⚙️</div>
@@ -24,15 +24,18 @@ ChartJS.register(
   TimeScale
 );
 
-export function SensorChart({ data = [] }) {
+// data is a list of rollup buckets from /api/readings/rollup/
+const bucketMeans = (data, metric) =>
+  data
+    .filter(bucket => bucket[metric])
+    .map(bucket => ({ x: new Date(bucket.bucket_start), y: bucket[metric].mean }));
+
+export function SensorChart({ data = [], range = '24h' }) {
   const chartData = {
     datasets: [
       {
         label: 'Soil Moisture (%)',
-        data: data.map(point => ({
-          x: new Date(point.timestamp),
-          y: point.soil_moisture
-        })),
+        data: bucketMeans(data, 'moisture'),
         borderColor: '#2563eb',
         backgroundColor: 'rgba(37, 99, 235, 0.1)',
         yAxisID: 'y',
@@ -40,10 +43,7 @@ export function SensorChart({ data = [] }) {
       },
       {
         label: 'Temperature (°C)',
-        data: data.map(point => ({
-          x: new Date(point.timestamp),
-          y: point.temperature
-        })),
+        data: bucketMeans(data, 'temperature_c'),
         borderColor: '#dc2626',
         backgroundColor: 'rgba(220, 38, 38, 0.1)',
         yAxisID: 'y1',
@@ -51,10 +51,7 @@ export function SensorChart({ data = [] }) {
       },
       {
         label: 'Humidity (%)',
-        data: data.map(point => ({
-          x: new Date(point.timestamp),
-          y: point.humidity
-        })),
+        data: bucketMeans(data, 'humidity'),
         borderColor: '#16a34a',
         backgroundColor: 'rgba(22, 163, 74, 0.1)',
         yAxisID: 'y',
@@ -73,7 +70,7 @@ export function SensorChart({ data = [] }) {
     plugins: {
       title: {
         display: true,
-        text: 'Sensor Readings - Last 24 Hours'
+        text: `Sensor Readings - Last ${range}`
       },
       legend: {
         position: 'top',
@@ -90,9 +87,10 @@ export function SensorChart({ data = [] }) {
       x: {
         type: 'time',
         time: {
-          unit: 'hour',
+          unit: range === '24h' ? 'hour' : 'day',
           displayFormats: {
-            hour: 'HH:mm'
+            hour: 'HH:mm',
+            day: 'MMM d'
           }
         },
         title: {
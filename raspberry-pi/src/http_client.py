@@ -0,0 +1,157 @@
+import gzip
+import json
+import random
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+RETRY_STATUSES = {429, 502, 503, 504}
+# A POST may already have been committed when it fails any other way
+POST_RETRY_STATUSES = {429, 503}  # only with a Retry-After header
+
+
+def _not_sent(exc: requests.RequestException) -> bool:
+    """True when a request failed before reaching the server, so retrying cannot duplicate it."""
+    if isinstance(exc, requests.ConnectTimeout):
+        return True
+    reason = exc.args[0] if exc.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    return isinstance(reason, NewConnectionError)
+
+
+class BackendClient:
+    """
+    Keep-alive HTTP session to the backend API.
+
+    One pooled session is reused for every request so each cycle skips the
+    TCP/TLS handshake. Failed attempts are retried with full-jitter
+    exponential backoff, and large bodies are gzip-compressed. POSTs are not
+    idempotent, so they are only retried when the server cannot have stored
+    them: the connection was never made, or it answered 429/503 with
+    Retry-After.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 10, pool_size: int = 2,
+                 retries: int = 2, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 compress: bool = True, gzip_min_bytes: int = 256):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.compress = compress
+        self.gzip_min_bytes = gzip_min_bytes
+
+        self.session = requests.Session()
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        self.requests_sent = 0
+        self.retries_used = 0
+        self.bytes_raw = 0
+        self.bytes_sent = 0
+        self.request_seconds = 0.0
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["BackendClient"]:
+        base_url = config.get("backend_base_url")
+        if not base_url:
+            return None
+        http = config.get("http", {})
+        return cls(
+            base_url,
+            timeout=config.get("api_timeout_seconds", 10),
+            pool_size=http.get("pool_size", 2),
+            retries=http.get("retries", 2),
+            backoff_base=http.get("backoff_base_seconds", 0.5),
+            backoff_max=http.get("backoff_max_seconds", 8.0),
+            compress=http.get("gzip", True),
+            gzip_min_bytes=http.get("gzip_min_bytes", 256),
+        )
+
+    def post_json(self, path: str, payload: Any) -> requests.Response:
+        """POST ``payload`` as JSON, retried only when safe. Raises requests.RequestException."""
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        return self.post_bytes(path, body, "application/json")
+
+    def post_bytes(self, path: str, body: bytes, content_type: str) -> requests.Response:
+        """POST a raw body, retried only when safe. Raises requests.RequestException."""
+        headers = {"Content-Type": content_type}
+        self.bytes_raw += len(body)
+        if self.compress and len(body) >= self.gzip_min_bytes:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+
+        return self._send("POST", path, data=body, headers=headers)
+
+    def get(self, path: str, params: Optional[Dict[str, Any]] = None,
+            headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET, retrying timeouts, connection errors and RETRY_STATUSES. Raises requests.RequestException."""
+        return self._send("GET", path, params=params, headers=headers)
+
+    def _retry_after(self, response: requests.Response) -> Optional[float]:
+        """Seconds from a numeric Retry-After header, capped at backoff_max; None if absent."""
+        try:
+            return min(max(float(response.headers["Retry-After"]), 0.0), self.backoff_max)
+        except (KeyError, ValueError):
+            return None
+
+    def _send(self, method: str, path: str, **kwargs) -> requests.Response:
+        url = f"{self.base_url}{path}"
+        idempotent = method != "POST"
+        delay = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retries_used += 1
+                if delay is None:
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+                time.sleep(delay)
+                delay = None
+            start = time.monotonic()
+            try:
+                self.requests_sent += 1
+                self.bytes_sent += len(kwargs.get("data") or b"")
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if attempt == self.retries or not (idempotent or _not_sent(exc)):
+                    raise
+                continue
+            finally:
+                self.request_seconds += time.monotonic() - start
+
+            if attempt == self.retries:
+                return response
+            if idempotent:
+                if response.status_code not in RETRY_STATUSES:
+                    return response
+                delay = self._retry_after(response)
+            else:
+                delay = self._retry_after(response) if response.status_code in POST_RETRY_STATUSES else None
+                if delay is None:
+                    return response
+
+    def connections_opened(self) -> int:
+        """Number of TCP connections opened so far across the session's pools."""
+        pools = self.adapter.poolmanager.pools
+        return sum(pools[key].num_connections for key in list(pools.keys()))
+
+    def stats(self) -> Dict[str, Any]:
+        opened = self.connections_opened()
+        return {
+            "requests": self.requests_sent,
+            "connections_opened": opened,
+            "connections_reused": max(0, self.requests_sent - opened),
+            "retries": self.retries_used,
+            "bytes_raw": self.bytes_raw,
+            "bytes_sent": self.bytes_sent,
+            "avg_request_ms": (self.request_seconds / self.requests_sent * 1000) if self.requests_sent else 0.0,
+        }
+
+    def close(self):
+        self.session.close()
@@ -5,21 +5,25 @@ Collects sensor data, makes irrigation decisions, communicates with backend API.
 """
 
 import argparse
-import json
+import asyncio
 import os
+import random
 import time
 import signal
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 import requests
 import yaml
 
 from logger import configure_logger
-from sensors.soil_moisture import SoilMoistureSensor
-from sensors.dht22 import DHT22Sensor
-from controllers.relay_control import RelayController
+from outbox import Outbox
+from http_client import BackendClient
+from mqtt_client import MQTTLink
+import wire
+from sensors.dht22 import DHT22Sampler
+from zones import Zone, build_zones, read_soil_channels, unique_dht_sensors
 
 logger = configure_logger()
 
@@ -28,29 +32,57 @@ class IrrigationAgent:
     """Main IoT agent for irrigation control."""
     
     def __init__(self, config_path: str):
+        self.config_path = config_path
         self.config = self.load_config(config_path)
+        self.config_mtime = os.path.getmtime(config_path)
         self.running = True
+        self.simulate = False
         
-        # Initialize hardware
-        self.soil_sensor = SoilMoistureSensor(
-            channel=self.config.get("sensor", {}).get("soil_moisture_adc_channel", 0)
-        )
-        self.dht_sensor = DHT22Sensor(
-            pin=self.config.get("sensor", {}).get("dht22_pin", 4)
-        )
-        self.relay = RelayController(
-            pin=self.config.get("relay_gpio_pin", 18)
-        )
+        # Initialize hardware: one zone per field, sharing the MCP3008
+        self.zones, self.spi = build_zones(self.config)
+        self.dht_sensors = unique_dht_sensors(self.zones)
+        self.dht_samplers = {}
         
         # State tracking
-        self.dry_streak = 0
-        self.last_irrigation = None
-        self.irrigation_count_today = 0
         self.last_backend_contact = datetime.now()
+        self.backend_online = True
+        self.cycle_count = 0
+        self.readings_suppressed = 0
+        
+        # Persistent keep-alive session to the backend
+        self.client = BackendClient.from_config(self.config)
         
-        # Setup signal handlers
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
+        # Compact binary uploads: zone metadata is registered once per session
+        self.wire_format = self.config.get("http", {}).get("wire_format", "json")
+        self.wire_session = None
+        self.wire_fields = {}
+        
+        # Optional MQTT transport: readings are published, decisions pushed back per field
+        self.mqtt = MQTTLink.from_config(self.config, [zone.field_id for zone in self.zones], self.on_mqtt_command)
+        self.mqtt_waiting_since = None  # Oldest publish still without a decision
+        
+        # Offline buffer for readings the backend did not receive
+        outbox_config = self.config.get("outbox", {})
+        self.outbox = None
+        if outbox_config.get("enable", True):
+            self.outbox = Outbox(
+                path=outbox_config.get("path", "data/outbox.db"),
+                max_rows=outbox_config.get("max_rows", 20000),
+                eviction=outbox_config.get("eviction", "drop_oldest")
+            )
+        self.outbox_failures = 0
+        self.next_outbox_drain = 0.0
+        
+        # Per-field settings pulled from the backend's field registry; they
+        # override this file's values, which remain the offline fallback
+        self.remote_fields = {}
+        self.remote_fields_etag = None
+        
+        # Async runtime state (created inside the event loop)
+        self.upload_queue = None
+        self.sensor_lock = None
+        self._stop_event = None
+        self.loop = None
 
     def load_config(self, path: str) -> Dict[str, Any]:
         """Load YAML configuration file."""
@@ -64,169 +96,622 @@ class IrrigationAgent:
             logger.error(f"Invalid YAML config: {e}")
             sys.exit(1)
 
-    def _signal_handler(self, signum, frame):
+    def _signal_handler(self, signum):
         """Handle shutdown signals gracefully."""
         logger.info(f"Received signal {signum}, shutting down...")
+        self.stop()
+
+    def stop(self):
+        """Ask every agent task to finish."""
         self.running = False
+        if self._stop_event is not None:
+            self._stop_event.set()
 
-    def read_sensors(self, simulate: bool = False) -> Dict[str, float]:
-        """Read all sensor values."""
-        moisture = self.soil_sensor.read_moisture_percentage(simulate)
-        temp_c, humidity = self.dht_sensor.read_temperature_humidity(simulate)
-        
-        return {
-            "moisture": moisture,
-            "temperature_c": temp_c,
-            "humidity": humidity,
-            "timestamp": datetime.now().isoformat()
-        }
-
-    def should_irrigate_offline(self, moisture: float) -> bool:
-        """Local irrigation decision when backend unavailable."""
-        threshold = self.config.get("moisture_threshold", 35)
-        consecutive_needed = self.config.get("offline_mode", {}).get("consecutive_dry_readings", 2)
-        
-        if moisture < threshold:
-            self.dry_streak += 1
-        else:
-            self.dry_streak = 0
+    def start_dht_samplers(self):
+        """Start one background sampler per DHT22 sensor."""
+        sensor_config = self.config.get("sensor", {})
+        for sensor in self.dht_sensors:
+            sampler = DHT22Sampler(
+                sensor,
+                interval=sensor_config.get("dht22_interval_seconds", 3),
+                history=sensor_config.get("dht22_history", 32),
+                max_age=sensor_config.get("dht22_max_age_seconds", 60),
+                simulate=self.simulate
+            )
+            sampler.start()
+            self.dht_samplers[id(sensor)] = sampler
+
+    async def read_sensors(self) -> List[Dict[str, Any]]:
+        """
+        Read all zones: soil channels one after another on the shared SPI
+        handle, temperature/humidity from the cached DHT22 samplers. Returns one
+        reading payload per zone with a soil reading; stale climate values are
+        sent as null.
+        """
+        async with self.sensor_lock:
+            moisture = await asyncio.to_thread(read_soil_channels, self.zones, self.simulate)
+        timestamp = datetime.now().isoformat()
+        
+        payloads = []
+        for zone, zone_moisture in zip(self.zones, moisture):
+            if zone_moisture is None:
+                logger.warning(f"{zone.field_id}: soil moisture sensor unavailable, skipping reading")
+                continue
+            climate = self.dht_samplers[id(zone.dht_sensor)].latest()
+            if climate.stale:
+                age = "no reading yet" if climate.age_seconds is None else f"{climate.age_seconds:.0f}s old"
+                logger.warning(f"{zone.field_id}: DHT22 reading stale ({age})")
+                payloads.append(zone.payload(zone_moisture, None, None, timestamp))
+            else:
+                payloads.append(zone.payload(zone_moisture, climate.temperature_c, climate.humidity, timestamp))
+        return payloads
+
+    def zone_for(self, field_id: str) -> Optional[Zone]:
+        for zone in self.zones:
+            if zone.field_id == field_id:
+                return zone
+        return None
+
+    def moisture_trend(self, zone: Zone) -> Optional[float]:
+        """Rolling moisture trend for a zone in %/h, or None without enough history."""
+        if len(zone.history) < self.config.get("offline_mode", {}).get("trend_min_samples", 6):
+            return None
+        slope = zone.history.slope()
+        return None if slope is None else slope * 3600
+    
+    def should_irrigate_offline(self, zone: Zone, conservative: bool = False) -> bool:
+        """
+        Local irrigation decision when backend unavailable, from the zone's
+        rolling history: a run of dry readings, or moisture falling fast enough
+        to cross the threshold within the trend horizon.
+        """
+        offline_config = self.config.get("offline_mode", {})
+        # Be more conservative when offline for long time (same as reading 5% lower)
+        threshold = zone.threshold + 5 if conservative else zone.threshold
+        
+        # Dry streak: the newest readings since the last irrigation are all below threshold
+        consecutive_needed = offline_config.get("consecutive_dry_readings", 2)
+        since = zone.last_irrigation.timestamp() if zone.last_irrigation else None
+        dry = zone.history.trailing_below(threshold, consecutive_needed, since) >= consecutive_needed
+        
+        # Trend: a clear decline whose projection, less noise, crosses the threshold
+        falling = False
+        rate = self.moisture_trend(zone)
+        if rate is not None and rate <= -offline_config.get("trend_min_drop_per_hour", 1.0):
+            horizon = offline_config.get("trend_horizon_hours", 2) * 3600
+            projected = zone.history.predict(zone.history.last_time() + horizon)
+            noise = zone.history.residual_stdev() or 0.0
+            falling = projected + noise < threshold
+            if falling:
+                logger.info(f"{zone.field_id}: moisture falling {rate:.1f}%/h, projected {projected:.1f}%")
+        
+        if not (dry or falling):
+            return False
         
         # Safety checks
-        if self.irrigation_count_today >= self.config.get("safety", {}).get("max_irrigation_per_day", 4):
-            logger.warning("Daily irrigation limit reached")
+        if zone.irrigation_count_today >= self.config.get("safety", {}).get("max_irrigation_per_day", 4):
+            logger.warning(f"{zone.field_id}: daily irrigation limit reached")
             return False
         
-        if self.last_irrigation:
+        if zone.last_irrigation:
             min_interval = self.config.get("safety", {}).get("min_time_between_cycles", 3600)
-            if (datetime.now() - self.last_irrigation).seconds < min_interval:
-                logger.info("Too soon since last irrigation")
+            if (datetime.now() - zone.last_irrigation).seconds < min_interval:
+                logger.info(f"{zone.field_id}: too soon since last irrigation")
                 return False
         
-        return self.dry_streak >= consecutive_needed
+        return True
+
+    def register_wire_session(self) -> bool:
+        """Send zone metadata once so binary frames can refer to fields by index."""
+        fields = [
+            {"field_id": zone.field_id, "crop_stage": zone.crop_stage, "location": zone.location}
+            for zone in self.zones
+        ]
+        response = self.client.post_json("/api/readings/sessions/", {"fields": fields})
+        # 200: the backend already had a session for these zones
+        if response.status_code in (200, 201):
+            self.wire_session = response.json()["id"]
+            self.wire_fields = {field["field_id"]: index for index, field in enumerate(fields)}
+            logger.info(f"Registered binary upload session {self.wire_session}")
+            return True
+        if response.status_code in (404, 405):
+            logger.warning("Backend does not accept binary uploads, falling back to JSON")
+            self.wire_format = "json"
+        else:
+            logger.warning(f"Binary session registration failed: {response.status_code}")
+        return False
+
+    def post_readings(self, path: str, payloads: List[Dict[str, Any]], single: bool = False) -> requests.Response:
+        """POST readings as a binary frame when enabled, otherwise JSON. Raises requests.RequestException."""
+        if self.wire_format == "binary":
+            for _ in range(2):
+                if self.wire_session is None and not self.register_wire_session():
+                    break
+                try:
+                    body = wire.encode_readings(self.wire_session, self.wire_fields, payloads)
+                except KeyError:
+                    # Buffered readings from a zone that is no longer configured
+                    break
+                response = self.client.post_bytes(path, body, wire.CONTENT_TYPE)
+                if response.status_code != 404:
+                    return response
+                # The backend no longer knows the session; register again
+                self.wire_session = None
+        return self.client.post_json(path, payloads[0] if single else payloads)
 
     def post_to_backend(self, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Send sensor data to backend API."""
-        base_url = self.config.get("backend_base_url")
-        if not base_url:
+        if not self.client:
             return None
         
         try:
-            timeout = self.config.get("api_timeout_seconds", 10)
-            response = requests.post(
-                f"{base_url}/api/readings/",
-                json=payload,
-                timeout=timeout,
-                headers={"Content-Type": "application/json"}
-            )
+            response = self.post_readings("/api/readings/", [payload], single=True)
             
             if response.status_code == 201:
                 self.last_backend_contact = datetime.now()
                 return response.json()
             else:
                 logger.warning(f"Backend error: {response.status_code}")
-                
+        
         except requests.RequestException as e:
             logger.warning(f"Backend communication failed: {e}")
         
         return None
 
-    def execute_irrigation(self, duration: int, reason: str):
-        """Execute irrigation cycle."""
-        logger.info(f"Starting irrigation: {reason} (duration: {duration}s)")
+    def post_batch_to_backend(self, payloads: list) -> Optional[List[Dict[str, Any]]]:
+        """Send a batch of readings to the bulk endpoint; returns per-row results."""
+        if not self.client:
+            return None
         
-        if self.relay.on():
-            self.last_irrigation = datetime.now()
-            self.irrigation_count_today += 1
+        try:
+            response = self.post_readings("/api/readings/bulk/", payloads)
             
-            # Wait for irrigation duration
-            time.sleep(duration)
+            if response.status_code in (201, 207):
+                self.last_backend_contact = datetime.now()
+                body = response.json()
+                if body.get("failed"):
+                    logger.warning(f"Backend rejected {body['failed']} readings")
+                return body.get("results", [])
+            logger.warning(f"Backend bulk upload error: {response.status_code}")
+        
+        except requests.RequestException as e:
+            logger.warning(f"Backend bulk upload failed: {e}")
+        
+        return None
+
+    def upload_batch(self, payloads: List[Dict[str, Any]]) -> bool:
+        """Send buffered readings over MQTT when enabled, otherwise the bulk endpoint."""
+        if self.mqtt is not None:
+            return self.mqtt.publish_readings(payloads)
+        return self.post_batch_to_backend(payloads) is not None
+
+    def publish_to_broker(self, payloads: List[Dict[str, Any]]) -> Optional[List[Optional[str]]]:
+        """
+        Publish readings over MQTT. Decisions arrive later through
+        handle_command, so this returns no actions, or None if the link is down.
+        """
+        if not self.mqtt.publish_readings(payloads):
+            return None
+        now = time.monotonic()
+        deadline = now + self.config.get("mqtt", {}).get("command_timeout_seconds", 60)
+        for payload in payloads:
+            zone = self.zone_for(payload["field_id"])
+            if zone is not None:
+                zone.command_deadline = deadline
+        if self.mqtt_waiting_since is None:
+            self.mqtt_waiting_since = now
+        return [None] * len(payloads)
+
+    def backend_silent(self) -> bool:
+        """True when the broker accepts readings but no consumer has answered for a while."""
+        if self.mqtt is None or self.mqtt_waiting_since is None:
+            return False
+        offline_after = self.config.get("mqtt", {}).get("offline_after_seconds", 900)
+        return time.monotonic() - self.mqtt_waiting_since > offline_after
+
+    def on_mqtt_command(self, field_id: str, command: Dict[str, Any]):
+        """Called on the MQTT network thread; hands the command to the event loop."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.handle_command, field_id, command)
+
+    def handle_command(self, field_id: str, command: Dict[str, Any]):
+        """Act on a decision pushed for a zone's latest published reading."""
+        zone = self.zone_for(field_id)
+        if zone is None:
+            return
+        self.last_backend_contact = datetime.now()
+        self.mqtt_waiting_since = None
+        irrigation_decision = command.get("action")
+        if zone.command_deadline is None or time.monotonic() > zone.command_deadline:
+            # Answers to buffered readings, or ones that arrived after we decided locally
+            logger.info(f"{field_id}: ignoring late backend decision {irrigation_decision}")
+            return
+        zone.command_deadline = None
+        logger.info(f"{field_id}: backend decision {irrigation_decision}")
+        if irrigation_decision == "IRRIGATE":
+            self.start_irrigation(zone, "Automated decision")
+
+    def log_http_stats(self):
+        """Log connection reuse and compression statistics for the backend session."""
+        if not self.client:
+            return
+        stats = self.client.stats()
+        saved = 1 - stats["bytes_sent"] / stats["bytes_raw"] if stats["bytes_raw"] else 0.0
+        logger.info(
+            f"HTTP: {stats['requests']} requests over {stats['connections_opened']} connections "
+            f"({stats['connections_reused']} reused), {stats['retries']} retries, "
+            f"avg {stats['avg_request_ms']:.0f}ms, gzip saved {saved:.0%}"
+        )
+
+    def flush_outbox(self):
+        """Upload buffered readings in batches, backing off exponentially on failure."""
+        if not self.outbox or time.time() < self.next_outbox_drain:
+            return
+        
+        outbox_config = self.config.get("outbox", {})
+        batch_size = outbox_config.get("batch_size", 500)
+        uploaded = 0
+        
+        for _ in range(outbox_config.get("max_batches_per_cycle", 10)):
+            batch = self.outbox.peek(batch_size)
+            if not batch:
+                break
             
-            if self.relay.off():
-                logger.info("Irrigation completed successfully")
-            else:
-                logger.error("Failed to stop irrigation - manual intervention needed!")
-        else:
-            logger.error("Failed to start irrigation")
+            if not self.upload_batch([payload for _, payload in batch]):
+                self.outbox_failures += 1
+                delay = min(
+                    outbox_config.get("max_backoff_seconds", 1800),
+                    outbox_config.get("backoff_base_seconds", 30) * 2 ** (self.outbox_failures - 1)
+                )
+                # Jitter so a fleet reconnecting together doesn't retry in lockstep
+                delay = random.uniform(delay / 2, delay)
+                self.next_outbox_drain = time.time() + delay
+                logger.warning(f"Outbox upload failed, retrying in {delay:.0f}s")
+                break
+            
+            self.outbox.ack(batch[-1][0])
+            self.outbox_failures = 0
+            uploaded += len(batch)
+        
+        if uploaded:
+            self.outbox.compact()
+            logger.info(f"Uploaded {uploaded} buffered readings ({len(self.outbox)} still queued)")
 
     def reset_daily_counters(self):
         """Reset daily counters at midnight."""
         now = datetime.now()
-        if self.last_irrigation and now.date() > self.last_irrigation.date():
-            self.irrigation_count_today = 0
-            logger.info("Daily irrigation counter reset")
+        for zone in self.zones:
+            if zone.last_irrigation and now.date() > zone.last_irrigation.date():
+                zone.irrigation_count_today = 0
+                logger.info(f"{zone.field_id}: daily irrigation counter reset")
+
+    def fetch_decisions(self, payloads: List[Dict[str, Any]]) -> Optional[List[Optional[str]]]:
+        """Post one cycle's readings; returns an action per payload, or None if the backend is unreachable."""
+        if self.mqtt is not None:
+            return self.publish_to_broker(payloads)
+        
+        if len(payloads) == 1:
+            backend_response = self.post_to_backend(payloads[0])
+            return [backend_response.get("action")] if backend_response else None
+        
+        results = self.post_batch_to_backend(payloads)
+        if results is None:
+            return None
+        actions = [None] * len(payloads)
+        for result in results:
+            if result and result.get("status") == "created":
+                actions[result["index"]] = result.get("action")
+        return actions
+
+    def should_report(self, zone: Zone, payload: Dict[str, Any]) -> bool:
+        """
+        Deadband reporting: send a reading only when a value moved beyond its
+        band, the heartbeat elapsed, the zone is dry or its pump is running.
+        The backend treats gaps up to the heartbeat as "unchanged".
+        """
+        deadband = self.config.get("reporting", {}).get("deadband", {})
+        last = zone.last_reported
+        now = datetime.fromisoformat(payload["timestamp"]).timestamp()
+        
+        report = (
+            not deadband.get("enable", False)
+            or last is None
+            or now - zone.last_reported_at >= deadband.get("heartbeat_seconds", 1800)
+            or payload["moisture"] < zone.threshold
+            or zone.relay.state()
+        )
+        if not report:
+            for key, band in (
+                ("moisture", deadband.get("moisture", 1.0)),
+                ("temperature_c", deadband.get("temperature_c", 0.5)),
+                ("humidity", deadband.get("humidity", 2.0)),
+            ):
+                value, previous = payload[key], last[key]
+                if (value is None) != (previous is None) or (value is not None and abs(value - previous) >= band):
+                    report = True
+                    break
+        
+        if report:
+            zone.last_reported = payload
+            zone.last_reported_at = now
+        else:
+            self.readings_suppressed += 1
+        return report
+
+    def decide(self, payloads: List[Dict[str, Any]]) -> List[Optional[str]]:
+        """Get a decision per zone reading from the backend, falling back to local rules."""
+        reported = [payload for payload in payloads if self.should_report(self.zone_for(payload["field_id"]), payload)]
+        
+        if reported:
+            actions = self.fetch_decisions(reported)
+            self.backend_online = actions is not None
+            if actions is not None:
+                by_field = {}
+                for payload, irrigation_decision in zip(reported, actions):
+                    if self.mqtt is None:  # MQTT decisions are logged as they arrive
+                        logger.info(f"{payload['field_id']}: backend decision {irrigation_decision}")
+                    by_field[payload["field_id"]] = irrigation_decision
+                self.flush_outbox()
+                if not self.backend_silent():
+                    return [by_field.get(payload["field_id"]) for payload in payloads]
+                # The broker holds the readings, but nothing is answering them
+                logger.warning("No backend decisions over MQTT, deciding locally")
+                for payload in reported:
+                    self.zone_for(payload["field_id"]).command_deadline = None
+            elif self.outbox is not None:
+                for payload in reported:
+                    if not self.outbox.append(payload):
+                        logger.warning("Outbox full, dropping reading")
+        elif self.backend_online and not self.backend_silent():
+            # Nothing changed enough to report; unchanged readings need no new decision
+            return [None] * len(payloads)
+        
+        # Offline decision making
+        offline_hours = (datetime.now() - self.last_backend_contact).total_seconds() / 3600
+        max_offline = self.config.get("offline_mode", {}).get("max_offline_hours", 12)
+        conservative = offline_hours > max_offline
+        if conservative:
+            logger.warning(f"Backend offline for {offline_hours:.1f}h - conservative mode")
+        
+        actions = []
+        for payload in payloads:
+            zone = self.zone_for(payload["field_id"])
+            actions.append("IRRIGATE" if zone and self.should_irrigate_offline(zone, conservative) else None)
+        return actions
 
-    def run_cycle(self, simulate: bool = False):
-        """Execute one sensor reading and decision cycle."""
+    def start_irrigation(self, zone: Zone, reason: str):
+        """Start irrigation for a zone as a background task unless one is already running."""
+        if zone.irrigation_task and not zone.irrigation_task.done():
+            logger.info(f"{zone.field_id}: irrigation already running, ignoring new request")
+            return
+        zone.irrigation_task = asyncio.create_task(self.irrigate(zone, reason))
+
+    async def irrigate(self, zone: Zone, reason: str):
+        """
+        Run a zone's pump as a timed task for min_irrigation_run_seconds.
+        With the opt-in stop_on_recovery, it may run on up to the max run time
+        and stops once moisture recovers; cancelling the task always turns the
+        relay off.
+        """
+        irrigation_config = self.config.get("irrigation", {})
+        min_run = self.config.get("min_irrigation_run_seconds", 120)
+        stop_on_recovery = irrigation_config.get("stop_on_recovery", False)
+        max_run = self.config.get("max_irrigation_run_seconds", min_run) if stop_on_recovery else min_run
+        
+        logger.info(f"{zone.field_id}: starting irrigation: {reason} (duration: up to {max_run}s)")
+        if not zone.relay.on():
+            logger.error(f"{zone.field_id}: failed to start irrigation")
+            return
+        zone.last_irrigation = datetime.now()
+        zone.irrigation_count_today += 1
+        
+        loop = asyncio.get_running_loop()
+        started = loop.time()
         try:
-            # Reset daily counters if needed
-            self.reset_daily_counters()
-            
-            # Read sensors
-            sensor_data = self.read_sensors(simulate)
-            
-            # Prepare payload for backend
-            payload = {
-                "field_id": self.config.get("field_id"),
-                "crop_stage": self.config.get("crop_stage"),
-                "location": self.config.get("location"),
-                **sensor_data
-            }
-            
-            # Try to get decision from backend
-            backend_response = self.post_to_backend(payload)
-            irrigation_decision = None
-            
-            if backend_response:
-                irrigation_decision = backend_response.get("action")
-                logger.info(f"Backend decision: {irrigation_decision}")
+            if not stop_on_recovery:
+                await asyncio.sleep(max_run)
             else:
-                # Offline decision making
-                offline_hours = (datetime.now() - self.last_backend_contact).total_seconds() / 3600
-                max_offline = self.config.get("offline_mode", {}).get("max_offline_hours", 12)
+                check_every = irrigation_config.get("recovery_check_seconds", 30)
+                target = zone.threshold + irrigation_config.get("recovery_margin", 5)
+                while (elapsed := loop.time() - started) < max_run:
+                    await asyncio.sleep(min(check_every, max_run - elapsed))
+                    if loop.time() - started < min_run:
+                        continue
+                    async with self.sensor_lock:
+                        moisture = await asyncio.to_thread(
+                            zone.soil_sensor.read_moisture_percentage, self.simulate
+                        )
+                    if moisture is not None and moisture >= target:
+                        logger.info(f"{zone.field_id}: moisture recovered to {moisture:.1f}%, stopping irrigation early")
+                        break
+            logger.info(f"{zone.field_id}: irrigation completed after {loop.time() - started:.0f}s")
+        except asyncio.CancelledError:
+            logger.info(f"{zone.field_id}: irrigation cancelled after {loop.time() - started:.0f}s")
+            raise
+        finally:
+            if not zone.relay.off():
+                logger.error(f"{zone.field_id}: failed to stop irrigation - manual intervention needed!")
+
+    async def sampling_loop(self):
+        """Read sensors on a fixed cadence and queue each cycle's readings for upload."""
+        interval = self.config.get("sampling_interval_seconds", 300)
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        
+        while self.running:
+            try:
+                self.reset_daily_counters()
+                payloads = await self.read_sensors()
+                try:
+                    if payloads:
+                        self.upload_queue.put_nowait(payloads)
+                except asyncio.QueueFull:
+                    logger.warning("Upload queue full, buffering readings")
+                    if self.outbox is not None:
+                        for payload in payloads:
+                            await asyncio.to_thread(self.outbox.append, payload)
                 
-                if offline_hours > max_offline:
-                    logger.warning(f"Backend offline for {offline_hours:.1f}h - conservative mode")
-                    # Be more conservative when offline for long time
-                    if self.should_irrigate_offline(sensor_data["moisture"] - 5):  # Lower threshold
-                        irrigation_decision = "IRRIGATE"
-                else:
-                    if self.should_irrigate_offline(sensor_data["moisture"]):
-                        irrigation_decision = "IRRIGATE"
+                for payload in payloads:
+                    zone = self.zone_for(payload["field_id"])
+                    rate = self.moisture_trend(zone)
+                    trend = "n/a" if rate is None else f"{rate:+.1f}%/h"
+                    climate = "no climate data"
+                    if payload["temperature_c"] is not None:
+                        climate = f"{payload['temperature_c']:.1f}°C, {payload['humidity']:.1f}% RH"
+                    logger.info(
+                        f"{zone.field_id}: {payload['moisture']:.1f}% moisture, {climate} | "
+                        f"Relay: {'ON' if zone.relay.state() else 'OFF'} | "
+                        f"Trend: {trend}"
+                    )
+            except Exception as e:
+                logger.error(f"Sampling error: {e}")
             
-            # Execute irrigation if needed
-            if irrigation_decision == "IRRIGATE":
-                duration = self.config.get("min_irrigation_run_seconds", 120)
-                self.execute_irrigation(duration, "Automated decision")
-                self.dry_streak = 0  # Reset dry streak after irrigation
-            
-            # Log current status
-            logger.info(
-                f"Sensors: {sensor_data['moisture']:.1f}% moisture, "
-                f"{sensor_data['temperature_c']:.1f}°C, {sensor_data['humidity']:.1f}% RH | "
-                f"Relay: {'ON' if self.relay.state() else 'OFF'} | "
-                f"Dry streak: {self.dry_streak}"
-            )
-            
-        except Exception as e:
-            logger.error(f"Cycle error: {e}")
+            # Schedule against the original cadence so slow reads don't cause drift
+            next_tick += interval
+            now = loop.time()
+            if next_tick < now:
+                next_tick = now
+            await asyncio.sleep(next_tick - now)
+
+    async def upload_loop(self):
+        """Upload queued readings and act on the resulting decisions."""
+        while True:
+            payloads = await self.upload_queue.get()
+            try:
+                # History is only written here, so decide() sees a stable buffer
+                for payload in payloads:
+                    zone = self.zone_for(payload["field_id"])
+                    if zone is not None:
+                        zone.history.append(datetime.fromisoformat(payload["timestamp"]).timestamp(), payload["moisture"])
+                actions = await asyncio.to_thread(self.decide, payloads)
+                for payload, irrigation_decision in zip(payloads, actions):
+                    zone = self.zone_for(payload["field_id"])
+                    if zone and irrigation_decision == "IRRIGATE":
+                        self.start_irrigation(zone, "Automated decision")
+                
+                self.cycle_count += 1
+                stats_every = self.config.get("http", {}).get("stats_log_every_cycles", 12)
+                if stats_every and self.cycle_count % stats_every == 0:
+                    self.log_http_stats()
+                    if self.readings_suppressed:
+                        logger.info(f"Deadband: {self.readings_suppressed} unchanged readings not sent")
+            except Exception as e:
+                logger.error(f"Upload error: {e}")
+            finally:
+                self.upload_queue.task_done()
+
+    def fetch_field_config(self) -> Optional[Dict[str, Any]]:
+        """
+        Pull this Pi's field settings from the backend registry.
+        The last ETag is sent along, so while nothing changed the backend
+        answers with an empty 304. Returns new settings, or None.
+        """
+        if self.client is None or not self.config.get("field_config_pull", True):
+            return None
+        headers = {"If-None-Match": self.remote_fields_etag} if self.remote_fields_etag else None
+        params = {"field_id": ",".join(zone.field_id for zone in self.zones)}
+        try:
+            response = self.client.get("/api/fields/config/", params=params, headers=headers)
+        except requests.RequestException as e:
+            logger.debug(f"Field config pull failed: {e}")
+            return None
+        if response.status_code == 304:
+            return None
+        if response.status_code != 200:
+            logger.warning(f"Field config pull failed: HTTP {response.status_code}")
+            return None
+        try:
+            fields = response.json()["fields"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Field config pull returned an unexpected body")
+            return None
+        self.remote_fields_etag = response.headers.get("ETag")
+        return fields
+
+    async def config_refresh_loop(self):
+        """
+        Pull field settings from the backend and reload the YAML config when
+        the file changes (hardware pins need a restart).
+        """
+        while True:
+            fields = await asyncio.to_thread(self.fetch_field_config)
+            if fields is not None:
+                self.remote_fields = fields
+                self.apply_zone_settings()
+                self.wire_session = None  # Crop stages are part of the zone metadata
+                logger.info(f"Field settings updated from the backend ({len(fields)} field(s))")
+            await asyncio.sleep(self.config.get("config_refresh_seconds", 300))
+            try:
+                mtime = os.path.getmtime(self.config_path)
+                if mtime != self.config_mtime:
+                    with open(self.config_path, "r", encoding="utf-8") as f:
+                        self.config = yaml.safe_load(f)
+                    self.config_mtime = mtime
+                    self.apply_zone_settings()
+                    self.wire_session = None  # Re-send zone metadata on the next upload
+                    logger.info("Configuration reloaded")
+            except (OSError, yaml.YAMLError) as e:
+                logger.warning(f"Config reload failed: {e}")
+
+    def apply_zone_settings(self):
+        """Update per-zone thresholds and crop stages from the current config and the backend registry."""
+        zone_configs = self.config.get("zones") or [{"field_id": self.zones[0].field_id}]
+        for zone_config in zone_configs:
+            zone = self.zone_for(zone_config.get("field_id"))
+            if zone is None:
+                continue
+            zone.threshold = zone_config.get("moisture_threshold", self.config.get("moisture_threshold", 35))
+            zone.crop_stage = zone_config.get("crop_stage", self.config.get("crop_stage"))
+        for zone in self.zones:
+            remote = self.remote_fields.get(zone.field_id) or {}
+            if remote.get("moisture_threshold") is not None:
+                zone.threshold = remote["moisture_threshold"]
+            if remote.get("crop_stage"):
+                zone.crop_stage = remote["crop_stage"]
+
+    async def run_async(self, simulate: bool = False):
+        """Run sampling, upload and config refresh as independent tasks until stopped."""
+        self.simulate = simulate
+        self._stop_event = asyncio.Event()
+        self.sensor_lock = asyncio.Lock()
+        self.upload_queue = asyncio.Queue(maxsize=self.config.get("upload_queue_size", 100))
+        
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, self._signal_handler, sig)
+        self.loop = loop
+        if self.mqtt is not None:
+            self.mqtt.start()
+        
+        # Give the DHT22 samplers a moment to produce a first reading
+        self.start_dht_samplers()
+        await asyncio.gather(*(
+            asyncio.to_thread(sampler.wait_ready, DHT22Sampler.MIN_INTERVAL * 3)
+            for sampler in self.dht_samplers.values()
+        ))
+        
+        tasks = [
+            asyncio.create_task(self.sampling_loop()),
+            asyncio.create_task(self.upload_loop()),
+            asyncio.create_task(self.config_refresh_loop()),
+        ]
+        try:
+            await self._stop_event.wait()
+        finally:
+            tasks.extend(zone.irrigation_task for zone in self.zones if zone.irrigation_task is not None)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
 
     def run(self, simulate: bool = False):
         """Main agent loop."""
         interval = self.config.get("sampling_interval_seconds", 300)
-        logger.info(f"Starting irrigation agent (interval: {interval}s, simulate: {simulate})")
+        logger.info(
+            f"Starting irrigation agent ({len(self.zones)} zone(s), interval: {interval}s, simulate: {simulate})"
+        )
         
         try:
-            while self.running:
-                start_time = time.time()
-                
-                self.run_cycle(simulate)
-                
-                # Sleep for remaining interval time
-                elapsed = time.time() - start_time
-                sleep_time = max(0, interval - elapsed)
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-                    
+            asyncio.run(self.run_async(simulate))
         except KeyboardInterrupt:
             logger.info("Interrupted by user")
         finally:
@@ -235,21 +720,35 @@ class IrrigationAgent:
     def cleanup(self):
         """Clean up resources."""
         logger.info("Cleaning up resources...")
-        self.relay.off()
-        self.relay.cleanup()
-        self.soil_sensor.cleanup()
-        self.dht_sensor.cleanup()
+        for zone in self.zones:
+            zone.relay.off()
+            zone.relay.cleanup()
+            zone.soil_sensor.cleanup()
+        for sampler in self.dht_samplers.values():
+            sampler.stop()
+        for sensor in self.dht_sensors:
+            sensor.cleanup()
+        if self.spi:
+            self.spi.close()
+        if self.outbox is not None:
+            self.outbox.close()
+        if self.mqtt is not None:
+            logger.info(f"MQTT: published {self.mqtt.published} readings")
+            self.mqtt.close()
+        if self.client:
+            self.log_http_stats()
+            self.client.close()
 
 
 def main():
     parser = argparse.ArgumentParser(description="IoT Irrigation Edge Agent")
     parser.add_argument(
-        "--config", 
+        "--config",
         default="config/config.yaml",
         help="Configuration file path"
     )
     parser.add_argument(
-        "--simulate", 
+        "--simulate",
         action="store_true",
         help="Run in simulation mode (no real hardware)"
     )
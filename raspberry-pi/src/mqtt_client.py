@@ -0,0 +1,130 @@
+import json
+import socket
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from logger import configure_logger
+
+try:
+    import paho.mqtt.client as paho_mqtt
+    MQTT_AVAILABLE = True
+except ImportError:
+    paho_mqtt = None
+    MQTT_AVAILABLE = False
+
+logger = configure_logger()
+
+TOPIC_PREFIX = "irrigation"
+
+
+class MQTTLink:
+    """
+    Persistent MQTT connection to the backend broker.
+
+    Readings are published with QoS 1 on ``irrigation/<field_id>/readings``;
+    decisions arrive on ``irrigation/<field_id>/commands`` and are handed to
+    ``on_command(field_id, command)`` from paho's network thread. The session
+    is persistent (fixed client id, clean_session off), so commands sent
+    while the link was down are delivered on reconnect.
+    """
+
+    def __init__(self, host: str, field_ids: List[str], port: int = 1883, client_id: Optional[str] = None,
+                 keepalive: int = 60, username: Optional[str] = None, password: Optional[str] = None,
+                 on_command: Optional[Callable[[str, Dict[str, Any]], None]] = None):
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.field_ids = list(field_ids)
+        self.on_command = on_command
+        self._connected = threading.Event()
+        self.published = 0
+
+        client_id = client_id or f"edge-{socket.gethostname()}"
+        if hasattr(paho_mqtt, "CallbackAPIVersion"):  # paho-mqtt 2.x
+            self.client = paho_mqtt.Client(paho_mqtt.CallbackAPIVersion.VERSION1, client_id=client_id,
+                                           clean_session=False)
+        else:
+            self.client = paho_mqtt.Client(client_id=client_id, clean_session=False)
+        if username:
+            self.client.username_pw_set(username, password)
+        self.client.reconnect_delay_set(min_delay=1, max_delay=120)
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.on_message = self._on_message
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], field_ids: List[str],
+                    on_command: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Optional["MQTTLink"]:
+        mqtt_config = config.get("mqtt", {})
+        if not mqtt_config.get("enable", False):
+            return None
+        if not MQTT_AVAILABLE:
+            logger.warning("mqtt.enable is set but paho-mqtt is not installed, using HTTP")
+            return None
+        return cls(
+            mqtt_config.get("host", "localhost"),
+            field_ids,
+            port=mqtt_config.get("port", 1883),
+            client_id=mqtt_config.get("client_id"),
+            keepalive=mqtt_config.get("keepalive_seconds", 60),
+            username=mqtt_config.get("username"),
+            password=mqtt_config.get("password"),
+            on_command=on_command,
+        )
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    def start(self):
+        """Connect in the background; paho reconnects on its own after drops."""
+        self.client.connect_async(self.host, self.port, keepalive=self.keepalive)
+        self.client.loop_start()
+
+    def _on_connect(self, client, userdata, flags, rc, *extra):
+        if rc != 0:
+            logger.warning(f"MQTT connection refused: {rc}")
+            return
+        client.subscribe([(f"{TOPIC_PREFIX}/{field_id}/commands", 1) for field_id in self.field_ids])
+        self._connected.set()
+        logger.info(f"MQTT connected to {self.host}:{self.port}")
+
+    def _on_disconnect(self, client, userdata, rc, *extra):
+        self._connected.clear()
+        if rc != 0:
+            logger.warning(f"MQTT connection lost ({rc}), reconnecting")
+
+    def _on_message(self, client, userdata, message):
+        parts = message.topic.split("/")
+        if len(parts) != 3 or parts[2] != "commands" or self.on_command is None:
+            return
+        try:
+            command = json.loads(message.payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed command on {message.topic}")
+            return
+        self.on_command(parts[1], command)
+
+    def publish_readings(self, payloads: List[Dict[str, Any]]) -> bool:
+        """
+        Publish readings, one message per field (a JSON list when a field has
+        several). Returns False if the link is down or any publish was refused.
+        """
+        if not self.connected:
+            return False
+        by_field = {}
+        for payload in payloads:
+            by_field.setdefault(payload["field_id"], []).append(payload)
+
+        for field_id, rows in by_field.items():
+            body = json.dumps(rows[0] if len(rows) == 1 else rows, separators=(",", ":"))
+            info = self.client.publish(f"{TOPIC_PREFIX}/{field_id}/readings", body, qos=1)
+            if info.rc != paho_mqtt.MQTT_ERR_SUCCESS:
+                logger.warning(f"MQTT publish failed: {paho_mqtt.error_string(info.rc)}")
+                return False
+            self.published += len(rows)
+        return True
+
+    def close(self):
+        self.client.loop_stop()
+        self.client.disconnect()
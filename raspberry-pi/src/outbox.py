@@ -0,0 +1,85 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+
+class Outbox:
+    """
+    Durable, append-only queue of readings waiting to be uploaded.
+
+    Backed by SQLite in WAL mode so a power cut loses at most the reading
+    being written. Size is bounded by ``max_rows``; when full, ``eviction``
+    decides whether the oldest buffered reading is dropped ("drop_oldest")
+    or the new one is rejected ("drop_newest").
+    """
+
+    EVICTION_POLICIES = ("drop_oldest", "drop_newest")
+
+    def __init__(self, path: str, max_rows: int = 20000, eviction: str = "drop_oldest"):
+        if eviction not in self.EVICTION_POLICIES:
+            raise ValueError(f"Unknown outbox eviction policy: {eviction}")
+        self.path = path
+        self.max_rows = max_rows
+        self.eviction = eviction
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL NOT NULL, payload TEXT NOT NULL)"
+        )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def append(self, payload: Dict[str, Any]) -> bool:
+        """Buffer one reading. Returns False if it was rejected because the outbox is full."""
+        with self._lock:
+            count = self.conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+            if count >= self.max_rows:
+                if self.eviction == "drop_newest":
+                    self.evicted += 1
+                    return False
+                excess = count - self.max_rows + 1
+                self.conn.execute(
+                    "DELETE FROM outbox WHERE id IN (SELECT id FROM outbox ORDER BY id LIMIT ?)",
+                    (excess,)
+                )
+                self.evicted += excess
+            self.conn.execute(
+                "INSERT INTO outbox (created_at, payload) VALUES (?, ?)",
+                (time.time(), json.dumps(payload, separators=(",", ":")))
+            )
+            return True
+
+    def peek(self, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """Return up to ``limit`` of the oldest buffered readings as (id, payload)."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, payload FROM outbox ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def ack(self, max_id: int):
+        """Remove every buffered reading up to and including ``max_id``."""
+        with self._lock:
+            self.conn.execute("DELETE FROM outbox WHERE id <= ?", (max_id,))
+
+    def compact(self):
+        """Fold the WAL back into the main database file to bound disk usage."""
+        with self._lock:
+            self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
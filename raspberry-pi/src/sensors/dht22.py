@@ -1,7 +1,9 @@
 from __future__ import annotations
 import time
 import random
-from typing import Tuple, Optional
+import threading
+from collections import deque
+from typing import List, NamedTuple, Tuple, Optional
 
 try:
     import adafruit_dht
@@ -32,41 +34,55 @@ class DHT22Sensor:
             except Exception:
                 self.sensor = None
 
-    def read_temperature_humidity(self, simulate: bool = False, retries: int = 3) -> Tuple[float, float]:
+    def read_once(self, simulate: bool = False) -> Optional[Tuple[float, float]]:
         """
-        Read temperature and humidity from DHT22.
-        Returns (temperature_c, humidity_percent).
+        Single read attempt. Returns (temperature_c, humidity_percent), or None
+        if the sensor is missing, failed or returned out-of-range values.
+        Values are only simulated when ``simulate`` is set.
         """
-        if simulate or not HW_AVAILABLE or not self.sensor:
+        if simulate:
             # Realistic simulation with some correlation
             temp = random.uniform(18, 35)
             # Humidity inversely correlated with temperature somewhat
             humidity_base = 85 - (temp - 18) * 1.5
             humidity = max(30, min(90, humidity_base + random.uniform(-10, 10)))
             return round(temp, 1), round(humidity, 1)
+        if not self.sensor:
+            # No library or no sensor: report it missing rather than invent data
+            return None
         
-        # Real sensor reading with retries
-        for attempt in range(retries):
-            try:
-                temperature = self.sensor.temperature
-                humidity = self.sensor.humidity
-                
-                if temperature is not None and humidity is not None:
-                    # Validate reasonable ranges
-                    if -40 <= temperature <= 80 and 0 <= humidity <= 100:
-                        return round(temperature, 1), round(humidity, 1)
-                
-            except RuntimeError as e:
-                # DHT sensors often need multiple attempts
-                if attempt < retries - 1:
-                    time.sleep(0.5)
-                    continue
-                else:
-                    # Fall back to simulation on repeated failures
-                    break
+        try:
+            temperature = self.sensor.temperature
+            humidity = self.sensor.humidity
+        except (RuntimeError, OSError):
+            # DHT sensors often fail a read; the caller decides when to retry
+            return None
         
-        # Fallback to simulation if sensor fails
-        return self.read_temperature_humidity(simulate=True)
+        # Validate reasonable ranges
+        if temperature is None or humidity is None:
+            return None
+        if not (-40 <= temperature <= 80 and 0 <= humidity <= 100):
+            return None
+        return round(temperature, 1), round(humidity, 1)
+
+    def read_temperature_humidity(
+        self, simulate: bool = False, retries: int = 3
+    ) -> Tuple[Optional[float], Optional[float]]:
+        """
+        Read temperature and humidity from DHT22.
+        Returns (temperature_c, humidity_percent), or (None, None) if every
+        retry failed.
+        """
+        if not simulate and not self.sensor:
+            return None, None
+        for attempt in range(retries):
+            reading = self.read_once(simulate)
+            if reading is not None:
+                return reading
+            # DHT sensors often need multiple attempts
+            if attempt < retries - 1:
+                time.sleep(0.5)
+        return None, None
 
     def cleanup(self):
         """Clean up sensor resources."""
@@ -74,6 +90,86 @@ class DHT22Sensor:
             self.sensor.exit()
 
 
+class DHT22Reading(NamedTuple):
+    temperature_c: Optional[float]
+    humidity: Optional[float]
+    age_seconds: Optional[float]
+    stale: bool
+
+
+class DHT22Sampler:
+    """
+    Polls a DHT22 from a background thread and caches recent good readings,
+    so callers get the last good value instantly instead of waiting on retries.
+    Failed reads are skipped, never replaced with made-up values.
+    """
+    
+    MIN_INTERVAL = 2.0  # The DHT22 cannot be read more often than every 2s
+    
+    def __init__(
+        self,
+        sensor: DHT22Sensor,
+        interval: float = 3.0,
+        history: int = 32,
+        max_age: float = 60.0,
+        simulate: bool = False
+    ):
+        self.sensor = sensor
+        self.interval = max(interval, self.MIN_INTERVAL)
+        self.max_age = max_age
+        self.simulate = simulate
+        self.consecutive_failures = 0
+        self._readings = deque(maxlen=history)  # (monotonic time, temperature_c, humidity)
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=f"dht22-{self.sensor.pin}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Block until the first good reading arrives or the timeout expires."""
+        return self._ready.wait(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            reading = self.sensor.read_once(self.simulate)
+            if reading is None:
+                self.consecutive_failures += 1
+            else:
+                with self._lock:
+                    self._readings.append((time.monotonic(), *reading))
+                self.consecutive_failures = 0
+                self._ready.set()
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def latest(self) -> DHT22Reading:
+        """Most recent good reading, flagged stale once older than max_age."""
+        with self._lock:
+            if not self._readings:
+                return DHT22Reading(None, None, None, True)
+            taken_at, temperature, humidity = self._readings[-1]
+        age = time.monotonic() - taken_at
+        return DHT22Reading(temperature, humidity, age, age > self.max_age)
+
+    def history(self) -> List[Tuple[float, float, float]]:
+        """Recent good readings as (age_seconds, temperature_c, humidity), oldest first."""
+        now = time.monotonic()
+        with self._lock:
+            return [(now - taken_at, temperature, humidity) for taken_at, temperature, humidity in self._readings]
+
+
 # Legacy function for backward compatibility
 def read_dht22(pin: int = 4, simulate: bool = False) -> Tuple[float, float]:
     """Legacy function - creates temporary sensor instance."""
@@ -1,6 +1,7 @@
 from __future__ import annotations
+import statistics
 import time
-from typing import Optional
+from typing import List, Optional
 
 try:
     import spidev
@@ -12,65 +13,128 @@ except ImportError:
 import random
 
 
+def open_spi(spi_bus: int = 0, spi_device: int = 0):
+    """Open the MCP3008 SPI device, or return None without hardware."""
+    if not HW_AVAILABLE:
+        return None
+    try:
+        spi = spidev.SpiDev()
+        spi.open(spi_bus, spi_device)
+        spi.max_speed_hz = 1000000
+        return spi
+    except Exception:
+        return None
+
+
+FILTERS = ("median", "trimmed_mean")
+
+
+def filter_samples(samples: List[int], method: str = "median", trim_fraction: float = 0.2) -> float:
+    """Reduce a burst of ADC samples to one value, discarding outliers."""
+    if method == "median":
+        return float(statistics.median(samples))
+    if method == "trimmed_mean":
+        ordered = sorted(samples)
+        cut = int(len(ordered) * trim_fraction)
+        kept = ordered[cut:len(ordered) - cut] or ordered
+        return sum(kept) / len(kept)
+    raise ValueError(f"Unknown filter: {method}")
+
+
 class SoilMoistureSensor:
     """Soil moisture sensor using MCP3008 ADC."""
     
-    def __init__(self, spi_bus: int = 0, spi_device: int = 0, channel: int = 0):
+    def __init__(
+        self,
+        spi_bus: int = 0,
+        spi_device: int = 0,
+        channel: int = 0,
+        spi=None,
+        oversample: int = 1,
+        filter_method: str = "median",
+        trim_fraction: float = 0.2,
+        dry_value: int = 1023,
+        wet_value: int = 300
+    ):
+        """
+        Pass an open `spi` handle to share one MCP3008 between several sensors.
+        dry_value/wet_value are the ADC readings in completely dry and saturated
+        soil; calibrate them for each probe.
+        """
+        if filter_method not in FILTERS:
+            raise ValueError(f"filter_method must be one of {FILTERS}")
+        if dry_value == wet_value:
+            raise ValueError("dry_value and wet_value must differ")
         self.channel = channel
-        self.spi = None
-        
-        if HW_AVAILABLE:
-            try:
-                self.spi = spidev.SpiDev()
-                self.spi.open(spi_bus, spi_device)
-                self.spi.max_speed_hz = 1000000
-            except Exception:
-                self.spi = None
+        self.oversample = max(1, int(oversample))
+        self.filter_method = filter_method
+        self.trim_fraction = trim_fraction
+        self.dry_value = dry_value
+        self.wet_value = wet_value
+        self._command = [1, (8 + channel) << 4, 0]
+        self._owns_spi = spi is None
+        self.spi = open_spi(spi_bus, spi_device) if spi is None else spi
 
     def _read_adc(self) -> int:
         """Read raw ADC value from MCP3008."""
         if not self.spi:
             return 0
         
-        # MCP3008 command for single-ended read
-        command = [1, (8 + self.channel) << 4, 0]
-        response = self.spi.xfer2(command)
+        response = self.spi.xfer2(list(self._command))  # xfer2 overwrites its argument
         
         # Extract 10-bit value
         value = ((response[1] & 3) << 8) + response[2]
         return value
 
-    def read_moisture_percentage(self, simulate: bool = False) -> float:
+    def _read_adc_filtered(self) -> float:
+        """
+        Take `oversample` conversions and filter them.
+        The MCP3008 needs chip-select toggled per conversion, so each one is its
+        own xfer2 call, issued back to back on the open handle (~30us each at 1 MHz).
+        """
+        if self.oversample == 1:
+            return float(self._read_adc())
+        if not self.spi:
+            return 0.0
+        
+        xfer2 = self.spi.xfer2
+        command = self._command
+        samples = []
+        for _ in range(self.oversample):
+            response = xfer2(list(command))  # xfer2 overwrites its argument
+            samples.append(((response[1] & 3) << 8) + response[2])
+        return filter_samples(samples, self.filter_method, self.trim_fraction)
+
+    def read_moisture_percentage(self, simulate: bool = False) -> Optional[float]:
         """
         Read soil moisture as percentage (0-100).
-        Higher percentage = more moisture.
+        Higher percentage = more moisture. Returns None when the ADC is not
+        available, unless simulating.
         """
-        if simulate or not HW_AVAILABLE or not self.spi:
+        if simulate:
             # Simulation: realistic varying moisture
             base = random.uniform(25, 65)
             noise = random.uniform(-3, 3)
             return max(0.0, min(100.0, base + noise))
+        if not self.spi:
+            return None
         
         # Real sensor reading
-        raw_value = self._read_adc()
+        raw_value = self._read_adc_filtered()
         
         # Calibration: convert 10-bit ADC (0-1023) to moisture %
-        # These values need calibration for your specific sensor
-        dry_value = 1023    # ADC reading in completely dry soil
-        wet_value = 300     # ADC reading in saturated soil
-        
         # Convert to percentage (inverted because lower ADC = more moisture)
-        moisture_percent = ((dry_value - raw_value) / (dry_value - wet_value)) * 100
+        moisture_percent = ((self.dry_value - raw_value) / (self.dry_value - self.wet_value)) * 100
         return max(0.0, min(100.0, moisture_percent))
 
     def cleanup(self):
         """Clean up SPI connection."""
-        if self.spi:
+        if self.spi and self._owns_spi:
             self.spi.close()
 
 
 # Legacy function for backward compatibility
-def read_soil_moisture(adc_channel: int = 0, simulate: bool = False) -> float:
+def read_soil_moisture(adc_channel: int = 0, simulate: bool = False) -> Optional[float]:
     """Legacy function - creates temporary sensor instance."""
     sensor = SoilMoistureSensor(channel=adc_channel)
     try:
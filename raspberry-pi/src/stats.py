@@ -0,0 +1,166 @@
+"""
+Fixed-size rolling statistics for edge decisions.
+
+RingBuffer keeps the last N (timestamp, value) samples in two preallocated
+float arrays and maintains running sums, so mean, variance and the
+least-squares slope cost amortised O(1) per sample, with memory fixed at
+16 bytes per slot.
+"""
+from __future__ import annotations
+import math
+from array import array
+from typing import Optional
+
+
+class RingBuffer:
+    """Array-backed ring buffer of timestamped samples with O(1) rolling statistics."""
+
+    def __init__(self, capacity: int):
+        if capacity < 2:
+            raise ValueError("capacity must be at least 2")
+        self.capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        self._head = 0  # Next slot to write
+        self._count = 0
+        # Times are stored relative to an origin to keep the squared sums small
+        self._origin = None
+        self._pushes = 0
+        self._reset_sums()
+
+    def _reset_sums(self):
+        self._sum_t = self._sum_v = 0.0
+        self._sum_tt = self._sum_vv = self._sum_tv = 0.0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+        self._origin = None
+        self._reset_sums()
+
+    def append(self, timestamp: float, value: float):
+        """Add a sample (timestamp in seconds), evicting the oldest when full."""
+        if self._origin is None:
+            self._origin = timestamp
+        t = timestamp - self._origin
+
+        if self._count == self.capacity:
+            old_t = self._times[self._head]
+            old_v = self._values[self._head]
+            self._sum_t -= old_t
+            self._sum_v -= old_v
+            self._sum_tt -= old_t * old_t
+            self._sum_vv -= old_v * old_v
+            self._sum_tv -= old_t * old_v
+        else:
+            self._count += 1
+
+        self._times[self._head] = t
+        self._values[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        self._sum_t += t
+        self._sum_v += value
+        self._sum_tt += t * t
+        self._sum_vv += value * value
+        self._sum_tv += t * value
+
+        # Recompute the sums once per lap so rounding errors from evictions can't accumulate
+        self._pushes += 1
+        if self._pushes >= self.capacity:
+            self._pushes = 0
+            self._rebase()
+
+    def _rebase(self):
+        """Shift the time origin to the oldest sample and recompute sums exactly."""
+        start = (self._head - self._count) % self.capacity
+        shift = self._times[start]
+        self._origin += shift
+        self._reset_sums()
+        for i in range(self._count):
+            slot = (start + i) % self.capacity
+            t = self._times[slot] - shift
+            v = self._values[slot]
+            self._times[slot] = t
+            self._sum_t += t
+            self._sum_v += v
+            self._sum_tt += t * t
+            self._sum_vv += v * v
+            self._sum_tv += t * v
+
+    def last(self) -> Optional[float]:
+        if not self._count:
+            return None
+        return self._values[(self._head - 1) % self.capacity]
+
+    def last_time(self) -> Optional[float]:
+        if not self._count:
+            return None
+        return self._times[(self._head - 1) % self.capacity] + self._origin
+
+    def mean(self) -> Optional[float]:
+        if not self._count:
+            return None
+        return self._sum_v / self._count
+
+    def mean_time(self) -> Optional[float]:
+        if not self._count:
+            return None
+        return self._sum_t / self._count + self._origin
+
+    def variance(self) -> Optional[float]:
+        """Sample variance of the values."""
+        if self._count < 2:
+            return None
+        n = self._count
+        return max(0.0, (self._sum_vv - self._sum_v * self._sum_v / n) / (n - 1))
+
+    def stdev(self) -> Optional[float]:
+        variance = self.variance()
+        return None if variance is None else math.sqrt(variance)
+
+    def slope(self) -> Optional[float]:
+        """Least-squares slope of value over time, in units per second."""
+        if self._count < 2:
+            return None
+        n = self._count
+        denominator = self._sum_tt - self._sum_t * self._sum_t / n
+        if denominator <= 0:
+            return None
+        return (self._sum_tv - self._sum_t * self._sum_v / n) / denominator
+
+    def residual_stdev(self) -> Optional[float]:
+        """Standard deviation of the values around the fitted line (noise, with the trend removed)."""
+        if self._count < 3:
+            return None
+        n = self._count
+        slope = self.slope()
+        if slope is None:
+            return None
+        explained = slope * (self._sum_tv - self._sum_t * self._sum_v / n)
+        residual = self._sum_vv - self._sum_v * self._sum_v / n - explained
+        return math.sqrt(max(0.0, residual) / (n - 2))
+
+    def predict(self, timestamp: float) -> Optional[float]:
+        """Value of the least-squares line at a timestamp."""
+        slope = self.slope()
+        if slope is None:
+            return None
+        return self.mean() + slope * (timestamp - self.mean_time())
+
+    def trailing_below(self, threshold: float, limit: int, since: Optional[float] = None) -> int:
+        """
+        Count consecutive newest samples below threshold, stopping at `limit`
+        or at samples older than `since`. Cost is O(limit).
+        """
+        run = 0
+        for i in range(1, min(limit, self._count) + 1):
+            slot = (self._head - i) % self.capacity
+            if since is not None and self._times[slot] + self._origin < since:
+                break
+            if self._values[slot] >= threshold:
+                break
+            run += 1
+        return run
@@ -0,0 +1,50 @@
+"""
+Compact binary encoding of readings for the backend's
+application/x-irrigation-readings parser (backend/sensors/wire.py).
+
+Field metadata is registered once per session; each reading is then 11 bytes:
+epoch seconds, field index, and moisture/temperature/humidity as int16
+hundredths, with -32768 for a missing value.
+"""
+from __future__ import annotations
+import struct
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+CONTENT_TYPE = "application/x-irrigation-readings"
+MAGIC = b"IR"
+VERSION = 1
+HEADER = struct.Struct("<2sBBIH")
+RECORD = struct.Struct("<IBhhh")
+MISSING = -32768
+SCALE = 100
+MAX_RECORDS = 65535
+
+
+def _scale(value: Optional[float]) -> int:
+    if value is None:
+        return MISSING
+    return max(-32767, min(32767, round(value * SCALE)))
+
+
+def encode_readings(session_id: int, field_index: Dict[str, int], payloads: List[Dict[str, Any]]) -> bytes:
+    """
+    Encode reading payloads as one frame.
+    Raises KeyError for a field that is not part of the session.
+    """
+    if len(payloads) > MAX_RECORDS:
+        raise ValueError(f"At most {MAX_RECORDS} readings per frame")
+    body = bytearray(HEADER.size + RECORD.size * len(payloads))
+    HEADER.pack_into(body, 0, MAGIC, VERSION, 0, session_id, len(payloads))
+    offset = HEADER.size
+    for payload in payloads:
+        RECORD.pack_into(
+            body, offset,
+            int(datetime.fromisoformat(payload["timestamp"]).timestamp()),
+            field_index[payload["field_id"]],
+            _scale(payload["moisture"]),
+            _scale(payload.get("temperature_c")),
+            _scale(payload.get("humidity")),
+        )
+        offset += RECORD.size
+    return bytes(body)
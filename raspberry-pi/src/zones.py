@@ -0,0 +1,123 @@
+"""
+Irrigation zones for running several fields from one Pi.
+
+Each zone has its own MCP3008 channel, relay, field_id and threshold. All soil
+channels share one SPI handle and are read one after another, one transfer per
+conversion; DHT22 sensors are shared between zones on the same pin.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Optional
+
+from stats import RingBuffer
+from sensors.soil_moisture import SoilMoistureSensor, open_spi
+from sensors.dht22 import DHT22Sensor
+from controllers.relay_control import RelayController
+
+
+class Zone:
+    """One irrigated field with its own sensor channel, relay and decision state."""
+    
+    def __init__(
+        self,
+        field_id: str,
+        soil_sensor: SoilMoistureSensor,
+        relay: RelayController,
+        dht_sensor: DHT22Sensor,
+        threshold: float,
+        crop_stage: Optional[str] = None,
+        location: Optional[str] = None,
+        history_samples: int = 24
+    ):
+        self.field_id = field_id
+        self.soil_sensor = soil_sensor
+        self.relay = relay
+        self.dht_sensor = dht_sensor
+        self.threshold = threshold
+        self.crop_stage = crop_stage
+        self.location = location
+        
+        # Decision state
+        self.history = RingBuffer(history_samples)  # (epoch seconds, moisture %)
+        self.last_irrigation = None
+        self.irrigation_count_today = 0
+        self.irrigation_task = None
+        
+        # Deadband reporting state
+        self.last_reported = None
+        self.last_reported_at = 0.0
+        
+        # MQTT: a pushed decision is accepted until this time.monotonic() deadline
+        self.command_deadline = None
+
+    def payload(
+        self, moisture: float, temperature_c: Optional[float], humidity: Optional[float], timestamp: str
+    ) -> Dict[str, Any]:
+        """Reading payload for the backend API."""
+        return {
+            "field_id": self.field_id,
+            "crop_stage": self.crop_stage,
+            "location": self.location,
+            "moisture": moisture,
+            "temperature_c": temperature_c,
+            "humidity": humidity,
+            "timestamp": timestamp
+        }
+
+
+def build_zones(config: Dict[str, Any]):
+    """
+    Create zones from the `zones` config list, or one zone from the top-level
+    single-field keys. Returns (zones, spi_handle).
+    """
+    sensor_config = config.get("sensor", {})
+    spi = open_spi(sensor_config.get("spi_bus", 0), sensor_config.get("spi_device", 0))
+    default_dht_pin = sensor_config.get("dht22_pin", 4)
+    dht_sensors: Dict[int, DHT22Sensor] = {}
+    
+    zone_configs = config.get("zones") or [{
+        "field_id": config.get("field_id"),
+        "adc_channel": sensor_config.get("soil_moisture_adc_channel", 0),
+        "relay_gpio_pin": config.get("relay_gpio_pin", 18),
+    }]
+    
+    zones = []
+    for zone_config in zone_configs:
+        dht_pin = zone_config.get("dht22_pin", default_dht_pin)
+        if dht_pin not in dht_sensors:
+            dht_sensors[dht_pin] = DHT22Sensor(pin=dht_pin)
+        zones.append(Zone(
+            field_id=zone_config["field_id"],
+            soil_sensor=SoilMoistureSensor(
+                channel=zone_config.get("adc_channel", 0),
+                spi=spi,
+                oversample=sensor_config.get("oversample", 1),
+                filter_method=sensor_config.get("filter", "median"),
+                trim_fraction=sensor_config.get("trim_fraction", 0.2),
+                dry_value=zone_config.get("dry_value", sensor_config.get("dry_value", 1023)),
+                wet_value=zone_config.get("wet_value", sensor_config.get("wet_value", 300))
+            ),
+            relay=RelayController(pin=zone_config["relay_gpio_pin"]),
+            dht_sensor=dht_sensors[dht_pin],
+            threshold=zone_config.get("moisture_threshold", config.get("moisture_threshold", 35)),
+            crop_stage=zone_config.get("crop_stage", config.get("crop_stage")),
+            location=zone_config.get("location", config.get("location")),
+            history_samples=config.get("offline_mode", {}).get("history_samples", 24)
+        ))
+    return zones, spi
+
+
+def unique_dht_sensors(zones: List[Zone]) -> List[DHT22Sensor]:
+    """DHT22 sensors in zone order, each listed once."""
+    sensors = []
+    for zone in zones:
+        if zone.dht_sensor not in sensors:
+            sensors.append(zone.dht_sensor)
+    return sensors
+
+
+def read_soil_channels(zones: List[Zone], simulate: bool = False) -> List[Optional[float]]:
+    """
+    Read every zone's soil channel in turn over the shared SPI handle; None for
+    a channel whose ADC is unavailable.
+    """
+    return [zone.soil_sensor.read_moisture_percentage(simulate) for zone in zones]
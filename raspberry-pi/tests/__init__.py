@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The agent runs from src/ with its modules imported top-level
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+import yaml
+
+import main
+
+
+class FakeSoilSensor:
+    def __init__(self, moisture=None):
+        self.moisture = moisture
+        self.reads = 0
+
+    def read_moisture_percentage(self, simulate=False):
+        self.reads += 1
+        return self.moisture
+
+    def cleanup(self):
+        pass
+
+
+class AgentTestCase(unittest.TestCase):
+    config = {}
+
+    def setUp(self):
+        logger = main.logger
+        level = logger.level
+        logger.setLevel("CRITICAL")
+        self.addCleanup(logger.setLevel, level)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        config = {
+            "moisture_threshold": 35,
+            "outbox": {"enable": False},
+            "zones": [
+                {"field_id": "north", "adc_channel": 0, "relay_gpio_pin": 17},
+                {"field_id": "south", "adc_channel": 1, "relay_gpio_pin": 27},
+            ],
+        }
+        config.update(self.config)
+        path = os.path.join(tmp.name, "config.yaml")
+        with open(path, "w", encoding="utf-8") as f:
+            yaml.safe_dump(config, f)
+        self.agent = main.IrrigationAgent(path)
+        self.north, self.south = self.agent.zones
+
+    def payload(self, zone, moisture, minutes=0, temperature_c=20.0, humidity=60.0):
+        timestamp = (datetime(2026, 5, 1, 6) + timedelta(minutes=minutes)).isoformat()
+        return zone.payload(moisture, temperature_c, humidity, timestamp)
+
+
+class DeadbandTests(AgentTestCase):
+    config = {"reporting": {"deadband": {"enable": True, "moisture": 1.0, "temperature_c": 0.5,
+                                         "humidity": 2.0, "heartbeat_seconds": 1800}}}
+
+    def test_unchanged_readings_are_suppressed(self):
+        zone = self.north
+        self.assertTrue(self.agent.should_report(zone, self.payload(zone, 50.0)))
+        self.assertFalse(self.agent.should_report(zone, self.payload(zone, 50.5, minutes=5)))
+        self.assertFalse(self.agent.should_report(zone, self.payload(zone, 50.9, minutes=10, humidity=61.5)))
+        self.assertEqual(self.agent.readings_suppressed, 2)
+
+    def test_changes_dry_zones_and_heartbeats_are_reported(self):
+        zone = self.north
+        self.agent.should_report(zone, self.payload(zone, 50.0))
+        # Moved beyond its band, measured against the last reported value
+        self.assertTrue(self.agent.should_report(zone, self.payload(zone, 51.0, minutes=5)))
+        self.assertFalse(self.agent.should_report(zone, self.payload(zone, 51.5, minutes=10)))
+        self.assertTrue(self.agent.should_report(zone, self.payload(zone, 51.5, minutes=15, temperature_c=None)))
+        # Heartbeat elapsed since the last report
+        self.assertTrue(self.agent.should_report(zone, self.payload(zone, 51.5, minutes=45, temperature_c=None)))
+        # Dry zones are always reported
+        self.agent.should_report(zone, self.payload(zone, 34.0, minutes=50))
+        self.assertTrue(self.agent.should_report(zone, self.payload(zone, 34.0, minutes=55)))
+
+    def test_zones_have_their_own_deadband(self):
+        self.agent.should_report(self.north, self.payload(self.north, 50.0))
+        self.assertTrue(self.agent.should_report(self.south, self.payload(self.south, 50.2)))
+
+    def test_suppressed_cycles_are_not_sent(self):
+        first = [self.payload(self.north, 50.0), self.payload(self.south, 60.0)]
+        second = [self.payload(self.north, 50.2, minutes=5), self.payload(self.south, 45.0, minutes=5)]
+        with mock.patch.object(self.agent, "fetch_decisions", side_effect=[["SKIP", "SKIP"], ["SKIP"]]) as fetch:
+            self.assertEqual(self.agent.decide(first), ["SKIP", "SKIP"])
+            self.assertEqual(self.agent.decide(second), [None, "SKIP"])
+            self.assertEqual(self.agent.decide([self.payload(self.north, 50.0, minutes=10)]), [None])
+        self.assertEqual([call.args[0] for call in fetch.call_args_list], [first, second[1:]])
+
+
+class IrrigationTaskTests(AgentTestCase):
+    config = {"min_irrigation_run_seconds": 0.05, "max_irrigation_run_seconds": 30}
+
+    def run_async(self, coro):
+        async def runner():
+            self.agent.sensor_lock = asyncio.Lock()
+            return await coro()
+        return asyncio.run(asyncio.wait_for(runner(), 5))
+
+    def test_zones_irrigate_as_independent_tasks(self):
+        self.agent.config["min_irrigation_run_seconds"] = 0.2
+
+        async def scenario():
+            self.agent.start_irrigation(self.north, "test")
+            await asyncio.sleep(0.1)
+            self.agent.start_irrigation(self.south, "test")
+            task = self.north.irrigation_task
+            self.agent.start_irrigation(self.north, "again")
+            self.assertIs(self.north.irrigation_task, task)
+            await asyncio.sleep(0.01)
+            self.assertTrue(self.north.relay.state() and self.south.relay.state())
+            await self.north.irrigation_task
+            self.assertFalse(self.north.relay.state())
+            self.assertTrue(self.south.relay.state())
+            await self.south.irrigation_task
+            self.assertFalse(self.south.relay.state())
+        self.run_async(scenario)
+        self.assertEqual((self.north.irrigation_count_today, self.south.irrigation_count_today), (1, 1))
+
+    def test_cancelling_turns_the_relay_off(self):
+        self.agent.config["min_irrigation_run_seconds"] = 30
+
+        async def scenario():
+            self.agent.start_irrigation(self.north, "test")
+            await asyncio.sleep(0.02)
+            self.assertTrue(self.north.relay.state())
+            self.north.irrigation_task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await self.north.irrigation_task
+        self.run_async(scenario)
+        self.assertFalse(self.north.relay.state())
+
+    def test_runs_the_minimum_time_without_stop_on_recovery(self):
+        self.north.soil_sensor = FakeSoilSensor(20.0)
+
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            self.agent.start_irrigation(self.north, "test")
+            await self.north.irrigation_task
+            return loop.time() - started
+        self.assertLess(self.run_async(scenario), 1.0)
+        self.assertEqual(self.north.soil_sensor.reads, 0)
+
+    def test_stop_on_recovery_stops_once_moisture_recovers(self):
+        self.agent.config["irrigation"] = {"stop_on_recovery": True, "recovery_check_seconds": 0.01}
+        self.north.soil_sensor = FakeSoilSensor(45.0)
+
+        async def scenario():
+            self.agent.start_irrigation(self.north, "test")
+            await self.north.irrigation_task
+        self.run_async(scenario)
+        self.assertGreaterEqual(self.north.soil_sensor.reads, 1)
+        self.assertFalse(self.north.relay.state())
+
+    def test_stop_on_recovery_runs_on_without_a_soil_reading(self):
+        self.agent.config["max_irrigation_run_seconds"] = 0.15
+        self.agent.config["irrigation"] = {"stop_on_recovery": True, "recovery_check_seconds": 0.01}
+        self.north.soil_sensor = FakeSoilSensor(None)
+
+        async def scenario():
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            self.agent.start_irrigation(self.north, "test")
+            await self.north.irrigation_task
+            return loop.time() - started
+        self.assertGreaterEqual(self.run_async(scenario), 0.15)
+        self.assertGreater(self.north.soil_sensor.reads, 1)
+
+
+class ReadSensorsTests(AgentTestCase):
+    def test_zones_without_a_soil_reading_are_skipped(self):
+        self.north.soil_sensor = FakeSoilSensor(None)
+        self.south.soil_sensor = FakeSoilSensor(42.0)
+        climate = main.DHT22Sampler(self.south.dht_sensor).latest()
+        self.agent.dht_samplers = {id(self.south.dht_sensor): mock.Mock(latest=mock.Mock(return_value=climate))}
+
+        async def scenario():
+            self.agent.sensor_lock = asyncio.Lock()
+            return await self.agent.read_sensors()
+        payloads = asyncio.run(scenario())
+        self.assertEqual([(p["field_id"], p["moisture"]) for p in payloads], [("south", 42.0)])
@@ -0,0 +1,112 @@
+import gzip
+import json
+import socket
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from http_client import BackendClient
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _respond(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length)
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        self.server.received.append((self.command, self.path, body))
+        status, headers, delay = self.server.script.pop(0) if self.server.script else (200, {}, 0)
+        if delay:
+            time.sleep(delay)
+        reply = b"{}"
+        try:
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+        except OSError:
+            pass  # The client gave up waiting
+
+    do_GET = do_POST = _respond
+
+    def log_message(self, format, *args):
+        pass
+
+
+class BackendClientTests(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.daemon_threads = True
+        self.server.script = []
+        self.server.received = []
+        thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.client = self.make_client(f"http://127.0.0.1:{self.server.server_address[1]}")
+
+    def make_client(self, base_url, **kwargs):
+        options = {"timeout": 2, "retries": 2, "backoff_base": 0.01, "backoff_max": 0.05}
+        options.update(kwargs)
+        client = BackendClient(base_url, **options)
+        self.addCleanup(client.close)
+        return client
+
+    def test_post_is_not_retried_on_bad_gateway(self):
+        self.server.script = [(502, {}, 0)] * 3
+        response = self.client.post_json("/api/readings/bulk/", [{"moisture": 1}])
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(len(self.server.received), 1)
+        self.assertEqual(self.client.retries_used, 0)
+
+    def test_post_is_not_retried_after_a_read_timeout(self):
+        client = self.make_client(self.client.base_url, timeout=0.2)
+        self.server.script = [(201, {}, 0.5)] * 3
+        with self.assertRaises(requests.ReadTimeout):
+            client.post_json("/api/readings/", {"moisture": 1})
+        self.assertEqual(len(self.server.received), 1)
+
+    def test_post_is_retried_on_503_with_retry_after(self):
+        self.server.script = [(503, {"Retry-After": "0"}, 0), (201, {}, 0)]
+        response = self.client.post_json("/api/readings/", {"moisture": 1})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.server.received), 2)
+        self.assertEqual(self.client.retries_used, 1)
+
+    def test_post_is_not_retried_on_503_without_retry_after(self):
+        self.server.script = [(503, {}, 0), (201, {}, 0)]
+        self.assertEqual(self.client.post_json("/api/readings/", {"moisture": 1}).status_code, 503)
+        self.assertEqual(len(self.server.received), 1)
+
+    def test_post_is_retried_when_the_connection_is_refused(self):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            port = sock.getsockname()[1]
+        client = self.make_client(f"http://127.0.0.1:{port}")
+        with self.assertRaises(requests.ConnectionError):
+            client.post_json("/api/readings/", {"moisture": 1})
+        self.assertEqual(client.requests_sent, 3)
+        self.assertEqual(client.retries_used, 2)
+
+    def test_get_is_retried_on_bad_gateway(self):
+        self.server.script = [(502, {}, 0), (504, {}, 0), (200, {}, 0)]
+        self.assertEqual(self.client.get("/api/fields/config/").status_code, 200)
+        self.assertEqual(len(self.server.received), 3)
+
+    def test_session_is_kept_alive_and_large_bodies_compressed(self):
+        payloads = [{"field_id": "f1", "moisture": 30.0 + i} for i in range(50)]
+        for _ in range(3):
+            self.client.post_json("/api/readings/bulk/", payloads)
+        self.assertEqual(json.loads(self.server.received[0][2]), payloads)
+        stats = self.client.stats()
+        self.assertEqual((stats["requests"], stats["connections_opened"]), (3, 1))
+        self.assertLess(stats["bytes_sent"], stats["bytes_raw"])
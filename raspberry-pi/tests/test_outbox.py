@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from outbox import Outbox
+
+
+class OutboxTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "data", "outbox.db")
+
+    def open(self, **kwargs):
+        outbox = Outbox(self.path, **kwargs)
+        self.addCleanup(outbox.close)
+        return outbox
+
+    def test_readings_survive_reopening(self):
+        outbox = self.open()
+        for moisture in (10, 20, 30):
+            self.assertTrue(outbox.append({"field_id": "f1", "moisture": moisture}))
+        outbox.close()
+
+        reopened = self.open()
+        self.assertEqual(len(reopened), 3)
+        self.assertEqual([payload["moisture"] for _, payload in reopened.peek(10)], [10, 20, 30])
+
+    def test_replay_in_order_and_ack(self):
+        outbox = self.open()
+        for moisture in range(5):
+            outbox.append({"moisture": moisture})
+        batch = outbox.peek(2)
+        self.assertEqual([payload["moisture"] for _, payload in batch], [0, 1])
+        outbox.ack(batch[-1][0])
+        self.assertEqual([payload["moisture"] for _, payload in outbox.peek(10)], [2, 3, 4])
+        outbox.compact()
+        self.assertEqual(len(outbox), 3)
+
+    def test_drop_oldest_evicts_the_oldest_reading(self):
+        outbox = self.open(max_rows=3)
+        for moisture in range(5):
+            self.assertTrue(outbox.append({"moisture": moisture}))
+        self.assertEqual([payload["moisture"] for _, payload in outbox.peek(10)], [2, 3, 4])
+        self.assertEqual(outbox.evicted, 2)
+
+    def test_drop_newest_rejects_when_full(self):
+        outbox = self.open(max_rows=2, eviction="drop_newest")
+        results = [outbox.append({"moisture": moisture}) for moisture in range(3)]
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual([payload["moisture"] for _, payload in outbox.peek(10)], [0, 1])
+        self.assertEqual(outbox.evicted, 1)
+
+    def test_unknown_eviction_policy(self):
+        with self.assertRaises(ValueError):
+            Outbox(self.path, eviction="drop_random")
@@ -0,0 +1,53 @@
+import statistics
+import unittest
+
+from stats import RingBuffer
+
+
+class RingBufferTests(unittest.TestCase):
+    def test_capacity_must_hold_two_samples(self):
+        with self.assertRaises(ValueError):
+            RingBuffer(1)
+
+    def test_empty_buffer_has_no_statistics(self):
+        buffer = RingBuffer(4)
+        self.assertEqual(len(buffer), 0)
+        for value in (buffer.last(), buffer.mean(), buffer.variance(), buffer.slope(), buffer.predict(0)):
+            self.assertIsNone(value)
+
+    def test_keeps_only_the_newest_samples(self):
+        buffer = RingBuffer(3)
+        for i, value in enumerate([50.0, 40.0, 30.0, 20.0, 10.0]):
+            buffer.append(1000.0 + i * 60, value)
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual(buffer.last(), 10.0)
+        self.assertEqual(buffer.last_time(), 1240.0)
+        self.assertAlmostEqual(buffer.mean(), 20.0)
+        self.assertAlmostEqual(buffer.variance(), statistics.variance([30.0, 20.0, 10.0]))
+
+    def test_slope_and_prediction_of_a_linear_decline(self):
+        buffer = RingBuffer(8)
+        # Falling 2% per hour, sampled every 5 minutes
+        for i in range(20):
+            buffer.append(1_700_000_000 + i * 300, 60.0 - i * 300 * 2 / 3600)
+        self.assertAlmostEqual(buffer.slope() * 3600, -2.0)
+        self.assertAlmostEqual(buffer.residual_stdev(), 0.0, places=4)
+        self.assertAlmostEqual(buffer.predict(buffer.last_time() + 3600), buffer.last() - 2.0)
+
+    def test_running_sums_stay_exact_over_many_laps(self):
+        buffer = RingBuffer(5)
+        values = [(i * 37) % 11 + 0.1 * i for i in range(1003)]
+        for i, value in enumerate(values):
+            buffer.append(1_700_000_000 + i * 300, value)
+        window = values[-5:]
+        self.assertAlmostEqual(buffer.mean(), statistics.mean(window), places=9)
+        self.assertAlmostEqual(buffer.stdev(), statistics.stdev(window), places=9)
+
+    def test_trailing_below(self):
+        buffer = RingBuffer(6)
+        for i, value in enumerate([20.0, 40.0, 30.0, 25.0, 28.0]):
+            buffer.append(i * 60.0, value)
+        self.assertEqual(buffer.trailing_below(35.0, 10), 3)
+        self.assertEqual(buffer.trailing_below(35.0, 2), 2)
+        self.assertEqual(buffer.trailing_below(35.0, 10, since=180.0), 2)
+        self.assertEqual(buffer.trailing_below(26.0, 10), 0)
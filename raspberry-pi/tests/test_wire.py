@@ -0,0 +1,31 @@
+import unittest
+from datetime import datetime
+
+import wire
+
+
+class EncodeReadingsTests(unittest.TestCase):
+    def test_frame_layout(self):
+        timestamp = "2026-05-01T06:30:00"
+        body = wire.encode_readings(7, {"f1": 0, "f2": 1}, [
+            {"field_id": "f2", "timestamp": timestamp, "moisture": 31.456, "temperature_c": -2.5, "humidity": None},
+            {"field_id": "f1", "timestamp": timestamp, "moisture": 400.0},
+        ])
+        self.assertEqual(len(body), wire.HEADER.size + 2 * wire.RECORD.size)
+        self.assertEqual(wire.HEADER.unpack_from(body, 0), (wire.MAGIC, wire.VERSION, 0, 7, 2))
+        epoch = int(datetime.fromisoformat(timestamp).timestamp())
+        records = list(wire.RECORD.iter_unpack(body[wire.HEADER.size:]))
+        self.assertEqual(records, [
+            (epoch, 1, 3146, -250, wire.MISSING),
+            # Out-of-range values are clamped rather than colliding with MISSING
+            (epoch, 0, 32767, wire.MISSING, wire.MISSING),
+        ])
+
+    def test_unknown_field(self):
+        with self.assertRaises(KeyError):
+            wire.encode_readings(1, {"f1": 0}, [{"field_id": "f9", "timestamp": "2026-05-01T06:30:00", "moisture": 1}])
+
+    def test_frame_size_limit(self):
+        payload = {"field_id": "f1", "timestamp": "2026-05-01T06:30:00", "moisture": 1}
+        with self.assertRaises(ValueError):
+            wire.encode_readings(1, {"f1": 0}, [payload] * (wire.MAX_RECORDS + 1))
@@ -0,0 +1,81 @@
+import unittest
+from unittest import mock
+
+import zones
+from sensors import soil_moisture
+
+
+class FakeSPI:
+    """MCP3008 stand-in answering each channel with a fixed raw value."""
+
+    def __init__(self, raw_by_channel):
+        self.raw_by_channel = raw_by_channel
+        self.commands = []
+
+    def xfer2(self, command):
+        self.commands.append(list(command))
+        raw = self.raw_by_channel[(command[1] >> 4) - 8]
+        command[1:] = [(raw >> 8) & 3, raw & 0xFF]
+        return command
+
+    def close(self):
+        pass
+
+
+class BuildZonesTests(unittest.TestCase):
+    def test_zones_from_config_share_dht_sensors_by_pin(self):
+        config = {
+            "moisture_threshold": 35,
+            "crop_stage": "vegetative",
+            "sensor": {"dht22_pin": 4},
+            "zones": [
+                {"field_id": "north", "adc_channel": 0, "relay_gpio_pin": 17},
+                {"field_id": "south", "adc_channel": 1, "relay_gpio_pin": 27, "moisture_threshold": 28},
+                {"field_id": "orchard", "adc_channel": 2, "relay_gpio_pin": 22, "dht22_pin": 5,
+                 "crop_stage": "fruiting"},
+            ],
+        }
+        built, _ = zones.build_zones(config)
+        self.assertEqual([zone.field_id for zone in built], ["north", "south", "orchard"])
+        self.assertEqual([zone.soil_sensor.channel for zone in built], [0, 1, 2])
+        self.assertEqual([zone.relay.pin for zone in built], [17, 27, 22])
+        self.assertEqual([zone.threshold for zone in built], [35, 28, 35])
+        self.assertEqual([zone.crop_stage for zone in built], ["vegetative", "vegetative", "fruiting"])
+        self.assertIs(built[0].dht_sensor, built[1].dht_sensor)
+        self.assertEqual([sensor.pin for sensor in zones.unique_dht_sensors(built)], [4, 5])
+
+    def test_single_field_keys_build_one_zone(self):
+        config = {"field_id": "field-001", "relay_gpio_pin": 18, "sensor": {"soil_moisture_adc_channel": 3}}
+        built, _ = zones.build_zones(config)
+        self.assertEqual(len(built), 1)
+        self.assertEqual((built[0].field_id, built[0].soil_sensor.channel, built[0].relay.pin), ("field-001", 3, 18))
+
+
+class ReadSoilChannelsTests(unittest.TestCase):
+    def make_zones(self, spi, channels):
+        return [
+            zones.Zone(f"f{channel}", soil_moisture.SoilMoistureSensor(channel=channel, spi=spi),
+                       relay=None, dht_sensor=None, threshold=35)
+            for channel in channels
+        ]
+
+    def test_reads_each_channel_over_the_shared_handle(self):
+        spi = FakeSPI({0: 1023, 1: 300, 2: 660})
+        readings = zones.read_soil_channels(self.make_zones(spi, [0, 1, 2]))
+        self.assertEqual([round(value, 1) for value in readings], [0.0, 100.0, 50.2])
+        self.assertEqual(spi.commands, [[1, 0x80, 0], [1, 0x90, 0], [1, 0xA0, 0]])
+
+    def test_oversampled_reads_reuse_the_channel_command(self):
+        spi = FakeSPI({1: 500})
+        sensor = soil_moisture.SoilMoistureSensor(channel=1, spi=spi, oversample=5)
+        sensor.read_moisture_percentage()
+        sensor.read_moisture_percentage()
+        self.assertEqual(spi.commands, [[1, 0x90, 0]] * 10)
+        self.assertEqual(sensor._command, [1, 0x90, 0])
+
+    def test_missing_adc_reads_none_unless_simulating(self):
+        with mock.patch.object(soil_moisture, "HW_AVAILABLE", False):
+            built = self.make_zones(None, [0, 1])
+            self.assertEqual(zones.read_soil_channels(built), [None, None])
+            for value in zones.read_soil_channels(built, simulate=True):
+                self.assertTrue(0 <= value <= 100)